@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import time
+import argparse
+import functools
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Union
+from pydantic import BaseModel, Field
+
+from phi.run.response import RunEvent, RunResponse
+from phi.utils.log import logger
+
+from notifications import NotificationQueue, SlackClient
+from resilience import default_resilience
+from routing import default_router
+from storage import get_engine, workflow_storage
+from workflow import EnhancedProductManagerWorkflow
+
+
+class BatchItem(BaseModel):
+    meeting_id: str = Field(..., description="Identifier of the meeting within the batch")
+    meeting_notes: str = Field(..., description="Raw meeting notes or transcript")
+    linear_users: Dict[str, str] = Field(default_factory=dict, description="Linear user IDs by team member")
+    team_capacity: Dict[str, float] = Field(default_factory=dict, description="Weekly capacity in hours by team member")
+    session_id: Optional[str] = Field(None, description="Workflow session to run the meeting in")
+
+
+class BatchResult(BaseModel):
+    meeting_id: str = Field(..., description="Identifier of the meeting within the batch")
+    status: str = Field(..., description="completed, failed or error")
+    event: Optional[str] = Field(None, description="RunEvent of the workflow response")
+    content: Optional[Any] = Field(None, description="Content of the workflow response")
+    error: Optional[str] = Field(None, description="Error raised while processing the meeting")
+    latency_seconds: float = Field(..., description="Wall-clock time spent on the meeting")
+    stage_seconds: Dict[str, float] = Field(default_factory=dict, description="Seconds spent in each stage")
+
+
+class StageLatency(BaseModel):
+    count: int = Field(..., description="Number of meetings that ran the stage")
+    mean_seconds: float = Field(..., description="Mean stage latency")
+    p50_seconds: float = Field(..., description="Median stage latency")
+    p95_seconds: float = Field(..., description="95th percentile stage latency")
+    max_seconds: float = Field(..., description="Slowest stage latency")
+
+
+class BatchSummary(BaseModel):
+    total: int = Field(..., description="Meetings processed")
+    completed: int = Field(..., description="Meetings that completed the workflow")
+    failed: int = Field(..., description="Meetings whose workflow reported a failure or raised")
+    wall_seconds: float = Field(..., description="Wall-clock time of the batch")
+    meetings_per_minute: float = Field(..., description="Batch throughput")
+    latency: Optional[StageLatency] = Field(None, description="End-to-end latency per meeting")
+    stages: Dict[str, StageLatency] = Field(default_factory=dict, description="Latency per workflow stage")
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def _stage_latency(values: List[float]) -> StageLatency:
+    ordered = sorted(values)
+    return StageLatency(
+        count=len(ordered),
+        mean_seconds=sum(ordered) / len(ordered),
+        p50_seconds=_percentile(ordered, 0.5),
+        p95_seconds=_percentile(ordered, 0.95),
+        max_seconds=ordered[-1],
+    )
+
+
+class BatchStats:
+    """Thread-safe accumulator of batch throughput and per-stage latency"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._latencies: List[float] = []
+        self._stages: Dict[str, List[float]] = {}
+        self._completed = 0
+        self._failed = 0
+
+    def record(self, result: BatchResult) -> None:
+        with self._lock:
+            self._latencies.append(result.latency_seconds)
+            for stage, seconds in result.stage_seconds.items():
+                self._stages.setdefault(stage, []).append(seconds)
+            if result.status == "completed":
+                self._completed += 1
+            else:
+                self._failed += 1
+
+    def summary(self) -> BatchSummary:
+        with self._lock:
+            wall_seconds = time.perf_counter() - self._started
+            total = len(self._latencies)
+            return BatchSummary(
+                total=total,
+                completed=self._completed,
+                failed=self._failed,
+                wall_seconds=wall_seconds,
+                meetings_per_minute=total / wall_seconds * 60 if wall_seconds > 0 else 0.0,
+                latency=_stage_latency(self._latencies) if self._latencies else None,
+                stages={stage: _stage_latency(values) for stage, values in sorted(self._stages.items())},
+            )
+
+
+def default_workflow_factory(
+    item: BatchItem, notification_queue: Optional[NotificationQueue] = None
+) -> EnhancedProductManagerWorkflow:
+    """Build a workflow for one meeting, storing sessions when DB_URL or PM_STORAGE is set"""
+    # One storage, on the process-wide connection pool, is shared by every workflow in the batch
+    storage = workflow_storage("enhanced_pm_workflows") if os.getenv("DB_URL") or os.getenv("PM_STORAGE") else None
+    return EnhancedProductManagerWorkflow(
+        session_id=item.session_id or f"batch-{item.meeting_id}",
+        storage=storage,
+        concurrent_stages=True,
+        notification_queue=notification_queue,
+        model_router=default_router(),
+        resilience=default_resilience(),
+    )
+
+
+def _process(item: BatchItem, workflow_factory: Callable[[BatchItem], EnhancedProductManagerWorkflow]) -> BatchResult:
+    started = time.perf_counter()
+    workflow: Optional[EnhancedProductManagerWorkflow] = None
+    try:
+        workflow = workflow_factory(item)
+        response: RunResponse = workflow.run(
+            meeting_notes=item.meeting_notes,
+            linear_users=item.linear_users,
+            team_capacity=item.team_capacity,
+        )
+        completed = response is not None and response.event == RunEvent.workflow_completed
+        return BatchResult(
+            meeting_id=item.meeting_id,
+            status="completed" if completed else "failed",
+            event=response.event if response is not None else None,
+            content=response.content if response is not None else None,
+            latency_seconds=time.perf_counter() - started,
+            stage_seconds=dict(workflow.stage_timings),
+        )
+    except Exception as e:
+        logger.error(f"Error processing meeting {item.meeting_id}: {e}")
+        return BatchResult(
+            meeting_id=item.meeting_id,
+            status="error",
+            error=str(e),
+            latency_seconds=time.perf_counter() - started,
+            stage_seconds=dict(workflow.stage_timings) if workflow is not None else {},
+        )
+
+
+def run_batch(
+    meetings: Iterable[Union[BatchItem, Dict[str, Any]]],
+    workflow_factory: Callable[[BatchItem], EnhancedProductManagerWorkflow] = default_workflow_factory,
+    max_workers: int = 4,
+    max_pending: Optional[int] = None,
+    stats: Optional[BatchStats] = None,
+) -> Iterator[BatchResult]:
+    """Run many meetings through the workflow, yielding results as they complete
+
+    Meetings are pulled from `meetings` lazily: at most `max_pending` (default 2 * max_workers) are in flight,
+    so a large or unbounded iterator is never read ahead of the worker pool.
+    A failure in one meeting is reported as its result and never stops the batch.
+    """
+    max_pending = max_pending or max_workers * 2
+    source = iter(meetings)
+    in_flight: Set[Future] = set()
+    position = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pm-batch") as executor:
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < max_pending:
+                try:
+                    raw = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                position += 1
+                try:
+                    item = raw if isinstance(raw, BatchItem) else BatchItem(**{"meeting_id": str(position), **raw})
+                except Exception as e:
+                    meeting_id = str(raw.get("meeting_id", position)) if isinstance(raw, dict) else str(position)
+                    result = BatchResult(meeting_id=meeting_id, status="error", error=str(e), latency_seconds=0.0)
+                    if stats is not None:
+                        stats.record(result)
+                    yield result
+                    continue
+                in_flight.add(executor.submit(_process, item, workflow_factory))
+
+            if not in_flight:
+                continue
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if stats is not None:
+                    stats.record(result)
+                yield result
+
+
+def load_meetings(path: str) -> Iterator[Dict[str, Any]]:
+    """Read meetings from a JSONL file (or stdin for "-") one line at a time"""
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if line:
+                yield {"meeting_id": str(line_number), **json.loads(line)}
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Process a JSONL file of meetings through the PM workflow")
+    parser.add_argument("meetings", help="JSONL file with one meeting per line, or - for stdin")
+    parser.add_argument("--workers", type=int, default=4, help="Number of meetings processed concurrently")
+    parser.add_argument("--max-pending", type=int, default=None, help="Meetings read ahead of the workers")
+    parser.add_argument("--output", default="-", help="File to write NDJSON results to, or - for stdout")
+    parser.add_argument(
+        "--digest-window",
+        type=float,
+        default=None,
+        help="Coalesce Slack notifications into digests posted every this many seconds instead of one per meeting",
+    )
+    parser.add_argument("--digest-size", type=int, default=20, help="Post a digest early once it has this many meetings")
+    parser.add_argument("--pool-size", type=int, default=None, help="Database connections shared by the workers (default: --workers)")
+    args = parser.parse_args(argv)
+
+    if os.getenv("DB_URL") and (os.getenv("PM_STORAGE") or "postgres") == "postgres":
+        # Size the shared pool before any workflow opens its storage on it
+        get_engine(pool_size=args.pool_size or args.workers, max_overflow=0)
+
+    stats = BatchStats()
+    queue: Optional[NotificationQueue] = None
+    workflow_factory = default_workflow_factory
+    if args.digest_window is not None:
+        queue = NotificationQueue(SlackClient(resilience=default_resilience()), window_seconds=args.digest_window, max_events=args.digest_size).start()
+        workflow_factory = functools.partial(default_workflow_factory, notification_queue=queue)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for result in run_batch(
+            load_meetings(args.meetings),
+            workflow_factory=workflow_factory,
+            max_workers=args.workers,
+            max_pending=args.max_pending,
+            stats=stats,
+        ):
+            output.write(result.model_dump_json() + "\n")
+            output.flush()
+    finally:
+        if queue is not None:
+            queue.close()
+        if output is not sys.stdout:
+            output.close()
+
+    summary = stats.summary()
+    print(summary.model_dump_json(indent=2), file=sys.stderr)
+    return 0 if summary.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    sys.exit(main())
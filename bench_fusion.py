@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from conftest import FAKE_CREDENTIALS, TEAM, canned_responses, meeting_notes, replay_agent, replay_models
+from dependencies import task_key
+from tracing import Span, Tracer
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow
+
+
+class FusionMeasurement(BaseModel):
+    size: int = Field(..., description="Tasks per meeting")
+    two_call_seconds: float = Field(..., description="Fastest summary plus task generation with one call each")
+    fused_seconds: float = Field(..., description="Fastest fused summary and task generation")
+    two_call_prompt_tokens: int = Field(..., description="Prompt tokens of the two calls")
+    fused_prompt_tokens: int = Field(..., description="Prompt tokens of the fused call")
+    two_call_completion_tokens: int = Field(..., description="Completion tokens of the two calls")
+    fused_completion_tokens: int = Field(..., description="Completion tokens of the fused call")
+    two_call_model_calls: int = Field(..., description="Model round trips of the two-call path")
+    fused_model_calls: int = Field(..., description="Model round trips of the fused path")
+    summary_parity: bool = Field(..., description="Both paths produced the same summary, action items aside")
+    task_parity: float = Field(..., description="Overlap of the two paths' task titles (Jaccard)")
+
+
+class _SpanTotals:
+    """Exporter summing the counters of every finished span"""
+
+    def __init__(self):
+        self.counters: Dict[str, float] = {}
+
+    def export(self, span: Span) -> None:
+        for counter, value in span.counters.items():
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+
+def _plan_once(fused: bool, size: int, responses: Dict[str, List[str]], latency: float, seconds_per_kchar: float):
+    notes = meeting_notes(size)
+    totals = _SpanTotals()
+    agents = {name: replay_agent(factory(), responses, latency, seconds_per_kchar) for name, factory in AGENT_FACTORIES.items()}
+    # Long notes would be summarized in chunks, which the fused path does not do
+    workflow = EnhancedProductManagerWorkflow(
+        session_id="fusion", tracer=Tracer([totals]), summary_chunk_chars=len(notes), **agents
+    )
+    workflow.team_capacity = {name: 40.0 * max(1, size // 25) for name in TEAM}
+    started = time.perf_counter()
+    if fused:
+        summary, tasks = workflow.summarize_and_generate_tasks(notes).split()
+    else:
+        summary = workflow.get_meeting_summary(notes)
+        tasks = workflow.generate_tasks(summary)
+    wall = time.perf_counter() - started
+    calls = sum(model.calls for model in replay_models(workflow))
+    return wall, totals.counters, calls, summary, tasks
+
+
+def measure_fusion(
+    size: int,
+    repeats: int = 3,
+    recordings: Optional[Dict[str, List[str]]] = None,
+    latency: float = 0.0,
+    seconds_per_kchar: float = 0.0,
+) -> FusionMeasurement:
+    """Compare fused summary and task generation with the two-call path on latency, tokens and output"""
+    responses = canned_responses(size)
+    responses.update(recordings or {})
+    two_call = [_plan_once(False, size, responses, latency, seconds_per_kchar) for _ in range(repeats)]
+    fused = [_plan_once(True, size, responses, latency, seconds_per_kchar) for _ in range(repeats)]
+    _, two_call_tokens, two_call_calls, two_call_summary, two_call_tasks = two_call[-1]
+    _, fused_tokens, fused_calls, fused_summary, fused_tasks = fused[-1]
+    two_call_keys = {task_key(task.task_title) for task in two_call_tasks.tasks}
+    fused_keys = {task_key(task.task_title) for task in fused_tasks.tasks}
+    return FusionMeasurement(
+        size=size,
+        two_call_seconds=min(run[0] for run in two_call),
+        fused_seconds=min(run[0] for run in fused),
+        two_call_prompt_tokens=int(two_call_tokens.get("prompt_tokens", 0)),
+        fused_prompt_tokens=int(fused_tokens.get("prompt_tokens", 0)),
+        two_call_completion_tokens=int(two_call_tokens.get("completion_tokens", 0)),
+        fused_completion_tokens=int(fused_tokens.get("completion_tokens", 0)),
+        two_call_model_calls=two_call_calls,
+        fused_model_calls=fused_calls,
+        summary_parity=two_call_summary.model_dump(exclude={"action_items"}) == fused_summary.model_dump(exclude={"action_items"}),
+        task_parity=len(two_call_keys & fused_keys) / len(two_call_keys | fused_keys) if two_call_keys | fused_keys else 1.0,
+    )
+
+
+def format_fusion_table(results: List[FusionMeasurement]) -> str:
+    header = f"{'size':>6}{'2-call s':>10}{'fused s':>10}{'2-call in':>11}{'fused in':>10}{'2-call out':>12}{'fused out':>11}{'calls':>7}{'parity':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        parity = f"{r.task_parity:.0%}" if r.summary_parity else f"{r.task_parity:.0%}*"
+        lines.append(
+            f"{r.size:>6}{r.two_call_seconds:>10.4f}{r.fused_seconds:>10.4f}{r.two_call_prompt_tokens:>11}{r.fused_prompt_tokens:>10}"
+            f"{r.two_call_completion_tokens:>12}{r.fused_completion_tokens:>11}{f'{r.two_call_model_calls}/{r.fused_model_calls}':>7}{parity:>8}"
+        )
+    lines.append("parity: overlap of task titles; * marks a summary that differs")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare fused and two-call summary and task generation offline")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[5, 50, 500], help="Tasks per meeting")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per path and size to take the fastest of")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per model call")
+    parser.add_argument("--seconds-per-kchar", type=float, default=0.0, help="Simulated seconds per 1000 output characters")
+    parser.add_argument("--recordings", help="JSON file of recorded responses by agent name, replacing the canned ones")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+    for variable in FAKE_CREDENTIALS:
+        os.environ.setdefault(variable, "benchmark")
+
+    recordings = None
+    if args.recordings:
+        with open(args.recordings, encoding="utf-8") as f:
+            recordings = json.load(f)
+    results = [
+        measure_fusion(size, args.repeats, recordings, latency=args.latency, seconds_per_kchar=args.seconds_per_kchar)
+        for size in args.sizes
+    ]
+    print(format_fusion_table(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([result.model_dump() for result in results], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
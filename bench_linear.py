@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from pydantic import Field, PrivateAttr
+
+from phi.model.message import Message
+from phi.model.response import ModelResponse
+from phi.utils.tools import get_function_call_for_tool_call
+
+from conftest import ReplayModel
+from fake_services import FakeLinearServer
+from history import estimate_tokens
+from linear_client import LinearClient, issue_description
+from workflow import (
+    EnhancedProductManagerWorkflow,
+    LinearIssue,
+    LinearIssueList,
+    Task,
+    TaskList,
+    TaskPriority,
+    TaskTimeEstimate,
+    build_linear_agent,
+)
+
+TEAM = ["Sarah", "Mike", "Emma", "Alex", "James"]
+LINEAR_USERS = {name: f"user_uuid_{i}" for i, name in enumerate(TEAM, 1)}
+
+
+def sample_tasks(count: int) -> List[Task]:
+    return [
+        Task(
+            task_title=f"Task {i}: implement component {i}",
+            task_description=f"Implement and test component {i} of the platform.",
+            task_assignee=TEAM[i % len(TEAM)],
+            priority=TaskPriority(level=["Low", "Medium", "High", "Critical"][i % 4], reason="Sprint goal"),
+            deadline=datetime(2024, 1, 15) + timedelta(days=i % 10),
+            time_estimate=TaskTimeEstimate(minimum_hours=2, maximum_hours=6, confidence_level="Medium"),
+            tags=["backend", "code"] if i % 2 else ["frontend"],
+            complexity="Moderate",
+            required_skills=["Python"],
+        )
+        for i in range(count)
+    ]
+
+
+class ToolCallingReplayModel(ReplayModel):
+    """Replayed model that makes the given tool calls, one per turn, before its recorded answer
+
+    Like the linear agent's model, it calls create_issue once per task; the calls run through the
+    agent's real LinearTool. Every turn sleeps `latency` seconds.
+    """
+
+    tool_calls: List[Dict[str, Any]] = Field(default_factory=list)
+    _turn: int = PrivateAttr(default=0)
+    _input_tokens: int = PrivateAttr(default=0)
+
+    @property
+    def input_tokens(self) -> int:
+        return self._input_tokens
+
+    def response(self, messages: List[Message]) -> ModelResponse:
+        self._input_tokens += sum(
+            estimate_tokens(str(m.content or "")) + estimate_tokens(json.dumps(m.tool_calls or [])) for m in messages
+        )
+        if self._turn >= len(self.tool_calls):
+            return super().response(messages)
+        arguments = self.tool_calls[self._turn]
+        self._turn += 1
+        self._calls += 1
+        self._simulated_seconds += self.latency
+        time.sleep(self.latency)
+        tool_call = {
+            "id": f"call_{self._turn}",
+            "type": "function",
+            "function": {"name": "create_issue", "arguments": json.dumps(arguments)},
+        }
+        messages.append(Message(role="assistant", tool_calls=[tool_call]))
+        results: List[Message] = []
+        for _ in self.run_function_calls([get_function_call_for_tool_call(tool_call, self.functions)], results):
+            pass
+        messages.extend(results)
+        return self.handle_post_tool_call_messages(messages, ModelResponse())
+
+
+def bench_agent_path(server: FakeLinearServer, tasks: List[Task], llm_latency: float) -> dict:
+    """The workflow's linear agent path: one LLM turn and one LinearTool call per issue, plus a final answer
+
+    The agent runs for real with a replayed model, and its tool calls go to the fake server.
+    """
+    issues = LinearIssueList(
+        issues=[
+            LinearIssue(issue_title=task.task_title, issue_assignee=task.task_assignee, priority=task.priority)
+            for task in tasks
+        ]
+    )
+    model = ToolCallingReplayModel(
+        responses=[issues.model_dump_json()],
+        latency=llm_latency,
+        tool_calls=[
+            {
+                "title": task.task_title,
+                "description": issue_description(task),
+                "team_id": "team",
+                "project_id": "project",
+                "assignee_id": LINEAR_USERS[task.task_assignee],
+            }
+            for task in tasks
+        ],
+    )
+    agent = build_linear_agent()
+    agent.model = model
+    agent.tools[0].endpoint = server.url
+    workflow = EnhancedProductManagerWorkflow(session_id="bench-linear", linear_agent=agent)
+    workflow.update_task_graph(TaskList(tasks=tasks))
+    requests_before = len(server.requests)
+    started = time.perf_counter()
+    result = workflow.create_linear_issues(TaskList(tasks=tasks), LINEAR_USERS)
+    return {
+        "seconds": time.perf_counter() - started,
+        "http_requests": len(server.requests) - requests_before,
+        "llm_calls": model.calls,
+        "estimated_input_tokens": model.input_tokens,
+        "issues_returned": len(result.issues) if result else 0,
+    }
+
+
+def bench_direct_path(server: FakeLinearServer, tasks: List[Task], batch_size: int) -> dict:
+    client = LinearClient(api_key="fake", endpoint=server.url, batch_size=batch_size)
+    requests_before = len(server.requests)
+    issues_before = len(server.issues)
+    started = time.perf_counter()
+    client.create_issues(tasks, "team", "project", LINEAR_USERS, scope="bench")
+    first = time.perf_counter() - started
+    # A retry of the same run must not create anything new
+    retry_started = time.perf_counter()
+    client.create_issues(tasks, "team", "project", LINEAR_USERS, scope="bench")
+    return {
+        "seconds": first,
+        "retry_seconds": time.perf_counter() - retry_started,
+        "http_requests": len(server.requests) - requests_before,
+        "llm_calls": 0,
+        "estimated_input_tokens": 0,
+        "issues_created": len(server.issues) - issues_before,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare the Linear agent path with the direct LinearClient")
+    parser.add_argument("--tasks", type=int, default=40, help="Number of tasks in the meeting")
+    parser.add_argument("--llm-latency", type=float, default=1.5, help="Simulated seconds per LLM turn")
+    parser.add_argument("--network-latency", type=float, default=0.05, help="Simulated seconds per Linear request")
+    parser.add_argument("--batch-size", type=int, default=20, help="Issues per batched mutation")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LINEAR_API_KEY", "fake")
+    os.environ.setdefault("LINEAR_PROJECT_ID", "project")
+    os.environ.setdefault("LINEAR_TEAM_ID", "team")
+    tasks = sample_tasks(args.tasks)
+    with FakeLinearServer(latency=args.network_latency) as server:
+        agent = bench_agent_path(server, tasks, args.llm_latency)
+        direct = bench_direct_path(server, tasks, args.batch_size)
+    print(json.dumps({"tasks": args.tasks, "agent": agent, "direct": direct}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
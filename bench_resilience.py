@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from phi.model.message import Message
+from phi.model.response import ModelResponse
+
+from conftest import FAKE_CREDENTIALS, ReplayModel, canned_responses
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow
+
+
+class FaultyModel(ReplayModel):
+    """ReplayModel that fails `failure_rate` of calls and stalls `slow_rate` of them for `slow_seconds`"""
+
+    failure_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_seconds: float = 0.0
+    seed: int = 0
+
+    _rng: Optional[random.Random] = PrivateAttr(default=None)
+
+    def _fault(self) -> Optional[str]:
+        with self._lock:
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            draw = self._rng.random()
+        if draw < self.failure_rate:
+            return "fail"
+        return "slow" if draw < self.failure_rate + self.slow_rate else None
+
+    def response(self, messages: List[Message]) -> ModelResponse:
+        fault = self._fault()
+        if fault == "fail":
+            raise ConnectionError("injected model fault")
+        if fault == "slow":
+            time.sleep(self.slow_seconds)
+        return super().response(messages)
+
+
+class TailLatency(BaseModel):
+    mode: str = Field(..., description="Calls made directly or through the resilience layer")
+    calls: int = Field(..., description="Calls made")
+    succeeded: int = Field(..., description="Calls that returned a response")
+    p50_seconds: float = Field(..., description="Median latency of successful calls")
+    p95_seconds: float = Field(..., description="95th percentile latency of successful calls")
+    p99_seconds: float = Field(..., description="99th percentile latency of successful calls")
+    max_seconds: float = Field(..., description="Slowest successful call")
+    retries: int = Field(0, description="Retried attempts")
+    hedges: int = Field(0, description="Hedged duplicate requests")
+    abandoned: int = Field(0, description="Attempts given up at their deadline or beaten by their hedge")
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def measure_resilience(
+    calls: int = 200,
+    latency: float = 0.02,
+    failure_rate: float = 0.05,
+    slow_rate: float = 0.03,
+    slow_seconds: float = 0.5,
+    seed: int = 1,
+) -> List[TailLatency]:
+    """Task agent calls against a model that fails and stalls some calls, made directly and through Resilience"""
+    from resilience import Resilience, ResiliencePolicy
+
+    responses = canned_responses(5)
+    results = []
+    for mode in ("direct", "resilient"):
+        agent = AGENT_FACTORIES["task_agent"]()
+        model = FaultyModel(
+            responses=responses[agent.name],
+            latency=latency,
+            failure_rate=failure_rate,
+            slow_rate=slow_rate,
+            slow_seconds=slow_seconds,
+            seed=seed,
+        )
+        resilience = None
+        if mode == "resilient":
+            policy = ResiliencePolicy(base_delay=latency, max_delay=latency * 8, deadline_seconds=slow_seconds * 4, hedge=True)
+            resilience = Resilience({"openai": policy}, seed=seed)
+        workflow = EnhancedProductManagerWorkflow(
+            session_id="resilience", task_agent=agent.deep_copy(update={"model": model}), resilience=resilience
+        )
+        latencies = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            try:
+                workflow._run_agent("task_agent", "Standup")
+            except Exception:
+                continue
+            latencies.append(time.perf_counter() - started)
+        stats = resilience.stats()[0] if resilience is not None else None
+        results.append(
+            TailLatency(
+                mode=mode,
+                calls=calls,
+                succeeded=len(latencies),
+                p50_seconds=_percentile(latencies, 0.5),
+                p95_seconds=_percentile(latencies, 0.95),
+                p99_seconds=_percentile(latencies, 0.99),
+                max_seconds=max(latencies, default=0.0),
+                retries=stats.retries if stats else 0,
+                hedges=stats.hedges if stats else 0,
+                abandoned=stats.abandoned if stats else 0,
+            )
+        )
+    return results
+
+
+def format_tail_table(results: List[TailLatency]) -> str:
+    header = f"{'mode':<11}{'calls':>7}{'ok':>6}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'max s':>9}{'retries':>9}{'hedges':>8}{'abandoned':>11}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.mode:<11}{r.calls:>7}{r.succeeded:>6}{r.p50_seconds:>9.3f}{r.p95_seconds:>9.3f}{r.p99_seconds:>9.3f}"
+            f"{r.max_seconds:>9.3f}{r.retries:>9}{r.hedges:>8}{r.abandoned:>11}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tail latency of direct and resilient agent calls against a faulty model")
+    parser.add_argument("--calls", type=int, default=200, help="Model calls per mode")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated seconds per model call")
+    args = parser.parse_args(argv)
+    for variable in FAKE_CREDENTIALS:
+        os.environ.setdefault(variable, "benchmark")
+
+    print(format_tail_table(measure_resilience(args.calls, latency=args.latency)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
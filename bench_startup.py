@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from conftest import FAKE_CREDENTIALS
+
+
+class StartupMeasurement(BaseModel):
+    module: str = Field(..., description="Module imported by a fresh interpreter")
+    import_seconds: float = Field(..., description="Fastest time to import the module")
+    construct_seconds: float = Field(..., description="Fastest time to construct the first workflow after importing")
+    heavy_modules: List[str] = Field(default_factory=list, description="Optional integrations loaded by the import")
+
+
+# Integrations the workflow should only load once a run needs them
+HEAVY_MODULES = ("sqlalchemy", "github", "slack_sdk", "phi.tools.github", "phi.tools.slack", "phi.tools.linear_tools")
+
+_STARTUP_SCRIPT = """
+import sys, json, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+{module}.EnhancedProductManagerWorkflow(session_id="startup")
+constructed = time.perf_counter()
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps([imported - started, constructed - imported, heavy]))
+"""
+
+
+def measure_startup(module: str = "workflow", repeats: int = 5) -> StartupMeasurement:
+    """Import the workflow module in fresh interpreters, as a short-lived worker does, without any service tokens"""
+    env = {k: v for k, v in os.environ.items() if k not in FAKE_CREDENTIALS}
+    env.setdefault("PHI_TELEMETRY", "false")
+    script = _STARTUP_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+    timings = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        timings.append(json.loads(output.strip().splitlines()[-1]))
+    return StartupMeasurement(
+        module=module,
+        import_seconds=min(t[0] for t in timings),
+        construct_seconds=min(t[1] for t in timings),
+        heavy_modules=timings[-1][2],
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import time and first workflow construction in fresh interpreters")
+    parser.add_argument("--module", default="workflow", help="Module defining EnhancedProductManagerWorkflow")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters to take the fastest of")
+    parser.add_argument("--max-import-seconds", type=float, default=None, help="Exit non-zero if importing takes longer")
+    args = parser.parse_args(argv)
+
+    startup = measure_startup(args.module, repeats=args.repeats)
+    print(
+        f"import {startup.module}: {startup.import_seconds:.3f}s, first workflow: {startup.construct_seconds * 1000:.2f}ms, "
+        f"heavy modules loaded: {', '.join(startup.heavy_modules) or 'none'}"
+    )
+    if args.max_import_seconds is not None and startup.import_seconds > args.max_import_seconds:
+        print(f"REGRESSION import took {startup.import_seconds:.3f}s > {args.max_import_seconds}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
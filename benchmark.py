@@ -0,0 +1,396 @@
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from phi.agent.agent import Agent
+from phi.run.response import RunEvent
+from phi.workflow import WorkflowSession, WorkflowStorage
+
+from conftest import FAKE_CREDENTIALS, LINEAR_USERS, TEAM, canned_responses, meeting_notes, replay_agent, replay_models
+from fake_services import FakeGithubServer, FakeLinearServer, FakeSlackServer
+from github_client import GithubIssueWriter
+from linear_client import LinearClient
+from notifications import NotificationQueue, SlackClient
+from prompt_encoding import PromptEncoder
+from storage import workflow_storage
+from simple_workflow import SimpleProductManagerWorkflow
+from tracing import PrometheusExporter, Tracer
+from tweet_workflow import TweetGeneratorWorkflow, TweetList
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow, TaskList
+
+WORKFLOWS = ("enhanced", "simple", "tweet")
+DEFAULT_SIZES = [5, 50, 500, 5000]
+
+
+class TimedStorage(WorkflowStorage):
+    """Workflow storage wrapper counting and timing session reads and writes"""
+
+    def __init__(self, storage: WorkflowStorage):
+        self.storage = storage
+        self.reads = 0
+        self.writes = 0
+        self.seconds = 0.0
+        self.session_bytes = 0
+
+    def _timed(self, call: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return call()
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def create(self) -> None:
+        self.storage.create()
+
+    def read(self, session_id: str, user_id: Optional[str] = None) -> Optional[WorkflowSession]:
+        self.reads += 1
+        return self._timed(lambda: self.storage.read(session_id=session_id, user_id=user_id))
+
+    def get_all_session_ids(self, user_id: Optional[str] = None, workflow_id: Optional[str] = None) -> List[str]:
+        return self.storage.get_all_session_ids(user_id=user_id, workflow_id=workflow_id)
+
+    def get_all_sessions(self, user_id: Optional[str] = None, workflow_id: Optional[str] = None) -> List[WorkflowSession]:
+        return self.storage.get_all_sessions(user_id=user_id, workflow_id=workflow_id)
+
+    def upsert(self, session: WorkflowSession) -> Optional[WorkflowSession]:
+        self.writes += 1
+        self.session_bytes = len(json.dumps(session.session_data or {}, default=str))
+        return self._timed(lambda: self.storage.upsert(session=session))
+
+    def delete_session(self, session_id: Optional[str] = None):
+        self.storage.delete_session(session_id=session_id)
+
+    def drop(self) -> None:
+        self.storage.drop()
+
+    def upgrade_schema(self) -> None:
+        self.storage.upgrade_schema()
+
+
+class RunMeasurement(BaseModel):
+    wall_seconds: float = Field(..., description="Wall-clock time of the run")
+    model_seconds: float = Field(..., description="Simulated model latency during the run")
+    stage_seconds: Dict[str, float] = Field(default_factory=dict, description="Seconds per workflow stage")
+    storage_reads: int = Field(0, description="Session reads")
+    storage_writes: int = Field(0, description="Session writes")
+    storage_seconds: float = Field(0.0, description="Seconds spent reading and writing the session")
+    session_bytes: int = Field(0, description="Size of the stored session data")
+    completed: bool = Field(..., description="Whether the run produced its output")
+
+
+class BenchmarkResult(BaseModel):
+    workflow: str = Field(..., description="Benchmarked workflow")
+    size: int = Field(..., description="Tasks (or tweets) generated per run")
+    runs: int = Field(..., description="Measured runs")
+    completed: int = Field(..., description="Runs that produced their output")
+    wall_seconds: float = Field(..., description="Mean wall-clock time per run")
+    overhead_seconds: float = Field(..., description="Mean time per run not spent waiting on the model")
+    overhead_ms_per_task: float = Field(..., description="Workflow overhead per generated task")
+    tasks_per_second: float = Field(..., description="Generated tasks processed per second of wall time")
+    stage_seconds: Dict[str, float] = Field(default_factory=dict, description="Mean seconds per workflow stage")
+    validation_seconds: float = Field(..., description="Validating the model output into pydantic models")
+    serialization_seconds: float = Field(..., description="Dumping the output to JSON and encoding a stage payload")
+    storage_reads: float = Field(..., description="Mean session reads per run")
+    storage_writes: float = Field(..., description="Mean session writes per run")
+    storage_seconds: float = Field(..., description="Mean seconds per run spent on session storage")
+    session_bytes: int = Field(..., description="Stored session size after the last run")
+
+
+class FakeBackends:
+    """Local stand-ins for Linear, GitHub and Slack shared by every benchmarked run"""
+
+    def __init__(self):
+        self.linear = FakeLinearServer()
+        self.github = FakeGithubServer(rate_limit=10**9)
+        self.slack = FakeSlackServer()
+
+    def __enter__(self) -> "FakeBackends":
+        for service in (self.linear, self.github, self.slack):
+            service.start()
+        os.environ.setdefault("LINEAR_PROJECT_ID", "benchmark-project")
+        os.environ.setdefault("LINEAR_TEAM_ID", "benchmark-team")
+        os.environ.setdefault("GITHUB_REPO", "benchmark/app")
+        os.environ.setdefault("SLACK_CHANNEL", "#benchmark")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for service in (self.linear, self.github, self.slack):
+            service.stop()
+
+
+def run_once(
+    workflow_name: str,
+    size: int,
+    responses: Dict[str, List[str]],
+    storage: WorkflowStorage,
+    backends: Optional[FakeBackends],
+    session_id: str,
+    latency: float = 0.0,
+    seconds_per_kchar: float = 0.0,
+    tracer: Optional[Tracer] = None,
+) -> RunMeasurement:
+    """Build a workflow with replayed agents and fake backends, run it once and measure it"""
+    timed_storage = TimedStorage(storage)
+    if workflow_name == "enhanced":
+        workflow_class = EnhancedProductManagerWorkflow
+    elif workflow_name == "simple":
+        workflow_class = SimpleProductManagerWorkflow
+    else:
+        workflow_class = TweetGeneratorWorkflow
+    if workflow_class is EnhancedProductManagerWorkflow:
+        prototypes = {name: factory() for name, factory in AGENT_FACTORIES.items()}
+    else:
+        prototypes = {
+            name: field.default for name, field in workflow_class.model_fields.items() if isinstance(field.default, Agent)
+        }
+    agents = {name: replay_agent(agent, responses, latency, seconds_per_kchar) for name, agent in prototypes.items()}
+
+    capacity = {name: 40.0 * max(1, size // 25) for name in TEAM}
+    if workflow_name == "enhanced":
+        extra: Dict[str, Any] = {"team_roles": TEAM, "tracer": tracer}
+        if backends is not None:
+            extra.update(
+                linear_client=LinearClient(api_key="benchmark", endpoint=backends.linear.url, max_concurrency=4),
+                github_client=GithubIssueWriter(
+                    token="benchmark",
+                    api_url=backends.github.url,
+                    max_concurrency=8,
+                    requests_per_second=10_000,
+                    burst=10_000,
+                ),
+                notification_queue=NotificationQueue(
+                    SlackClient(token="benchmark", api_url=backends.slack.url, messages_per_second=1000),
+                    window_seconds=3600,
+                ),
+            )
+        workflow = workflow_class(session_id=session_id, storage=timed_storage, **agents, **extra)
+        run = lambda: workflow.run(meeting_notes=meeting_notes(size), linear_users=LINEAR_USERS, team_capacity=capacity)
+    elif workflow_name == "simple":
+        workflow = workflow_class(session_id=session_id, storage=timed_storage, **agents)
+        run = lambda: workflow.run(meeting_notes=meeting_notes(size), team_capacity={k: int(v) for k, v in capacity.items()})
+    else:
+        workflow = workflow_class(session_id=session_id, storage=timed_storage, **agents)
+        run = workflow.run
+
+    started = time.perf_counter()
+    response = run()
+    if workflow_name == "enhanced" and workflow.notification_queue is not None:
+        workflow.notification_queue.close()
+    wall_seconds = time.perf_counter() - started
+
+    if workflow_name == "enhanced":
+        completed = response is not None and response.event == RunEvent.workflow_completed
+        stage_seconds = dict(workflow.stage_timings)
+    else:
+        content = response.content if response is not None else None
+        completed = bool(content and (getattr(content, "tasks", None) or getattr(content, "tweets", None)))
+        stage_seconds = {"run": wall_seconds}
+    return RunMeasurement(
+        wall_seconds=wall_seconds,
+        model_seconds=sum(model.simulated_seconds for model in replay_models(workflow)),
+        stage_seconds=stage_seconds,
+        storage_reads=timed_storage.reads,
+        storage_writes=timed_storage.writes,
+        storage_seconds=timed_storage.seconds,
+        session_bytes=timed_storage.session_bytes,
+        completed=completed,
+    )
+
+
+def _best_of(repeats: int, func: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure_codec(workflow_name: str, responses: Dict[str, List[str]], repeats: int = 3):
+    """Seconds to validate the main model output and to serialize it again"""
+    if workflow_name == "tweet":
+        raw = responses["Tweet Generator"][0]
+        parsed = TweetList.model_validate_json(raw)
+        return _best_of(repeats, lambda: TweetList.model_validate_json(raw)), _best_of(repeats, parsed.model_dump_json)
+    raw = responses["Task Agent"][0]
+    tasks = TaskList.model_validate_json(raw)
+    encoder = PromptEncoder()
+    validation = _best_of(repeats, lambda: TaskList.model_validate_json(raw))
+    serialization = _best_of(
+        repeats, lambda: (tasks.model_dump_json(), encoder.encode("create_linear_issues", tasks=tasks.tasks))
+    )
+    return validation, serialization
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def benchmark(
+    workflow_name: str,
+    size: int,
+    repeats: int,
+    storage: WorkflowStorage,
+    backends: Optional[FakeBackends],
+    recordings: Optional[Dict[str, List[str]]] = None,
+    latency: float = 0.0,
+    seconds_per_kchar: float = 0.0,
+    tracer: Optional[Tracer] = None,
+) -> BenchmarkResult:
+    """Run a workflow `repeats` times at one meeting size and aggregate the measurements"""
+    responses = canned_responses(size)
+    responses.update(recordings or {})
+    measurements = [
+        run_once(
+            workflow_name,
+            size,
+            responses,
+            storage,
+            backends,
+            session_id=f"bench-{workflow_name}-{size}-{attempt}",
+            latency=latency,
+            seconds_per_kchar=seconds_per_kchar,
+            tracer=tracer,
+        )
+        for attempt in range(repeats)
+    ]
+    validation, serialization = measure_codec(workflow_name, responses)
+    stages = sorted({stage for m in measurements for stage in m.stage_seconds})
+    wall = _mean([m.wall_seconds for m in measurements])
+    overhead = _mean([max(0.0, m.wall_seconds - m.model_seconds) for m in measurements])
+    return BenchmarkResult(
+        workflow=workflow_name,
+        size=size,
+        runs=len(measurements),
+        completed=sum(m.completed for m in measurements),
+        wall_seconds=wall,
+        overhead_seconds=overhead,
+        overhead_ms_per_task=overhead / size * 1000,
+        tasks_per_second=size / wall if wall > 0 else 0.0,
+        stage_seconds={stage: _mean([m.stage_seconds.get(stage, 0.0) for m in measurements]) for stage in stages},
+        validation_seconds=validation,
+        serialization_seconds=serialization,
+        storage_reads=_mean([m.storage_reads for m in measurements]),
+        storage_writes=_mean([m.storage_writes for m in measurements]),
+        storage_seconds=_mean([m.storage_seconds for m in measurements]),
+        session_bytes=measurements[-1].session_bytes,
+    )
+
+
+def check_regressions(
+    results: List[BenchmarkResult],
+    baseline: Optional[List[Dict[str, Any]]] = None,
+    tolerance: float = 0.25,
+    min_slack_seconds: float = 0.005,
+    max_overhead_ms_per_task: Optional[float] = None,
+) -> List[str]:
+    """Describe every result slower than its baseline (by more than `tolerance`) or over the absolute budget"""
+    failures = []
+    previous = {(entry["workflow"], entry["size"]): entry for entry in baseline or []}
+    for result in results:
+        if result.completed < result.runs:
+            failures.append(f"{result.workflow}/{result.size}: {result.runs - result.completed} runs did not complete")
+        entry = previous.get((result.workflow, result.size))
+        if entry is not None:
+            limit = max(entry["overhead_seconds"] * (1 + tolerance), entry["overhead_seconds"] + min_slack_seconds)
+            if result.overhead_seconds > limit:
+                failures.append(
+                    f"{result.workflow}/{result.size}: overhead {result.overhead_seconds:.4f}s "
+                    f"exceeds baseline {entry['overhead_seconds']:.4f}s by more than {tolerance:.0%}"
+                )
+        if max_overhead_ms_per_task is not None and result.overhead_ms_per_task > max_overhead_ms_per_task:
+            failures.append(
+                f"{result.workflow}/{result.size}: {result.overhead_ms_per_task:.3f}ms overhead per task "
+                f"exceeds {max_overhead_ms_per_task}ms"
+            )
+    return failures
+
+
+def format_table(results: List[BenchmarkResult]) -> str:
+    header = f"{'workflow':<10}{'size':>6}{'wall s':>10}{'overhead s':>12}{'ms/task':>10}{'tasks/s':>11}{'validate s':>12}{'serialize s':>13}{'storage s':>11}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.workflow:<10}{r.size:>6}{r.wall_seconds:>10.4f}{r.overhead_seconds:>12.4f}{r.overhead_ms_per_task:>10.3f}"
+            f"{r.tasks_per_second:>11.1f}{r.validation_seconds:>12.5f}{r.serialization_seconds:>13.5f}{r.storage_seconds:>11.4f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the workflows with replayed model output")
+    parser.add_argument("--workflows", nargs="+", choices=WORKFLOWS, default=list(WORKFLOWS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Tasks per meeting")
+    parser.add_argument("--repeats", type=int, default=2, help="Measured runs per workflow and size")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per model call")
+    parser.add_argument("--seconds-per-kchar", type=float, default=0.0, help="Simulated seconds per 1000 output characters")
+    parser.add_argument("--agents", action="store_true", help="Use the Linear/GitHub/Slack agents instead of the direct clients")
+    parser.add_argument("--recordings", help="JSON file of recorded responses by agent name, replacing the canned ones")
+    parser.add_argument("--storage", choices=("sqlite", "memory"), default="sqlite", help="Session storage without --db-url")
+    parser.add_argument("--db-url", help="Store sessions in Postgres instead of in-memory SQLite")
+    parser.add_argument("--output", help="Write the results as JSON, e.g. to use as a baseline")
+    parser.add_argument("--baseline", help="Results JSON from an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown relative to the baseline")
+    parser.add_argument("--max-overhead-ms-per-task", type=float, default=None, help="Absolute overhead budget")
+    parser.add_argument("--metrics", help="Trace the enhanced workflow and write Prometheus metrics to this file")
+    args = parser.parse_args(argv)
+    for variable in FAKE_CREDENTIALS:
+        os.environ.setdefault(variable, "benchmark")
+
+    recordings = None
+    if args.recordings:
+        with open(args.recordings, encoding="utf-8") as f:
+            recordings = json.load(f)
+
+    if args.db_url:
+        storage: WorkflowStorage = workflow_storage("benchmark_workflows", backend="postgres", db_url=args.db_url)
+    else:
+        storage = workflow_storage("benchmark_workflows", backend=args.storage)
+
+    exporter = PrometheusExporter()
+    tracer = Tracer([exporter]) if args.metrics else None
+    results: List[BenchmarkResult] = []
+    with FakeBackends() as backends:
+        for workflow_name in args.workflows:
+            # The tweet workflow always writes three tweets, so meeting size does not apply
+            sizes = [3] if workflow_name == "tweet" else args.sizes
+            for size in sizes:
+                result = benchmark(
+                    workflow_name,
+                    size,
+                    args.repeats,
+                    storage,
+                    None if args.agents else backends,
+                    recordings=recordings,
+                    latency=args.latency,
+                    seconds_per_kchar=args.seconds_per_kchar,
+                    tracer=tracer,
+                )
+                results.append(result)
+                print(f"{workflow_name} x {size}: {result.wall_seconds:.4f}s", file=sys.stderr)
+
+    print(format_table(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([result.model_dump() for result in results], f, indent=2)
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(exporter.render())
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    failures = check_regressions(results, baseline, args.tolerance, max_overhead_ms_per_task=args.max_overhead_ms_per_task)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Type, TypeVar
+from pydantic import BaseModel
+
+from phi.agent.agent import Agent
+from phi.utils.log import logger
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# phi falls back to this model when an Agent is created without one
+DEFAULT_MODEL_ID = "gpt-4o"
+
+
+def normalize_notes(notes: str) -> str:
+    """Normalize meeting notes so whitespace-only edits map to the same cache entry"""
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in notes.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def notes_digest(notes: str) -> str:
+    """Hash of the normalized meeting notes"""
+    return hashlib.sha256(normalize_notes(notes).encode("utf-8")).hexdigest()
+
+
+def agent_model_id(agent: Agent) -> str:
+    """The id of the model an agent runs on"""
+    return getattr(agent.model, "id", None) or DEFAULT_MODEL_ID
+
+
+def cache_key(agent: Agent, payload: Any, model_id: Optional[str] = None) -> str:
+    """Content address of an agent call: its input payload, instructions and model (default: the agent's own)"""
+    material = json.dumps(
+        {
+            "agent": agent.name,
+            "instructions": agent.instructions,
+            "model": model_id or agent_model_id(agent),
+            "payload": payload,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemoryResultCache:
+    """In-process LRU cache of validated results with optional TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, stage: str, value: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class PgResultCache:
+    """Postgres tier of the result cache, stored alongside the workflow sessions"""
+
+    def __init__(
+        self,
+        table_name: str = "enhanced_pm_cache",
+        schema: Optional[str] = "ai",
+        db_url: Optional[str] = None,
+        db_engine: Optional[Any] = None,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+    ):
+        try:
+            from sqlalchemy import create_engine, MetaData, Table, Column, String, BigInteger, Index, JSON
+            from sqlalchemy.dialects import postgresql
+        except ImportError:
+            raise ImportError("`sqlalchemy` not installed. Please install it with `pip install sqlalchemy`")
+
+        _engine = db_engine
+        if _engine is None and db_url is not None:
+            _engine = create_engine(db_url)
+        if _engine is None:
+            raise ValueError("Must provide either db_url or db_engine")
+
+        self.schema = schema
+        self.db_engine = _engine
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.table = Table(
+            table_name,
+            MetaData(schema=schema),
+            # Content address of the agent call: Primary Key
+            Column("cache_key", String, primary_key=True),
+            # Agent that produced the result
+            Column("stage", String),
+            # Validated result as JSON (JSONB on Postgres; other databases are supported for tests)
+            Column("value", JSON().with_variant(postgresql.JSONB(), "postgresql")),
+            # The Unix timestamps of when the entry was written and when it expires
+            Column("created_at", BigInteger),
+            Column("expires_at", BigInteger, nullable=True),
+            extend_existing=True,
+        )
+        Index(f"idx_{table_name}_expires_at", self.table.c.expires_at)
+        self._created = False
+
+    def create(self) -> None:
+        """Create the cache table if it doesn't exist"""
+        from sqlalchemy.sql.expression import text
+
+        if self._created:
+            return
+        with self.db_engine.begin() as conn:
+            if self.schema is not None:
+                conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.schema};"))
+            self.table.create(conn, checkfirst=True)
+        self._created = True
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        from sqlalchemy.sql.expression import select
+
+        try:
+            self.create()
+            with self.db_engine.connect() as conn:
+                row = conn.execute(
+                    select(self.table.c.value, self.table.c.expires_at).where(self.table.c.cache_key == key)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"Error reading from result cache: {e}")
+            row = None
+        if row is None or (row.expires_at is not None and row.expires_at < time.time()):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return row.value
+
+    def set(self, key: str, stage: str, value: Dict[str, Any]) -> None:
+        if self.db_engine.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        now = int(time.time())
+        expires_at = now + int(self.ttl_seconds) if self.ttl_seconds is not None else None
+        try:
+            self.create()
+            stmt = insert(self.table).values(
+                cache_key=key, stage=stage, value=value, created_at=now, expires_at=expires_at
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["cache_key"],
+                set_=dict(value=stmt.excluded.value, created_at=now, expires_at=expires_at),
+            )
+            with self.db_engine.begin() as conn:
+                conn.execute(stmt)
+        except Exception as e:
+            logger.warning(f"Error writing to result cache: {e}")
+
+    def evict_expired(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        with self.db_engine.begin() as conn:
+            result = conn.execute(self.table.delete().where(self.table.c.expires_at < int(time.time())))
+        return result.rowcount
+
+    def clear(self) -> None:
+        with self.db_engine.begin() as conn:
+            conn.execute(self.table.delete())
+
+
+class ResultCache:
+    """Tiered cache of validated agent results
+
+    Tiers are checked in order and a hit in a slower tier is copied into the faster ones.
+    Values are stored as JSON and re-validated into the requested model on every hit,
+    so callers always get a fresh object they are free to mutate.
+    """
+
+    def __init__(self, tiers: Optional[List[Any]] = None):
+        self.tiers = tiers if tiers is not None else [MemoryResultCache()]
+
+    def get(self, key: str, model: Type[ModelT]) -> Optional[ModelT]:
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is None:
+                continue
+            try:
+                result = model.model_validate(value)
+            except Exception as e:
+                logger.warning(f"Discarding invalid cached {model.__name__}: {e}")
+                continue
+            for faster in self.tiers[:index]:
+                faster.set(key, model.__name__, value)
+            return result
+        return None
+
+    def set(self, key: str, result: BaseModel) -> None:
+        value = result.model_dump(mode="json")
+        for tier in self.tiers:
+            tier.set(key, type(result).__name__, value)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit and miss counters per tier"""
+        return {type(tier).__name__: {"hits": tier.hits, "misses": tier.misses} for tier in self.tiers}
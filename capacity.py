@@ -0,0 +1,236 @@
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Literal, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from workload import task_hours
+
+if TYPE_CHECKING:
+    from workflow import Task
+
+WORKDAYS = (0, 1, 2, 3, 4)
+
+
+class OverallocationWindow(BaseModel):
+    member: str = Field(..., description="Overbooked team member")
+    start: date = Field(..., description="First day of the window")
+    end: date = Field(..., description="Last day of the window")
+    planned_hours: float = Field(..., description="Hours planned for the member in the window")
+    capacity_hours: float = Field(..., description="Hours the member has available in the window")
+    peak_utilization: float = Field(..., description="Highest planned/available ratio over any rolling window inside it")
+
+    def alert(self) -> str:
+        return (
+            f"{self.member}: {self.planned_hours:.1f}hrs planned against {self.capacity_hours:.1f}hrs available "
+            f"from {self.start.isoformat()} to {self.end.isoformat()} (peak {self.peak_utilization:.0%})"
+        )
+
+
+def _day(value: Optional[datetime]) -> Optional[date]:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    totals = np.cumsum(np.pad(values, ((0, 0), (1, 0))), axis=1)
+    return totals[:, window:] - totals[:, :-window]
+
+
+def _ratio(planned: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    # Planned hours on days without capacity count as infinitely overbooked
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = planned / capacity
+    ratio[capacity <= 0] = np.where(planned[capacity <= 0] > 1e-9, np.inf, 0.0)
+    return ratio
+
+
+class CapacityLedger:
+    """Planned and available hours per team member and day, as members x days NumPy matrices
+
+    Each member's weekly hours are split evenly over the workdays. A task's hours (the midpoint of
+    its time estimate by default) are spread evenly over the workdays from the ledger start to its
+    deadline; tasks without a deadline are spread over `default_span_days`, and overdue tasks land on
+    the first workday. Tasks are added in one vectorized pass, and the per-task spans are kept so
+    reassignments can be evaluated (`what_if`) without rebuilding the ledger.
+    """
+
+    def __init__(
+        self,
+        weekly_hours: Mapping[str, float],
+        start: date,
+        days: int = 28,
+        workdays: Sequence[int] = WORKDAYS,
+        default_span_days: int = 14,
+        estimate: Literal["minimum", "expected", "maximum"] = "expected",
+    ):
+        self.start = _day(start)
+        self.days = days
+        self.default_span_days = default_span_days
+        self.estimate = estimate
+        self.members: List[str] = list(weekly_hours)
+        self._index: Dict[str, int] = {member: i for i, member in enumerate(self.members)}
+
+        weekdays = (np.arange(days) + self.start.weekday()) % 7
+        self.workday = np.isin(weekdays, list(workdays))
+        daily = np.array([weekly_hours[member] for member in self.members], dtype=float) / max(1, len(workdays))
+        self.capacity = np.outer(daily, self.workday)
+        self.planned = np.zeros((len(self.members), days))
+        self._workdays_before = np.concatenate(([0], np.cumsum(self.workday)))
+        # Index of the first workday on or after each day (the last day if there is none)
+        later = np.where(self.workday, np.arange(days), days - 1)
+        self._next_workday = np.minimum.accumulate(later[::-1])[::-1]
+        self._previous_workday = np.maximum.accumulate(np.where(self.workday, np.arange(days), 0))
+
+        self.task_titles: List[str] = []
+        self._task_member = np.zeros(0, dtype=np.intp)
+        self._task_first = np.zeros(0, dtype=np.intp)
+        self._task_last = np.zeros(0, dtype=np.intp)
+        self._task_hours = np.zeros(0)
+        self.unassigned_hours = 0.0
+
+    @classmethod
+    def from_tasks(
+        cls,
+        weekly_hours: Mapping[str, float],
+        tasks: Sequence["Task"],
+        start: date,
+        min_days: int = 28,
+        max_days: int = 366,
+        **kwargs,
+    ) -> "CapacityLedger":
+        """Ledger long enough to cover the latest deadline (up to `max_days`), with `tasks` added"""
+        start = _day(start)
+        deadlines = [_day(task.deadline) for task in tasks if task.deadline is not None]
+        latest = max(((deadline - start).days + 1 for deadline in deadlines), default=0)
+        ledger = cls(weekly_hours, start, days=min(max_days, max(min_days, latest)), **kwargs)
+        ledger.add_tasks(tasks)
+        return ledger
+
+    def _member_indices(self, names: Iterable[str]) -> np.ndarray:
+        # Members not in the ledger yet get a row without capacity
+        names = list(names)
+        new = [name for name in dict.fromkeys(names) if name not in self._index]
+        if new:
+            for name in new:
+                self._index[name] = len(self.members)
+                self.members.append(name)
+            padding = np.zeros((len(new), self.days))
+            self.capacity = np.vstack([self.capacity, padding])
+            self.planned = np.vstack([self.planned, padding])
+        return np.array([self._index[name] for name in names], dtype=np.intp)
+
+    def _spread(self, members: np.ndarray, first: np.ndarray, last: np.ndarray, hours: np.ndarray) -> None:
+        workdays = np.maximum(1, self._workdays_before[last + 1] - self._workdays_before[first])
+        rate = hours / workdays
+        diff = np.zeros((len(self.members), self.days + 1))
+        np.add.at(diff, (members, first), rate)
+        np.add.at(diff, (members, last + 1), -rate)
+        self.planned += np.cumsum(diff[:, :-1], axis=1) * self.workday
+
+    def add_tasks(self, tasks: Sequence["Task"]) -> None:
+        """Plan the hours of assigned tasks; hours of unassigned ones are only totalled"""
+        assigned = [task for task in tasks if task.task_assignee]
+        self.unassigned_hours += sum(task_hours(task, self.estimate) for task in tasks if not task.task_assignee)
+        if not assigned:
+            return
+        offsets = np.array(
+            [
+                (_day(task.deadline) - self.start).days if task.deadline is not None else self.default_span_days - 1
+                for task in assigned
+            ]
+        )
+        first = np.zeros(len(assigned), dtype=np.intp)
+        last = np.maximum(np.clip(offsets, 0, self.days - 1), self._next_workday[first]).astype(np.intp)
+        members = self._member_indices(task.task_assignee for task in assigned)
+        hours = np.array([task_hours(task, self.estimate) for task in assigned])
+        self._spread(members, first, last, hours)
+
+        self.task_titles.extend(task.task_title for task in assigned)
+        self._task_member = np.concatenate([self._task_member, members])
+        self._task_first = np.concatenate([self._task_first, first])
+        self._task_last = np.concatenate([self._task_last, last])
+        self._task_hours = np.concatenate([self._task_hours, hours])
+
+    def copy(self) -> "CapacityLedger":
+        ledger = object.__new__(CapacityLedger)
+        ledger.__dict__.update(self.__dict__)
+        ledger.members = list(self.members)
+        ledger._index = dict(self._index)
+        ledger.task_titles = list(self.task_titles)
+        for name in ("capacity", "planned", "_task_member", "_task_first", "_task_last", "_task_hours"):
+            setattr(ledger, name, getattr(self, name).copy())
+        return ledger
+
+    def what_if(self, reassignments: Mapping[str, str]) -> "CapacityLedger":
+        """Copy of the ledger with the tasks of the given titles moved to the given members"""
+        ledger = self.copy()
+        moved = np.array([title in reassignments for title in ledger.task_titles], dtype=bool)
+        if not moved.any():
+            return ledger
+        targets = ledger._member_indices(reassignments[title] for title, hit in zip(ledger.task_titles, moved) if hit)
+        first, last, hours = ledger._task_first[moved], ledger._task_last[moved], ledger._task_hours[moved]
+        ledger._spread(ledger._task_member[moved], first, last, -hours)
+        ledger._spread(targets, first, last, hours)
+        np.maximum(ledger.planned, 0.0, out=ledger.planned)
+        ledger._task_member[moved] = targets
+        return ledger
+
+    def _horizon(self, days: Optional[int]) -> int:
+        return self.days if days is None else max(1, min(days, self.days))
+
+    def utilization(self, days: Optional[int] = None) -> np.ndarray:
+        """Planned over available hours per member and day (inf where hours are planned on a day off)"""
+        horizon = self._horizon(days)
+        return _ratio(self.planned[:, :horizon], self.capacity[:, :horizon])
+
+    def rolling_utilization(self, window: int = 5, days: Optional[int] = None) -> np.ndarray:
+        """Planned over available hours of every `window`-day span, per member and span start"""
+        horizon = self._horizon(days)
+        window = min(window, horizon)
+        return _ratio(
+            _rolling_sum(self.planned[:, :horizon], window), _rolling_sum(self.capacity[:, :horizon], window)
+        )
+
+    def _over(self, days: Optional[int], window: int, threshold: float) -> Tuple[np.ndarray, int]:
+        ratio = self.rolling_utilization(window, days)
+        return ratio > threshold + 1e-9, min(window, self._horizon(days))
+
+    def overbooked(self, days: int = 21, window: int = 5, threshold: float = 1.0) -> List[str]:
+        """Members with more than `threshold` of their hours planned in some `window`-day span of the next `days`"""
+        over, _ = self._over(days, window, threshold)
+        return [self.members[i] for i in np.flatnonzero(over.any(axis=1))]
+
+    def overallocations(self, days: int = 21, window: int = 5, threshold: float = 1.0) -> List[OverallocationWindow]:
+        """Overbooked stretches per member: overlapping overbooked `window`-day spans merged into one"""
+        over, window = self._over(days, window, threshold)
+        if not over.any():
+            return []
+        ratio = self.rolling_utilization(window, days)
+        edges = np.diff(np.pad(over.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+        horizon = self._horizon(days)
+        planned = np.cumsum(np.pad(self.planned[:, :horizon], ((0, 0), (1, 0))), axis=1)
+        capacity = np.cumsum(np.pad(self.capacity[:, :horizon], ((0, 0), (1, 0))), axis=1)
+        windows = []
+        for row, start, end in zip(rows, starts, ends):
+            # Days off at either edge of the merged spans are not part of the stretch
+            last_day = max(start, int(self._previous_workday[end - 1 + window - 1]))
+            first_day = min(last_day, int(self._next_workday[start]))
+            windows.append(
+                OverallocationWindow(
+                    member=self.members[row],
+                    start=self.start + timedelta(days=first_day),
+                    end=self.start + timedelta(days=last_day),
+                    planned_hours=float(planned[row, last_day + 1] - planned[row, first_day]),
+                    capacity_hours=float(capacity[row, last_day + 1] - capacity[row, first_day]),
+                    peak_utilization=float(ratio[row, start:end].max()),
+                )
+            )
+        return windows
+
+    def remaining(self, days: Optional[int] = None) -> Dict[str, float]:
+        """Available minus planned hours per member over the next `days` (the whole ledger by default)"""
+        horizon = self._horizon(days)
+        left = self.capacity[:, :horizon].sum(axis=1) - self.planned[:, :horizon].sum(axis=1)
+        return dict(zip(self.members, left.round(2).tolist()))
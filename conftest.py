@@ -0,0 +1,236 @@
+import os
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+from pydantic import Field, PrivateAttr
+
+from phi.agent.agent import Agent
+from phi.model.base import Model
+from phi.model.message import Message
+from phi.model.response import ModelResponse
+
+from history import estimate_tokens
+from tweet_workflow import Tweet, TweetList
+from workflow import (
+    LinearIssue,
+    LinearIssueList,
+    MeetingPlan,
+    MeetingSummary,
+    Task,
+    TaskDependency,
+    TaskList,
+    TaskPriority,
+    TaskTimeEstimate,
+)
+
+TEAM = {
+    "Sarah": "Tech Lead",
+    "Mike": "Backend Developer",
+    "Emma": "Frontend Developer",
+    "Alex": "DevOps Engineer",
+    "James": "QA Engineer",
+}
+LINEAR_USERS = {name: f"user_uuid_{i}" for i, name in enumerate(TEAM, 1)}
+
+# Every tool backend is faked, but phi's tools refuse to construct without a token
+FAKE_CREDENTIALS = ("OPENAI_API_KEY", "GITHUB_ACCESS_TOKEN", "SLACK_TOKEN", "LINEAR_API_KEY")
+
+
+@pytest.fixture(autouse=True)
+def fake_credentials(monkeypatch):
+    """Agents are built against fake backends, but phi's tools refuse to construct without a token"""
+    for variable in FAKE_CREDENTIALS:
+        if not os.getenv(variable):
+            monkeypatch.setenv(variable, "benchmark")
+
+
+class ReplayModel(Model):
+    """Model backend that replays recorded responses after an artificial latency
+
+    Responses are returned in order and cycled. Each call sleeps `latency` seconds plus
+    `seconds_per_kchar` per thousand characters of output, and the simulated time is recorded so it
+    can be subtracted from measured wall time.
+    """
+
+    id: str = "replay"
+    name: str = "ReplayModel"
+    provider: str = "Replay"
+    responses: List[str] = Field(default_factory=list)
+    latency: float = 0.0
+    seconds_per_kchar: float = 0.0
+
+    _calls: int = PrivateAttr(default=0)
+    _simulated_seconds: float = PrivateAttr(default=0.0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    @property
+    def simulated_seconds(self) -> float:
+        return self._simulated_seconds
+
+    def _next(self) -> str:
+        with self._lock:
+            content = self.responses[self._calls % len(self.responses)] if self.responses else ""
+            self._calls += 1
+            self._simulated_seconds += self.latency + len(content) / 1000 * self.seconds_per_kchar
+        return content
+
+    def _assistant_message(self, messages: List[Message], content: str) -> Message:
+        # Estimated usage in the shape OpenAI models report it, so traces carry token counts
+        prompt_tokens = sum(estimate_tokens(str(m.content or "")) for m in messages)
+        completion_tokens = estimate_tokens(content)
+        metrics = {"input_tokens": prompt_tokens, "output_tokens": completion_tokens}
+        return Message(role="assistant", content=content, metrics=metrics)
+
+    def response(self, messages: List[Message]) -> ModelResponse:
+        content = self._next()
+        time.sleep(self.latency + len(content) / 1000 * self.seconds_per_kchar)
+        messages.append(self._assistant_message(messages, content))
+        return ModelResponse(content=content)
+
+    def response_stream(self, messages: List[Message]) -> Iterator[ModelResponse]:
+        content = self._next()
+        time.sleep(self.latency)
+        for start in range(0, len(content), 256):
+            chunk = content[start : start + 256]
+            time.sleep(len(chunk) / 1000 * self.seconds_per_kchar)
+            yield ModelResponse(content=chunk)
+        messages.append(self._assistant_message(messages, content))
+
+
+def replay_models(workflow: Any) -> List[ReplayModel]:
+    """The ReplayModels of a workflow's agents"""
+    models = []
+    for name in type(workflow).model_fields:
+        value = getattr(workflow, name)
+        if isinstance(value, Agent) and isinstance(value.model, ReplayModel):
+            models.append(value.model)
+    return models
+
+
+def make_task(
+    title: str,
+    minimum_hours: float = 2,
+    maximum_hours: Optional[float] = None,
+    assignee: Optional[str] = None,
+    priority: str = "High",
+    reason: Optional[str] = None,
+    tags=(),
+    skills=(),
+    dependencies=(),
+    complexity: str = "Simple",
+    **fields: Any,
+) -> Task:
+    """Task with the given estimate (a fixed one without maximum_hours) and (task_id, type) dependencies"""
+    return Task(
+        task_title=title,
+        task_assignee=assignee,
+        priority=TaskPriority(level=priority, reason=reason),
+        time_estimate=TaskTimeEstimate(
+            minimum_hours=minimum_hours,
+            maximum_hours=minimum_hours if maximum_hours is None else maximum_hours,
+            confidence_level="Medium",
+        ),
+        complexity=complexity,
+        tags=list(tags),
+        required_skills=list(skills),
+        dependencies=[
+            TaskDependency(task_id=task_id, dependency_type=dependency_type, impact_level="High")
+            for task_id, dependency_type in dependencies
+        ],
+        **fields,
+    )
+
+
+def canned_tasks(count: int, seed: int = 7) -> TaskList:
+    """Deterministic task list; every other task is code-tagged and a few depend on earlier ones"""
+    rng = random.Random(seed)
+    names = list(TEAM)
+    tasks = []
+    for i in range(count):
+        minimum = rng.choice([1, 2, 4, 8])
+        dependencies = []
+        if i and rng.random() < 0.2:
+            dependencies.append(
+                TaskDependency(task_id=f"Task {rng.randrange(i)}", dependency_type="Blocks", impact_level="Medium")
+            )
+        tasks.append(
+            Task(
+                task_title=f"Task {i}",
+                task_description=f"Implement and test component {i} of the platform.",
+                task_assignee=names[i % len(names)],
+                priority=TaskPriority(level=rng.choice(["Low", "Medium", "High", "Critical"]), reason="Sprint goal"),
+                deadline=datetime(2024, 1, 15) + timedelta(days=i % 14),
+                time_estimate=TaskTimeEstimate(
+                    minimum_hours=minimum, maximum_hours=minimum * 2, confidence_level="Medium"
+                ),
+                tags=["backend", "code"] if i % 2 else ["frontend"],
+                dependencies=dependencies,
+                complexity=rng.choice(["Simple", "Moderate", "Complex"]),
+                required_skills=["Python"] if i % 2 else ["React"],
+            )
+        )
+    return TaskList(tasks=tasks)
+
+
+def canned_summary(tasks: TaskList) -> MeetingSummary:
+    return MeetingSummary(
+        date=datetime(2024, 1, 15),
+        attendees=list(TEAM),
+        key_points=[f"Discussed {task.task_title}" for task in tasks.tasks[:10]],
+        action_items=tasks.tasks[:20],
+        decisions=["Ship the auth service first"],
+        meeting_type="standup",
+    )
+
+
+def meeting_notes(size: int) -> str:
+    names = list(TEAM)
+    lines = ["Daily Standup Meeting - Technical Team", "Date: 2024-01-15", ""]
+    lines += [f"{names[i % len(names)]}: I will work on component {i} this week." for i in range(size)]
+    return "\n".join(lines)
+
+
+def canned_responses(size: int) -> Dict[str, List[str]]:
+    """Recorded model responses by agent name for a meeting with `size` tasks"""
+    tasks = canned_tasks(size)
+    issues = LinearIssueList(
+        issues=[
+            LinearIssue(
+                issue_title=task.task_title,
+                issue_assignee=task.task_assignee,
+                issue_link=f"https://linear.app/fake/issue/ENG-{i}",
+                priority=task.priority,
+                deadline=task.deadline,
+            )
+            for i, task in enumerate(tasks.tasks, 1)
+        ]
+    )
+    tweets = TweetList(tweets=[Tweet(text=f"Meeting notes to tasks in seconds #{i}", hashtags=["#AI", "#PM"]) for i in range(3)])
+    return {
+        "Meeting Summary Agent": [canned_summary(tasks).model_dump_json()],
+        "Summary Reconcile Agent": [canned_summary(tasks).model_dump_json()],
+        "Task Agent": [tasks.model_dump_json()],
+        "Meeting Planner Agent": [
+            MeetingPlan(summary=canned_summary(tasks).model_copy(update={"action_items": []}), tasks=tasks.tasks).model_dump_json()
+        ],
+        "Linear Agent": [issues.model_dump_json()],
+        "Github Agent": ["Created the GitHub issues."],
+        "Slack Agent": ["Sent the notifications."],
+        "Tweet Generator": [tweets.model_dump_json()],
+    }
+
+
+def replay_agent(agent: Agent, responses: Dict[str, List[str]], latency: float, seconds_per_kchar: float) -> Agent:
+    """Copy of a workflow agent whose model replays its recorded responses"""
+    model = ReplayModel(
+        responses=responses.get(agent.name, []), latency=latency, seconds_per_kchar=seconds_per_kchar
+    )
+    return agent.deep_copy(update={"model": model})
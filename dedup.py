@@ -0,0 +1,254 @@
+import re
+import hashlib
+import threading
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Literal, Optional, Set, Tuple
+from pydantic import BaseModel, Field
+
+from dependencies import task_key
+
+if TYPE_CHECKING:
+    from task_store import StoredTask
+    from workflow import Task
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Words that recur in every standup line and say nothing about the work itself
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or the this to was will with".split()
+)
+_EMPTY = (1 << 64) - 1
+
+
+def shingles(text: str) -> Set[int]:
+    """64-bit hashes of the words and word pairs of a text, ignoring case, punctuation and stopwords"""
+    words = [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+    tokens = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    return {int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little") for token in tokens}
+
+
+def signature(hashes: Iterable[int], size: int = 64) -> array:
+    """One-permutation MinHash: each hash lands in one of `size` bins, which keep their minimum
+
+    Empty bins borrow the next filled bin's value (offset by the distance), so short texts still
+    get a full signature. The fraction of equal bins between two signatures estimates the Jaccard
+    similarity of their shingle sets.
+    """
+    bits = size.bit_length() - 1
+    bins = [_EMPTY] * size
+    for value in hashes:
+        index, rest = value & (size - 1), value >> bits
+        if rest < bins[index]:
+            bins[index] = rest
+    if _EMPTY in bins and any(value != _EMPTY for value in bins):
+        filled = list(bins)
+        for index in range(size):
+            if bins[index] == _EMPTY:
+                distance = 1
+                while bins[(index + distance) % size] == _EMPTY:
+                    distance += 1
+                filled[index] = bins[(index + distance) % size] + distance
+        bins = filled
+    return array("Q", bins)
+
+
+def similarity(first: array, second: array) -> float:
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+class TaskMatch(BaseModel):
+    task_title: str = Field(..., description="Title of the generated task")
+    classification: Literal["new", "update", "duplicate"] = Field(..., description="How the task relates to earlier work")
+    matched_title: Optional[str] = Field(None, description="Title of the earlier task it matches")
+    similarity: float = Field(0.0, description="Estimated similarity to the matched task")
+    changes: List[str] = Field(default_factory=list, description="Fields that differ from the matched task")
+    issue_link: Optional[str] = Field(None, description="Issue link of the matched task")
+
+
+class _Entry:
+    __slots__ = ("title", "signature", "details", "issue_link")
+
+    def __init__(self, title: str, signature: array, details: Tuple[Any, ...], issue_link: Optional[str]):
+        self.title = title
+        self.signature = signature
+        self.details = details
+        self.issue_link = issue_link
+
+
+class _Scope:
+    """Tasks of one assignee in one session, bucketed by LSH band"""
+
+    __slots__ = ("entries", "buckets")
+
+    def __init__(self):
+        self.entries: Dict[str, _Entry] = {}
+        self.buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+
+
+# Fields compared to tell an update from a duplicate, in the order of `_details`
+DETAIL_FIELDS = ("priority", "deadline", "estimate")
+
+
+def _details(priority: Optional[str], deadline: Any, minimum_hours: Any, maximum_hours: Any) -> Tuple[Any, ...]:
+    return (priority, deadline.isoformat() if deadline else None, (minimum_hours, maximum_hours))
+
+
+class TaskIndex:
+    """In-process similarity index of the tasks filed so far, scoped per session and assignee
+
+    Tasks are indexed by a MinHash signature of their title and description and found through
+    locality-sensitive hashing: the signature is cut into `bands` bands, and a lookup only compares
+    the tasks sharing at least one band (counted in `comparisons`), so it stays well under a
+    millisecond with tens of thousands of tasks. A generated task is an update of an earlier one if it has the same title or a
+    similarity of at least `match_threshold`, and a duplicate if nothing but the wording changed.
+    """
+
+    def __init__(
+        self,
+        signature_size: int = 64,
+        bands: int = 16,
+        match_threshold: float = 0.5,
+        duplicate_threshold: float = 0.8,
+    ):
+        if signature_size & (signature_size - 1) or signature_size % bands:
+            raise ValueError("signature_size must be a power of two divisible by bands")
+        self.signature_size = signature_size
+        self.bands = bands
+        self.match_threshold = match_threshold
+        self.duplicate_threshold = duplicate_threshold
+        self._rows = signature_size // bands
+        self._scopes: Dict[Tuple[str, str], _Scope] = {}
+        self._loaded: Set[str] = set()
+        self._lock = threading.Lock()
+        # Signatures compared by similarity lookups so far
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        return sum(len(scope.entries) for scope in self._scopes.values())
+
+    def _scope_key(self, session_id: str, assignee: Optional[str]) -> Tuple[str, str]:
+        return session_id, (assignee or "").strip().lower()
+
+    def _bands(self, signature: array) -> List[Tuple[int, bytes]]:
+        raw = signature.tobytes()
+        width = self._rows * signature.itemsize
+        return [(band, raw[band * width:(band + 1) * width]) for band in range(self.bands)]
+
+    def _signature(self, title: str, description: Optional[str]) -> array:
+        return signature(shingles(f"{title}\n{description or ''}"), self.signature_size)
+
+    def _remove(self, scope: _Scope, key: str) -> None:
+        entry = scope.entries.pop(key)
+        for band in self._bands(entry.signature):
+            keys = scope.buckets.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del scope.buckets[band]
+
+    def _add(
+        self,
+        session_id: str,
+        assignee: Optional[str],
+        title: str,
+        description: Optional[str],
+        details: Tuple[Any, ...],
+        issue_link: Optional[str],
+        replaces: Optional[str] = None,
+    ) -> None:
+        scope = self._scopes.setdefault(self._scope_key(session_id, assignee), _Scope())
+        key = task_key(title)
+        for old in {key, task_key(replaces) if replaces else key}:
+            if old in scope.entries:
+                issue_link = issue_link or scope.entries[old].issue_link
+                self._remove(scope, old)
+        entry = _Entry(title, self._signature(title, description), details, issue_link)
+        scope.entries[key] = entry
+        for band in self._bands(entry.signature):
+            scope.buckets.setdefault(band, set()).add(key)
+
+    def add(self, session_id: str, task: "Task", issue_link: Optional[str] = None, replaces: Optional[str] = None) -> None:
+        """Index a filed task, replacing the earlier task it updates (`replaces`, a title) if any"""
+        with self._lock:
+            self._add(
+                session_id,
+                task.task_assignee,
+                task.task_title,
+                task.task_description,
+                _details(task.priority.level, task.deadline, task.time_estimate.minimum_hours, task.time_estimate.maximum_hours),
+                issue_link,
+                replaces,
+            )
+
+    def add_tasks(
+        self,
+        session_id: str,
+        tasks: Iterable["Task"],
+        issue_links: Optional[Dict[str, str]] = None,
+        matches: Optional[List[TaskMatch]] = None,
+    ) -> None:
+        """Index a run's tasks; tasks that `matches` found in the index replace the task they matched"""
+        replaces = {match.task_title: match.matched_title for match in matches or [] if match.matched_title}
+        for task in tasks:
+            self.add(session_id, task, (issue_links or {}).get(task.task_title), replaces.get(task.task_title))
+
+    def load(self, session_id: str, stored_tasks: Iterable["StoredTask"]) -> None:
+        """Index a session's tasks from the task store, once per session and process"""
+        with self._lock:
+            if session_id in self._loaded:
+                return
+            self._loaded.add(session_id)
+            for stored in stored_tasks:
+                self._add(
+                    session_id,
+                    stored.assignee,
+                    stored.title,
+                    stored.description,
+                    _details(stored.priority, stored.deadline, stored.minimum_hours, stored.maximum_hours),
+                    stored.issue_links.get("linear"),
+                )
+
+    def classify(self, session_id: str, task: "Task") -> TaskMatch:
+        """Classify a generated task as new, an update of an indexed task, or a duplicate of one"""
+        found = self._best_match(session_id, task)
+        if found is None:
+            return TaskMatch(task_title=task.task_title, classification="new")
+        entry, score = found
+        details = _details(
+            task.priority.level, task.deadline, task.time_estimate.minimum_hours, task.time_estimate.maximum_hours
+        )
+        changes = [name for name, old, new in zip(DETAIL_FIELDS, entry.details, details) if old != new]
+        if score < self.duplicate_threshold:
+            changes.insert(0, "description")
+        return TaskMatch(
+            task_title=task.task_title,
+            classification="update" if changes else "duplicate",
+            matched_title=entry.title,
+            similarity=round(score, 3),
+            changes=changes,
+            issue_link=entry.issue_link,
+        )
+
+    def classify_tasks(self, session_id: str, tasks: Iterable["Task"]) -> List[TaskMatch]:
+        return [self.classify(session_id, task) for task in tasks]
+
+    def _best_match(self, session_id: str, task: "Task") -> Optional[Tuple[_Entry, float]]:
+        signature = self._signature(task.task_title, task.task_description)
+        key = task_key(task.task_title)
+        with self._lock:
+            scope = self._scopes.get(self._scope_key(session_id, task.task_assignee))
+            if scope is None:
+                return None
+            if key in scope.entries:
+                entry = scope.entries[key]
+                return entry, similarity(signature, entry.signature)
+            candidates: Set[str] = set()
+            for band in self._bands(signature):
+                candidates.update(scope.buckets.get(band, ()))
+            self.comparisons += len(candidates)
+            best: Optional[Tuple[_Entry, float]] = None
+            for candidate in candidates:
+                entry = scope.entries[candidate]
+                score = similarity(signature, entry.signature)
+                if score >= self.match_threshold and (best is None or score > best[1]):
+                    best = (entry, score)
+        return best
@@ -0,0 +1,313 @@
+import re
+import heapq
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Literal, Optional, Set, Tuple
+from pydantic import BaseModel, Field
+
+if TYPE_CHECKING:
+    from workflow import Task
+
+
+def task_key(title: str) -> str:
+    """Identifier of a task in the graph, derived from its title"""
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+
+
+class DependencyCycleError(ValueError):
+    def __init__(self, cycle: List[str]):
+        super().__init__(f"Dependency cycle: {' -> '.join(cycle)}")
+        self.cycle = cycle
+
+
+class CriticalPath(BaseModel):
+    tasks: List[str] = Field(default_factory=list, description="Titles of the tasks on the path, in order")
+    minimum_hours: float = Field(default=0.0, description="Sum of minimum estimates along the path")
+    maximum_hours: float = Field(default=0.0, description="Sum of maximum estimates along the path")
+
+
+class TaskLinks(BaseModel):
+    task: str = Field(..., description="Title of the task")
+    blocked_by: List[str] = Field(default_factory=list, description="Tasks that must finish first")
+    blocks: List[str] = Field(default_factory=list, description="Tasks waiting on this one")
+    related_to: List[str] = Field(default_factory=list, description="Related tasks without ordering")
+
+
+class TaskGraph:
+    """Incremental DAG index over the tasks of a session
+
+    Each task's dependencies are read from its own perspective: a "Blocks" dependency on X means
+    X blocks the task, "Required by" X means the task must finish before X, and "Related to" is a
+    relation without ordering. Dependencies on tasks that are not known yet are kept pending and
+    resolved when a later meeting adds them. Re-adding a task replaces the dependencies it
+    declared before, and `prune` bounds the graph for long-lived sessions.
+    """
+
+    def __init__(self):
+        self._next_order = 0
+        self._order: Dict[str, int] = {}
+        self._titles: Dict[str, str] = {}
+        self._hours: Dict[str, Tuple[float, float]] = {}
+        self._done: Set[str] = set()
+        self._successors: Dict[str, Set[str]] = {}
+        self._predecessors: Dict[str, Set[str]] = {}
+        self._related: Dict[str, Set[str]] = {}
+        self._pending: Set[Tuple[str, str, str]] = set()
+        # Dependencies (other task, dependency type) each task declared, and the tasks declaring each edge
+        self._declared: Dict[str, Set[Tuple[str, str]]] = {}
+        self._sources: Dict[Tuple[str, str, str], Set[str]] = {}
+        self._topological: Optional[List[str]] = None
+        self._has_cycle = False
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._order
+
+    def _add_node(self, key: str, title: str, minimum_hours: float, maximum_hours: float, done: bool) -> None:
+        if key not in self._order:
+            self._order[key] = self._next_order
+            self._next_order += 1
+            self._successors[key] = set()
+            self._predecessors[key] = set()
+            self._related[key] = set()
+        self._titles[key] = title
+        self._hours[key] = (minimum_hours, maximum_hours)
+        if done:
+            self._done.add(key)
+        else:
+            self._done.discard(key)
+
+    @staticmethod
+    def _edge(key: str, other: str, dependency_type: str) -> Tuple[str, str, str]:
+        if dependency_type == "Blocks":
+            return ("order", other, key)
+        if dependency_type == "Required by":
+            return ("order", key, other)
+        return ("related", *sorted((key, other)))
+
+    def _link(self, key: str, other: str, dependency_type: str) -> None:
+        if other not in self._order:
+            self._pending.add((key, other, dependency_type))
+            return
+        if other == key:
+            return
+        edge = self._edge(key, other, dependency_type)
+        self._sources.setdefault(edge, set()).add(key)
+        kind, a, b = edge
+        if kind == "order":
+            self._successors[a].add(b)
+            self._predecessors[b].add(a)
+        else:
+            self._related[a].add(b)
+            self._related[b].add(a)
+
+    def _unlink(self, key: str, other: str, dependency_type: str) -> None:
+        self._pending.discard((key, other, dependency_type))
+        edge = self._edge(key, other, dependency_type)
+        sources = self._sources.get(edge)
+        if not sources:
+            return
+        sources.discard(key)
+        # The edge stays while the task on its other end declares it too
+        if sources:
+            return
+        del self._sources[edge]
+        kind, a, b = edge
+        if kind == "order":
+            self._successors[a].discard(b)
+            self._predecessors[b].discard(a)
+        else:
+            self._related[a].discard(b)
+            self._related[b].discard(a)
+
+    def _declare(self, key: str, dependencies: Set[Tuple[str, str]]) -> None:
+        previous = self._declared.get(key, set())
+        for other, dependency_type in previous - dependencies:
+            self._unlink(key, other, dependency_type)
+        for other, dependency_type in dependencies - previous:
+            self._link(key, other, dependency_type)
+        self._declared[key] = dependencies
+
+    def add_tasks(self, tasks: Iterable["Task"]) -> None:
+        """Add or update tasks, replacing their dependencies and resolving pending ones"""
+        tasks = list(tasks)
+        for task in tasks:
+            self._add_node(
+                task_key(task.task_title),
+                task.task_title,
+                task.time_estimate.minimum_hours,
+                task.time_estimate.maximum_hours,
+                task.status == "Done",
+            )
+        for task in tasks:
+            self._declare(
+                task_key(task.task_title),
+                {(task_key(dependency.task_id), dependency.dependency_type) for dependency in task.dependencies},
+            )
+        resolvable = [edge for edge in self._pending if edge[1] in self._order]
+        for edge in resolvable:
+            self._pending.discard(edge)
+            self._link(*edge)
+        self._topological = None
+
+    def prune(self, max_tasks: int, keep: Iterable[str] = ()) -> int:
+        """Drop the oldest tasks, finished ones first, until at most `max_tasks` remain
+
+        Tasks in `keep` are never dropped. Dependencies other tasks have on dropped ones become
+        pending again, so they are restored if the task comes back. Returns how many were dropped.
+        """
+        overflow = len(self._order) - max_tasks
+        if overflow <= 0:
+            return 0
+        keep = set(keep)
+        candidates = sorted(
+            (key for key in self._order if key not in keep), key=lambda key: (key not in self._done, self._order[key])
+        )
+        removed = set(candidates[:overflow])
+        for key in removed:
+            for other, dependency_type in self._declared.pop(key, set()):
+                self._unlink(key, other, dependency_type)
+        for key, declared in self._declared.items():
+            for other, dependency_type in declared:
+                if other in removed:
+                    self._unlink(key, other, dependency_type)
+                    self._pending.add((key, other, dependency_type))
+        for key in removed:
+            for index in (self._order, self._titles, self._hours, self._successors, self._predecessors, self._related):
+                del index[key]
+            self._done.discard(key)
+        self._topological = None
+        return len(removed)
+
+    def _kahn(self) -> Tuple[List[str], List[str]]:
+        indegree = {key: len(predecessors) for key, predecessors in self._predecessors.items()}
+        ready = [(self._order[key], key) for key, degree in indegree.items() if degree == 0]
+        heapq.heapify(ready)
+        order: List[str] = []
+        while ready:
+            _, key = heapq.heappop(ready)
+            order.append(key)
+            for successor in self._successors[key]:
+                indegree[successor] -= 1
+                if indegree[successor] == 0:
+                    heapq.heappush(ready, (self._order[successor], successor))
+        stuck = sorted((key for key, degree in indegree.items() if degree > 0), key=self._order.__getitem__)
+        return order, stuck
+
+    def find_cycle(self) -> Optional[List[str]]:
+        """Titles of the tasks on one dependency cycle, or None if the graph is acyclic"""
+        _, stuck = self._kahn()
+        if not stuck:
+            return None
+        # Every stuck node has a stuck predecessor, so walking predecessors must revisit a node
+        stuck_set = set(stuck)
+        seen: Dict[str, int] = {}
+        path: List[str] = []
+        key = stuck[0]
+        while key not in seen:
+            seen[key] = len(path)
+            path.append(key)
+            key = min((p for p in self._predecessors[key] if p in stuck_set), key=self._order.__getitem__)
+        cycle = list(reversed(path[seen[key]:]))
+        return [self._titles[k] for k in cycle + [cycle[0]]]
+
+    def topological_order(self, strict: bool = False) -> List[str]:
+        """Task keys with every blocker before the tasks it blocks
+
+        Tasks on a cycle are appended in insertion order, unless `strict` is set, in which case
+        a DependencyCycleError is raised.
+        """
+        if self._topological is None:
+            order, stuck = self._kahn()
+            self._topological = order + stuck
+            self._has_cycle = bool(stuck)
+        if strict and self._has_cycle:
+            raise DependencyCycleError(self.find_cycle() or [])
+        return self._topological
+
+    def critical_path(self, estimate: Literal["minimum", "maximum"] = "maximum") -> CriticalPath:
+        """Longest chain of unfinished dependent tasks, weighted by their time estimates"""
+        weight_index = 0 if estimate == "minimum" else 1
+        best: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        end: Optional[str] = None
+        for key in self.topological_order(strict=True):
+            weight = 0.0 if key in self._done else self._hours[key][weight_index]
+            start, parent = 0.0, None
+            for predecessor in self._predecessors[key]:
+                if best[predecessor] > start:
+                    start, parent = best[predecessor], predecessor
+            best[key] = start + weight
+            previous[key] = parent
+            if end is None or best[key] > best[end]:
+                end = key
+
+        path: List[str] = []
+        while end is not None:
+            path.append(end)
+            end = previous[end]
+        path.reverse()
+        return CriticalPath(
+            tasks=[self._titles[key] for key in path],
+            minimum_hours=sum(0.0 if key in self._done else self._hours[key][0] for key in path),
+            maximum_hours=sum(0.0 if key in self._done else self._hours[key][1] for key in path),
+        )
+
+    def links(self, key: str) -> TaskLinks:
+        return TaskLinks(
+            task=self._titles[key],
+            blocked_by=sorted(self._titles[k] for k in self._predecessors[key]),
+            blocks=sorted(self._titles[k] for k in self._successors[key]),
+            related_to=sorted(self._titles[k] for k in self._related[key]),
+        )
+
+    def order_tasks(self, tasks: Iterable["Task"]) -> List["Task"]:
+        """Sort tasks so that blockers come before the tasks they block"""
+        position = {key: index for index, key in enumerate(self.topological_order())}
+        return sorted(tasks, key=lambda task: position.get(task_key(task.task_title), len(position)))
+
+    def linear_links(self, tasks: Iterable["Task"]) -> List[TaskLinks]:
+        """Dependency links of the given tasks, blockers first, for issue linking"""
+        links = [self.links(task_key(task.task_title)) for task in self.order_tasks(tasks)]
+        return [link for link in links if link.blocked_by or link.blocks or link.related_to]
+
+    def priority_alerts(self, tasks: Iterable["Task"], min_blocked: int = 2) -> List[str]:
+        """Alerts for unfinished tasks that block several others, plus any cycle and the critical path"""
+        alerts = []
+        for task in tasks:
+            key = task_key(task.task_title)
+            blocked = len(self._successors.get(key, ()))
+            if key not in self._done and blocked >= min_blocked:
+                alerts.append(f"{task.task_title} blocks {blocked} tasks")
+        cycle = self.find_cycle()
+        if cycle is not None:
+            alerts.append(f"Dependency cycle: {' -> '.join(cycle)}")
+        else:
+            path = self.critical_path()
+            if len(path.tasks) > 1:
+                alerts.append(
+                    f"Critical path ({path.minimum_hours:g}-{path.maximum_hours:g}hrs): {' -> '.join(path.tasks)}"
+                )
+        return alerts
+
+    def to_state(self) -> Dict[str, Any]:
+        """Compact JSON-serializable form for session_state"""
+        keys = sorted(self._order, key=self._order.__getitem__)
+        return {
+            "nodes": [[self._titles[k], *self._hours[k], k in self._done] for k in keys],
+            "dependencies": [[k, *dependency] for k in keys for dependency in sorted(self._declared.get(k, ()))],
+        }
+
+    @classmethod
+    def from_state(cls, state: Optional[Dict[str, Any]]) -> "TaskGraph":
+        graph = cls()
+        if not state:
+            return graph
+        for title, minimum_hours, maximum_hours, done in state.get("nodes", []):
+            graph._add_node(task_key(title), title, minimum_hours, maximum_hours, done)
+        declared: Dict[str, Set[Tuple[str, str]]] = {}
+        for key, other, dependency_type in state.get("dependencies", []):
+            declared.setdefault(key, set()).add((other, dependency_type))
+        for key, dependencies in declared.items():
+            graph._declare(key, dependencies)
+        return graph
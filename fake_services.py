@@ -0,0 +1,362 @@
+import re
+import json
+import time
+import uuid
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+class FakeHTTPService:
+    """Local stand-in for an HTTP API, served from a background thread
+
+    Subclasses implement `handle`; every request is counted and can be delayed by `latency`
+    seconds to mimic a remote service. `inject_faults` makes a share of requests fail with a 503,
+    stall, or lose their response, to exercise retries and timeouts.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.failure_rate = 0.0
+        self.slow_rate = 0.0
+        self.slow_seconds = 0.0
+        self.lost_rate = 0.0
+        self.faults_injected = 0
+        self._rng = random.Random(0)
+
+    def inject_faults(
+        self,
+        failure_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_seconds: float = 0.0,
+        seed: int = 0,
+        lost_rate: float = 0.0,
+    ) -> "FakeHTTPService":
+        """Fail `failure_rate` of requests with a 503, delay `slow_rate` of them by `slow_seconds`, and
+        process `lost_rate` of them but answer with a 504, as if the response was lost on the way back"""
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.lost_rate = lost_rate
+        self._rng = random.Random(seed)
+        return self
+
+    def _fault(self) -> Optional[str]:
+        with self.lock:
+            draw = self._rng.random()
+            if draw < self.failure_rate:
+                fault = "fail"
+            elif draw < self.failure_rate + self.slow_rate:
+                fault = "slow"
+            elif draw < self.failure_rate + self.slow_rate + self.lost_rate:
+                fault = "lost"
+            else:
+                fault = None
+            if fault is not None:
+                self.faults_injected += 1
+        return fault
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle(
+        self, method: str, path: str, headers: Dict[str, str], body: Any
+    ) -> Tuple[int, Dict[str, str], Any]:
+        raise NotImplementedError
+
+    def start(self) -> "FakeHTTPService":
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; don't let them wait on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else None
+                with service.lock:
+                    service.requests.append({"method": self.command, "path": self.path, "body": body})
+                if service.latency:
+                    time.sleep(service.latency)
+                fault = service._fault()
+                if fault == "slow":
+                    time.sleep(service.slow_seconds)
+                if fault == "fail":
+                    status, headers, payload = 503, {}, {"error": "injected fault"}
+                else:
+                    status, headers, payload = service.handle(self.command, self.path, dict(self.headers), body)
+                if fault == "lost":
+                    status, headers, payload = 504, {}, {"error": "injected lost response"}
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _dispatch
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeHTTPService":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class FakeLinearServer(FakeHTTPService):
+    """Linear GraphQL stand-in supporting issue creation, updates and lookup by id
+
+    It understands the aliased batch mutations (creates, updates by id or identifier, relations) and
+    `issues(filter: {id: {in: ...}})` lookups sent by LinearClient, and the single `issueCreate` mutation sent by phi's LinearTool. Creating an issue
+    or relation with an id that already exists fails the way Linear does, so idempotent retries can
+    be tested.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency=latency)
+        self.issues: Dict[str, Dict[str, Any]] = {}
+        self.relations: Dict[str, Dict[str, Any]] = {}
+        self.updates = 0
+        self._counter = 0
+
+    def _create(self, data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        with self.lock:
+            issue_id = data.get("id") or str(uuid.uuid4())
+            if issue_id in self.issues:
+                return None, "Entity already exists"
+            self._counter += 1
+            identifier = f"ENG-{self._counter}"
+            issue = {
+                "id": issue_id,
+                "identifier": identifier,
+                "title": data.get("title"),
+                "url": f"https://linear.app/fake/issue/{identifier}",
+                "input": data,
+            }
+            self.issues[issue_id] = issue
+            return issue, None
+
+    def _update(self, issue_id: str, data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        with self.lock:
+            issue = self.issues.get(issue_id) or next(
+                (issue for issue in self.issues.values() if issue["identifier"] == issue_id), None
+            )
+            if issue is None:
+                return None, "Entity not found"
+            issue["input"] = {**issue["input"], **data}
+            issue["title"] = issue["input"].get("title")
+            self.updates += 1
+            return issue, None
+
+    def _relate(self, data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        with self.lock:
+            relation_id = data.get("id") or str(uuid.uuid4())
+            if relation_id in self.relations:
+                return None, "Entity already exists"
+            self.relations[relation_id] = data
+            return data, None
+
+    @staticmethod
+    def _public(issue: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in issue.items() if key != "input"}
+
+    def handle(self, method, path, headers, body):
+        query = body.get("query", "")
+        variables = body.get("variables") or {}
+        data: Dict[str, Any] = {}
+        errors: List[Dict[str, Any]] = []
+
+        if "issues(filter" in query:
+            ids = variables.get("ids", [])
+            data["issues"] = {"nodes": [self._public(self.issues[i]) for i in ids if i in self.issues]}
+        elif "issueCreate" in query and "title" in variables:
+            issue, error = self._create(variables)
+            data["issueCreate"] = {"success": issue is not None, "issue": self._public(issue) if issue else None}
+            if error:
+                errors.append({"message": error, "path": ["issueCreate"]})
+        elif "issueCreate" in query or "issueRelationCreate" in query:
+            for alias, mutation, variable in re.findall(r"(\w+): (issueCreate|issueRelationCreate)\(input: \$(\w+)\)", query):
+                if mutation == "issueCreate":
+                    issue, error = self._create(variables[variable])
+                    result = {"success": True, "issue": self._public(issue)} if issue else None
+                else:
+                    relation, error = self._relate(variables[variable])
+                    result = {"success": True} if relation else None
+                data[alias] = result
+                if error:
+                    errors.append({"message": error, "path": [alias], "extensions": {"code": "CONFLICT"}})
+        elif "issueUpdate" in query:
+            for alias, variable in re.findall(r"(\w+): issueUpdate\(id: \$\w+, input: \$(\w+)\)", query):
+                issue, error = self._update(variables[f"{variable}Id"], variables[variable])
+                data[alias] = {"success": True, "issue": self._public(issue)} if issue else None
+                if error:
+                    errors.append({"message": error, "path": [alias]})
+        else:
+            return 400, {}, {"errors": [{"message": "Unsupported query"}]}
+
+        payload: Dict[str, Any] = {"data": data}
+        if errors:
+            payload["errors"] = errors
+        return 200, {}, payload
+
+
+class FakeGithubServer(FakeHTTPService):
+    """GitHub REST stand-in for issues, labels and milestones with primary and secondary rate limits
+
+    Responses carry X-RateLimit-Remaining/Reset headers counted down from `rate_limit`; once it is
+    exhausted requests fail with 403 until the window resets. Every `secondary_limit_every`-th issue
+    creation is rejected with a 403 and `Retry-After`, like GitHub's content-creation limits.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit: int = 5000,
+        window: float = 3600.0,
+        secondary_limit_every: Optional[int] = None,
+        retry_after: float = 0.05,
+        page_size: int = 100,
+    ):
+        super().__init__(latency=latency)
+        self.rate_limit = rate_limit
+        self.window = window
+        self.secondary_limit_every = secondary_limit_every
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.issues: Dict[str, List[Dict[str, Any]]] = {}
+        self.labels: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.milestones: Dict[str, List[Dict[str, Any]]] = {}
+        self.rejected = 0
+        self._used = 0
+        self._creates = 0
+        self._reset_at = time.time() + window
+
+    def _rate_headers(self) -> Dict[str, str]:
+        now = time.time()
+        if now >= self._reset_at:
+            self._used = 0
+            self._reset_at = now + self.window
+        self._used += 1
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(0, self.rate_limit - self._used)),
+            "X-RateLimit-Reset": f"{self._reset_at:.3f}",
+        }
+
+    def _page(self, items: List[Dict[str, Any]], path: str, query: Dict[str, List[str]], headers: Dict[str, str]):
+        per_page = min(int(query.get("per_page", [30])[0]), self.page_size)
+        page = int(query.get("page", ["1"])[0])
+        if page * per_page < len(items):
+            params = {key: values[0] for key, values in query.items()}
+            params.update({"page": str(page + 1), "per_page": str(per_page)})
+            headers["Link"] = f'<{self.url}{path}?{urlencode(params)}>; rel="next"'
+        return items[(page - 1) * per_page : page * per_page]
+
+    def handle(self, method, path, headers, body):
+        parsed = urlparse(path)
+        query = parse_qs(parsed.query)
+        match = re.match(r"^/repos/([^/]+/[^/]+)/(issues|labels|milestones)$", parsed.path)
+        with self.lock:
+            response_headers = self._rate_headers()
+            if self._used > self.rate_limit:
+                self.rejected += 1
+                return 403, response_headers, {"message": "API rate limit exceeded"}
+            if match is None:
+                return 404, response_headers, {"message": "Not Found"}
+            repo, resource = match.groups()
+
+            if resource == "labels":
+                labels = self.labels.setdefault(repo, {})
+                if method == "POST":
+                    labels[body["name"]] = {"name": body["name"], "color": body.get("color", "ededed")}
+                    return 201, response_headers, labels[body["name"]]
+                return 200, response_headers, self._page(list(labels.values()), parsed.path, query, response_headers)
+
+            if resource == "milestones":
+                milestones = self.milestones.setdefault(repo, [])
+                if method == "POST":
+                    milestone = {"number": len(milestones) + 1, "title": body["title"]}
+                    milestones.append(milestone)
+                    return 201, response_headers, milestone
+                return 200, response_headers, self._page(milestones, parsed.path, query, response_headers)
+
+            issues = self.issues.setdefault(repo, [])
+            if method == "POST":
+                self._creates += 1
+                if self.secondary_limit_every and self._creates % self.secondary_limit_every == 0:
+                    self.rejected += 1
+                    response_headers["Retry-After"] = str(self.retry_after)
+                    return 403, response_headers, {"message": "You have exceeded a secondary rate limit"}
+                number = len(issues) + 1
+                issue = {
+                    "number": number,
+                    "html_url": f"https://github.com/{repo}/issues/{number}",
+                    "state": "open",
+                    **body,
+                    "labels": [{"name": name} for name in body.get("labels", [])],
+                }
+                issues.append(issue)
+                return 201, response_headers, issue
+            selected = issues
+            if "labels" in query:
+                wanted = set(query["labels"][0].split(","))
+                selected = [i for i in issues if wanted <= {label["name"] for label in i["labels"]}]
+            return 200, response_headers, self._page(selected, parsed.path, query, response_headers)
+
+
+class FakeSlackServer(FakeHTTPService):
+    """Slack Web API stand-in for chat.postMessage
+
+    Posted messages are kept per channel. Posting to a channel again within `min_interval` seconds
+    is rejected with 429 and `Retry-After`, like Slack's per-channel message limit.
+    """
+
+    def __init__(self, latency: float = 0.0, min_interval: float = 0.0, retry_after: float = 0.05):
+        super().__init__(latency=latency)
+        self.min_interval = min_interval
+        self.retry_after = retry_after
+        self.messages: Dict[str, List[str]] = {}
+        self.rejected = 0
+        self._last_post: Dict[str, float] = {}
+
+    def handle(self, method, path, headers, body):
+        if path != "/chat.postMessage":
+            return 200, {}, {"ok": False, "error": "unknown_method"}
+        channel = (body or {}).get("channel")
+        if not channel:
+            return 200, {}, {"ok": False, "error": "channel_not_found"}
+        with self.lock:
+            now = time.monotonic()
+            if self.min_interval and now - self._last_post.get(channel, float("-inf")) < self.min_interval:
+                self.rejected += 1
+                return 429, {"Retry-After": str(self.retry_after)}, {"ok": False, "error": "ratelimited"}
+            self._last_post[channel] = now
+            self.messages.setdefault(channel, []).append(body.get("text", ""))
+            return 200, {}, {"ok": True, "channel": channel, "ts": f"{now:.6f}"}
@@ -1,7 +1,7 @@
-import os
 from dotenv import load_dotenv
 from tweet_workflow import TweetGeneratorWorkflow
-from phi.storage.workflow.postgres import PgWorkflowStorage
+from storage import workflow_storage
+from routing import default_router
 
 # Load environment variables
 load_dotenv()
@@ -12,10 +12,8 @@ def generate_tweets():
     # Initialize workflow
     workflow = TweetGeneratorWorkflow(
         session_id="tweet-session",
-        storage=PgWorkflowStorage(
-            table_name="workflow_sessions",
-            db_url=os.getenv("DB_URL")
-        ),
+        storage=workflow_storage("workflow_sessions"),
+        model_router=default_router(),
     )
     
     # Run the workflow
@@ -0,0 +1,271 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set
+from pydantic import BaseModel, Field
+
+from phi.utils.log import logger
+
+from dependencies import task_key
+from linear_client import issue_description
+from ratelimit import TokenBucket
+from resilience import check_abandoned
+from tracing import propagate, record
+
+if TYPE_CHECKING:
+    from workflow import Task
+
+GITHUB_API_URL = "https://api.github.com"
+
+# Label added to every issue the writer files, so earlier attempts can be found with one listing
+MANAGED_LABEL = "pm-agent"
+
+
+class GithubAPIError(Exception):
+    pass
+
+
+class GithubIssueResult(BaseModel):
+    task_title: str = Field(..., description="Title of the task the issue was created for")
+    number: int = Field(..., description="GitHub issue number")
+    url: str = Field(..., description="Link to the issue")
+    linear_url: Optional[str] = Field(None, description="Link to the matching Linear issue")
+    created: bool = Field(..., description="False if the issue already existed from an earlier attempt")
+
+
+def issue_marker(scope: str, title: str) -> str:
+    """Hidden marker identifying the issue filed for a task, used as its idempotency key"""
+    digest = hashlib.sha1(f"{scope}/{task_key(title)}".encode("utf-8")).hexdigest()[:16]
+    return f"<!-- pm-agent:{digest} -->"
+
+
+def issue_body(task: "Task", linear_url: Optional[str], marker: str) -> str:
+    """Markdown issue body linking back to the Linear issue"""
+    lines = [issue_description(task)]
+    if linear_url:
+        lines.append(f"**Linear:** {linear_url}")
+    lines.append(marker)
+    return "\n\n".join(lines)
+
+
+class GithubIssueWriter:
+    """Bulk GitHub issue writer for code-related tasks
+
+    Issues are created concurrently over one pooled HTTP session, paced by a token bucket that
+    follows the X-RateLimit headers and backs off on Retry-After and secondary rate limits. Labels
+    and milestones are looked up once per repository and cached. Every issue carries a hidden
+    marker derived from the task, so a retried run reuses the issues it already filed.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        api_url: str = GITHUB_API_URL,
+        max_concurrency: int = 4,
+        requests_per_second: float = 5.0,
+        burst: int = 10,
+        timeout: float = 30.0,
+        retries: int = 3,
+        secondary_backoff: float = 60.0,
+        managed_label: str = MANAGED_LABEL,
+    ):
+        try:
+            import requests
+        except ImportError:
+            raise ImportError("`requests` not installed. Please install it with `pip install requests`")
+
+        self.api_url = api_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.secondary_backoff = secondary_backoff
+        self.managed_label = managed_label
+        self.bucket = TokenBucket(rate=requests_per_second, capacity=burst)
+        token = token or os.getenv("GITHUB_TOKEN") or os.getenv("GITHUB_ACCESS_TOKEN", "")
+        self.requests_sent = 0
+
+        self._lock = threading.Lock()
+        self._labels: Dict[str, Dict[str, Any]] = {}
+        self._milestones: Dict[str, Dict[str, int]] = {}
+        self._issues: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Repositories where a create failed and may still have filed its issue
+        self._unconfirmed: Set[str] = set()
+
+        self.session = requests.Session()
+        self._mount(retries)
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            }
+        )
+
+    def _mount(self, retries: int) -> None:
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        # Only idempotent requests are retried by the adapter; rate limits are handled in _request
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.max_concurrency, 1), max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def disable_retries(self) -> None:
+        """Leave retries to an outer layer, such as the workflow's resilience layer
+
+        Rate limits still pause the token bucket, so the outer retry waits them out.
+        """
+        self.retries = 0
+        self._mount(0)
+
+    def _request(self, method: str, path: str, **kwargs):
+        url = path if path.startswith("http") else f"{self.api_url}{path}"
+        for attempt in range(self.retries + 1):
+            check_abandoned()
+            self.bucket.acquire()
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            with self._lock:
+                self.requests_sent += 1
+            record("requests")
+            if attempt:
+                record("retries")
+            self.bucket.update_from_headers(response.headers)
+            if response.status_code in (403, 429):
+                limited = (
+                    "Retry-After" in response.headers
+                    or response.headers.get("X-RateLimit-Remaining") == "0"
+                    or "rate limit" in response.text.lower()
+                )
+                if limited:
+                    if "Retry-After" not in response.headers and response.headers.get("X-RateLimit-Remaining") != "0":
+                        # Secondary limits without Retry-After: GitHub asks for at least a minute
+                        self.bucket.pause(self.secondary_backoff)
+                    if attempt < self.retries:
+                        logger.warning(f"GitHub rate limit on {method} {path}, retrying")
+                        continue
+            if response.status_code >= 400:
+                raise GithubAPIError(f"GitHub {method} {path} failed with {response.status_code}: {response.text}")
+            return response
+        raise GithubAPIError(f"GitHub {method} {path} still rate limited after {self.retries} retries")
+
+    def _paginate(self, path: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        items: List[Dict[str, Any]] = []
+        response = self._request("GET", path, params={**params, "per_page": 100})
+        items.extend(response.json())
+        while "next" in response.links:
+            response = self._request("GET", response.links["next"]["url"])
+            items.extend(response.json())
+        return items
+
+    def labels(self, repo: str) -> Dict[str, Any]:
+        """Labels of a repository by name, fetched once"""
+        with self._lock:
+            cached = self._labels.get(repo)
+        if cached is None:
+            cached = {label["name"]: label for label in self._paginate(f"/repos/{repo}/labels", {})}
+            with self._lock:
+                cached = self._labels.setdefault(repo, cached)
+        return cached
+
+    def ensure_labels(self, repo: str, names: Sequence[str]) -> None:
+        """Create the labels missing from a repository"""
+        labels = self.labels(repo)
+        for name in sorted(set(names) - set(labels)):
+            response = self._request("POST", f"/repos/{repo}/labels", json={"name": name})
+            with self._lock:
+                labels[name] = response.json()
+
+    def milestone_number(self, repo: str, title: str) -> int:
+        """Number of the milestone with this title, created if needed"""
+        with self._lock:
+            milestones = self._milestones.get(repo)
+        if milestones is None:
+            milestones = {m["title"]: m["number"] for m in self._paginate(f"/repos/{repo}/milestones", {"state": "all"})}
+            with self._lock:
+                milestones = self._milestones.setdefault(repo, milestones)
+        if title not in milestones:
+            response = self._request("POST", f"/repos/{repo}/milestones", json={"title": title})
+            with self._lock:
+                milestones[title] = response.json()["number"]
+        return milestones[title]
+
+    def existing_issues(self, repo: str, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Issues filed by this writer, keyed by their marker, listed once unless `refresh` is set"""
+        with self._lock:
+            cached = None if refresh else self._issues.get(repo)
+            self._unconfirmed.discard(repo)
+        if cached is None:
+            cached = {}
+            for issue in self._paginate(f"/repos/{repo}/issues", {"labels": self.managed_label, "state": "all"}):
+                body = issue.get("body") or ""
+                start = body.find("<!-- pm-agent:")
+                if start != -1:
+                    cached[body[start : body.index("-->", start) + 3]] = issue
+            with self._lock:
+                listed, cached = cached, self._issues.setdefault(repo, cached)
+                cached.update(listed)
+        return cached
+
+    def create_issues(
+        self,
+        tasks: Sequence["Task"],
+        repo: str,
+        linear_urls: Optional[Dict[str, str]] = None,
+        scope: str = "",
+        milestone: Optional[str] = None,
+        github_users: Optional[Dict[str, str]] = None,
+    ) -> List[GithubIssueResult]:
+        """Create one issue per task in `repo`, reusing issues already filed under the same scope
+
+        `linear_urls` maps task titles to their Linear issues and `github_users` maps assignees to
+        GitHub logins.
+        """
+        linear_urls = {task_key(title): url for title, url in (linear_urls or {}).items()}
+        github_users = github_users or {}
+        # A create that failed earlier may have filed its issue anyway, so markers are listed again first
+        with self._lock:
+            refresh = repo in self._unconfirmed
+        existing = self.existing_issues(repo, refresh=refresh)
+        self.ensure_labels(repo, [self.managed_label] + [tag for task in tasks for tag in task.tags])
+        milestone_number = self.milestone_number(repo, milestone) if milestone else None
+
+        def create(task: "Task") -> GithubIssueResult:
+            marker = issue_marker(scope, task.task_title)
+            linear_url = linear_urls.get(task_key(task.task_title))
+            issue = existing.get(marker)
+            created = issue is None
+            if created:
+                data: Dict[str, Any] = {
+                    "title": task.task_title,
+                    "body": issue_body(task, linear_url, marker),
+                    "labels": sorted({self.managed_label, *task.tags}),
+                }
+                if task.task_assignee in github_users:
+                    data["assignees"] = [github_users[task.task_assignee]]
+                if milestone_number is not None:
+                    data["milestone"] = milestone_number
+                try:
+                    issue = self._request("POST", f"/repos/{repo}/issues", json=data).json()
+                except Exception:
+                    with self._lock:
+                        self._unconfirmed.add(repo)
+                    raise
+                with self._lock:
+                    existing[marker] = issue
+            return GithubIssueResult(
+                task_title=task.task_title,
+                number=issue["number"],
+                url=issue["html_url"],
+                linear_url=linear_url,
+                created=created,
+            )
+
+        if self.max_concurrency > 1 and len(tasks) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="github") as executor:
+                issues = list(executor.map(propagate(create), tasks))
+        else:
+            issues = [create(task) for task in tasks]
+        logger.info(f"GitHub issues: {sum(i.created for i in issues)} created, {sum(not i.created for i in issues)} reused")
+        return issues
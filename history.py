@@ -0,0 +1,181 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional
+from pydantic import BaseModel, Field
+
+# Upper bounds (in hours) of the buckets used for estimate distributions
+HOUR_BUCKETS = [2, 4, 8, 16, 40]
+
+# Key that tags and assignees pruned from the statistics are merged into
+OTHERS = "(others)"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budget checks (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def hour_bucket(hours: float) -> str:
+    lower = 0
+    for upper in HOUR_BUCKETS:
+        if hours < upper:
+            return f"{lower}-{upper}h"
+        lower = upper
+    return f"{lower}h+"
+
+
+class HistoricalTask(BaseModel):
+    title: str = Field(..., description="Title of the task")
+    assignee: Optional[str] = Field(None, description="Assignee of the task")
+    priority: str = Field(..., description="Priority level of the task")
+    complexity: str = Field(..., description="Task complexity")
+    tags: List[str] = Field(default_factory=list, description="Tags of the task")
+    minimum_hours: float = Field(..., description="Minimum estimated hours")
+    maximum_hours: float = Field(..., description="Maximum estimated hours")
+
+
+class EstimateStats(BaseModel):
+    count: int = Field(default=0, description="Number of tasks")
+    minimum_hours_total: float = Field(default=0.0, description="Sum of minimum estimates")
+    maximum_hours_total: float = Field(default=0.0, description="Sum of maximum estimates")
+    histogram: Dict[str, int] = Field(default_factory=dict, description="Task counts by estimate midpoint bucket")
+
+    def add(self, task: HistoricalTask) -> None:
+        self.count += 1
+        self.minimum_hours_total += task.minimum_hours
+        self.maximum_hours_total += task.maximum_hours
+        bucket = hour_bucket((task.minimum_hours + task.maximum_hours) / 2)
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def merge(self, other: "EstimateStats") -> None:
+        self.count += other.count
+        self.minimum_hours_total += other.minimum_hours_total
+        self.maximum_hours_total += other.maximum_hours_total
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_min_hours": round(self.minimum_hours_total / self.count, 1),
+            "avg_max_hours": round(self.maximum_hours_total / self.count, 1),
+            "histogram": self.histogram,
+        }
+
+
+class AssigneeLoad(BaseModel):
+    tasks: int = Field(default=0, description="Number of tasks assigned")
+    hours: float = Field(default=0.0, description="Sum of estimate midpoints")
+
+
+class TaskHistory(BaseModel):
+    """Rolling window of recent tasks plus aggregate statistics of everything older
+
+    Tasks beyond the window are compacted into per-tag and per-complexity estimate
+    distributions and per-assignee load, so the stored state and the prompt payload
+    stay bounded however long a session lives. Only the `max_tags` most frequent tags and
+    `max_assignees` busiest assignees keep their own statistics; the rest are merged under OTHERS.
+    """
+
+    window: int = Field(default=50, description="Number of recent tasks kept verbatim")
+    recent: List[HistoricalTask] = Field(default_factory=list, description="Most recent tasks, oldest first")
+    compacted_tasks: int = Field(default=0, description="Number of tasks folded into the statistics")
+    tag_stats: Dict[str, EstimateStats] = Field(default_factory=dict, description="Estimate statistics per tag")
+    complexity_stats: Dict[str, EstimateStats] = Field(
+        default_factory=dict, description="Estimate statistics per complexity"
+    )
+    assignee_load: Dict[str, AssigneeLoad] = Field(default_factory=dict, description="Load per assignee")
+    max_tags: int = Field(default=100, description="Tags with their own statistics")
+    max_assignees: int = Field(default=100, description="Assignees with their own load")
+
+    @classmethod
+    def from_state(cls, state: Any, window: int = 50) -> "TaskHistory":
+        """Load history from session_state, migrating the legacy list of TaskList dumps"""
+        if isinstance(state, dict):
+            history = cls.model_validate(state)
+            history.window = window
+        else:
+            history = cls(window=window)
+            for task_list in state or []:
+                history.record(task_list.get("tasks", []))
+        history.compact()
+        return history
+
+    def record(self, tasks: Iterable[Any]) -> None:
+        """Add the tasks generated by one run and compact anything that falls out of the window"""
+        for task in tasks:
+            if isinstance(task, BaseModel):
+                task = task.model_dump()
+            estimate = task["time_estimate"]
+            self.recent.append(
+                HistoricalTask(
+                    title=task["task_title"],
+                    assignee=task.get("task_assignee"),
+                    priority=task["priority"]["level"],
+                    complexity=task["complexity"],
+                    tags=task.get("tags", []),
+                    minimum_hours=estimate["minimum_hours"],
+                    maximum_hours=estimate["maximum_hours"],
+                )
+            )
+        self.compact()
+
+    def compact(self) -> None:
+        """Fold tasks beyond the rolling window into the aggregate statistics"""
+        overflow = len(self.recent) - self.window
+        if overflow <= 0:
+            return
+        for task in self.recent[:overflow]:
+            for tag in task.tags:
+                self.tag_stats.setdefault(tag, EstimateStats()).add(task)
+            self.complexity_stats.setdefault(task.complexity, EstimateStats()).add(task)
+            if task.assignee:
+                load = self.assignee_load.setdefault(task.assignee, AssigneeLoad())
+                load.tasks += 1
+                load.hours += (task.minimum_hours + task.maximum_hours) / 2
+        self.recent = self.recent[overflow:]
+        self.compacted_tasks += overflow
+        self._prune()
+
+    def _prune(self) -> None:
+        if len(self.tag_stats) > self.max_tags:
+            tags = [tag for tag in self.tag_stats if tag != OTHERS]
+            ranked = sorted(tags, key=lambda tag: self.tag_stats[tag].count, reverse=True)
+            others = self.tag_stats.pop(OTHERS, EstimateStats())
+            for tag in ranked[self.max_tags - 1:]:
+                others.merge(self.tag_stats.pop(tag))
+            self.tag_stats[OTHERS] = others
+        if len(self.assignee_load) > self.max_assignees:
+            names = [name for name in self.assignee_load if name != OTHERS]
+            ranked = sorted(names, key=lambda name: self.assignee_load[name].hours, reverse=True)
+            others = self.assignee_load.pop(OTHERS, AssigneeLoad())
+            for name in ranked[self.max_assignees - 1:]:
+                load = self.assignee_load.pop(name)
+                others.tasks += load.tasks
+                others.hours += load.hours
+            self.assignee_load[OTHERS] = others
+
+    def prompt_payload(self, token_budget: int = 1500, max_tags: int = 15) -> Dict[str, Any]:
+        """Historical data for the task agent prompt, trimmed to fit `token_budget`
+
+        Statistics come first (most frequent tags only), then as many of the most
+        recent tasks as still fit in the budget.
+        """
+        top_tags = sorted(self.tag_stats.items(), key=lambda item: item[1].count, reverse=True)[:max_tags]
+        payload: Dict[str, Any] = {
+            "compacted_tasks": self.compacted_tasks,
+            "tag_estimates": {tag: stats.summary() for tag, stats in top_tags},
+            "complexity_estimates": {name: stats.summary() for name, stats in self.complexity_stats.items()},
+            "assignee_load": {
+                name: {"tasks": load.tasks, "hours": round(load.hours, 1)} for name, load in self.assignee_load.items()
+            },
+            "recent_tasks": [],
+        }
+        used = estimate_tokens(json.dumps(payload))
+        for task in reversed(self.recent):
+            entry = task.model_dump(exclude_none=True)
+            cost = estimate_tokens(json.dumps(entry))
+            if used + cost > token_budget:
+                break
+            payload["recent_tasks"].append(entry)
+            used += cost
+        return payload
@@ -0,0 +1,321 @@
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from pydantic import BaseModel, Field
+
+from phi.utils.log import logger
+
+from dependencies import task_key
+from resilience import check_abandoned
+from tracing import propagate, record
+
+if TYPE_CHECKING:
+    from workflow import Task
+
+LINEAR_API_URL = "https://api.linear.app/graphql"
+
+# Linear priorities: 0 = none, 1 = urgent, 2 = high, 3 = normal, 4 = low
+PRIORITY_CODES = {"Critical": 1, "High": 2, "Medium": 3, "Low": 4}
+
+# Namespace for the deterministic ids used as idempotency keys
+LINEAR_ID_NAMESPACE = uuid.UUID("5d1e3a6c-2f8b-4f5e-9a57-7b0c8e1d4a21")
+
+ISSUE_FIELDS = "id identifier title url"
+
+_IDENTIFIER = re.compile(r"/issue/([A-Z][A-Z0-9]*-\d+)")
+
+
+class LinearAPIError(Exception):
+    pass
+
+
+class LinearIssueResult(BaseModel):
+    task_title: str = Field(..., description="Title of the task the issue was created for")
+    issue_id: str = Field(..., description="Linear issue UUID")
+    identifier: Optional[str] = Field(None, description="Human readable issue identifier, e.g. ENG-123")
+    url: Optional[str] = Field(None, description="Link to the issue")
+    created: bool = Field(..., description="False if the issue already existed from an earlier attempt")
+
+
+def linear_id(*parts: str) -> str:
+    """Deterministic UUID for a Linear entity, used as its idempotency key"""
+    return str(uuid.uuid5(LINEAR_ID_NAMESPACE, "/".join(parts)))
+
+
+def issue_description(task: "Task") -> str:
+    """Markdown issue body with the task's planning metadata"""
+    estimate = task.time_estimate
+    lines = [task.task_description or ""]
+    lines.append("")
+    lines.append(f"**Priority:** {task.priority.level}" + (f" ({task.priority.reason})" if task.priority.reason else ""))
+    lines.append(
+        f"**Estimate:** {estimate.minimum_hours:g}-{estimate.maximum_hours:g}h "
+        f"({estimate.confidence_level} confidence)"
+    )
+    lines.append(f"**Complexity:** {task.complexity}")
+    if task.required_skills:
+        lines.append(f"**Skills:** {', '.join(task.required_skills)}")
+    if task.tags:
+        lines.append(f"**Tags:** {', '.join(task.tags)}")
+    return "\n".join(lines).strip()
+
+
+def issue_input(
+    task: "Task",
+    team_id: str,
+    project_id: str,
+    linear_users: Dict[str, str],
+    scope: str = "",
+    label_ids: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """Deterministic IssueCreateInput for a task"""
+    data: Dict[str, Any] = {
+        "id": linear_id(team_id, project_id, scope, task_key(task.task_title)),
+        "title": task.task_title,
+        "description": issue_description(task),
+        "teamId": team_id,
+        "projectId": project_id,
+        "priority": PRIORITY_CODES.get(task.priority.level, 0),
+    }
+    if task.task_assignee and task.task_assignee in linear_users:
+        data["assigneeId"] = linear_users[task.task_assignee]
+    if task.deadline is not None:
+        data["dueDate"] = task.deadline.date().isoformat()
+    if label_ids:
+        labels = sorted({label_ids[tag] for tag in task.tags if tag in label_ids})
+        if labels:
+            data["labelIds"] = labels
+    return data
+
+
+def issue_update_input(task: "Task", linear_users: Dict[str, str]) -> Dict[str, Any]:
+    """IssueUpdateInput with the fields a later meeting may have changed"""
+    data: Dict[str, Any] = {
+        "title": task.task_title,
+        "description": issue_description(task),
+        "priority": PRIORITY_CODES.get(task.priority.level, 0),
+    }
+    if task.task_assignee and task.task_assignee in linear_users:
+        data["assigneeId"] = linear_users[task.task_assignee]
+    if task.deadline is not None:
+        data["dueDate"] = task.deadline.date().isoformat()
+    return data
+
+
+def issue_identifier(url: Optional[str]) -> Optional[str]:
+    """Identifier (e.g. ENG-123) in an issue URL; Linear accepts it wherever an issue id is expected"""
+    match = _IDENTIFIER.search(url or "")
+    return match.group(1) if match else None
+
+
+def _chunks(items: Sequence[Any], size: int) -> List[Sequence[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _is_conflict(error: Dict[str, Any]) -> bool:
+    code = (error.get("extensions") or {}).get("code", "")
+    return code == "CONFLICT" or "already exists" in error.get("message", "").lower()
+
+
+class LinearClient:
+    """Direct Linear GraphQL client that creates issues in batches without an LLM
+
+    Issues are created with aliased batch mutations over one pooled HTTP session. Every issue and
+    relation gets a deterministic id derived from the team, project, scope and task title, so a
+    retried run finds the issues it already created instead of filing duplicates.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        endpoint: str = LINEAR_API_URL,
+        batch_size: int = 20,
+        max_concurrency: int = 2,
+        timeout: float = 30.0,
+        retries: int = 3,
+        label_ids: Optional[Dict[str, str]] = None,
+    ):
+        try:
+            import requests
+        except ImportError:
+            raise ImportError("`requests` not installed. Please install it with `pip install requests`")
+
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.label_ids = label_ids or {}
+        self.retries = retries
+        self.requests_sent = 0
+
+        self.session = requests.Session()
+        self._mount(retries)
+        self.session.headers.update(
+            {"Authorization": api_key or os.getenv("LINEAR_API_KEY", ""), "Content-Type": "application/json"}
+        )
+
+    def _mount(self, retries: int) -> None:
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        # Mutations are safe to retry because every entity carries its own id
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=None,
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.max_concurrency, 1), max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def disable_retries(self) -> None:
+        """Leave retries to an outer layer, such as the workflow's resilience layer, instead of retrying each request"""
+        self.retries = 0
+        self._mount(0)
+
+    def execute(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], List[Dict]]:
+        """Run a GraphQL operation, returning its data and any (partial) errors"""
+        check_abandoned()
+        response = self.session.post(
+            self.endpoint, json={"query": query, "variables": variables or {}}, timeout=self.timeout
+        )
+        self.requests_sent += 1
+        record("requests")
+        # Requests the adapter retried on 5xx before returning this response
+        retries = getattr(getattr(response.raw, "retries", None), "history", ())
+        if retries:
+            record("retries", len(retries))
+        response.raise_for_status()
+        payload = response.json()
+        return payload.get("data") or {}, payload.get("errors") or []
+
+    def fetch_issues(self, issue_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up existing issues by id"""
+        found: Dict[str, Dict[str, Any]] = {}
+        for chunk in _chunks(list(issue_ids), 100):
+            data, errors = self.execute(
+                f"query Issues($ids: [ID!]) {{ issues(filter: {{id: {{in: $ids}}}}, first: 100) {{ nodes {{ {ISSUE_FIELDS} }} }} }}",
+                {"ids": list(chunk)},
+            )
+            if errors:
+                raise LinearAPIError(f"Error looking up issues: {errors}")
+            for issue in data.get("issues", {}).get("nodes", []):
+                found[issue["id"]] = issue
+        return found
+
+    def _mutate_batch(self, mutation: str, input_type: str, inputs: Sequence[Dict[str, Any]], fields: str):
+        aliases = [f"m{i}" for i in range(len(inputs))]
+        declarations = ", ".join(f"${alias}: {input_type}!" for alias in aliases)
+        body = " ".join(f"{alias}: {mutation}(input: ${alias}) {{ success {fields} }}" for alias in aliases)
+        data, errors = self.execute(f"mutation Batch({declarations}) {{ {body} }}", dict(zip(aliases, inputs)))
+        conflicts, failures = [], []
+        for error in errors:
+            path = error.get("path") or []
+            index = aliases.index(path[0]) if path and path[0] in aliases else None
+            if index is not None and _is_conflict(error):
+                conflicts.append(inputs[index]["id"])
+            else:
+                failures.append(error.get("message", str(error)))
+        results = [(data.get(alias) or {}) for alias in aliases]
+        return results, conflicts, failures
+
+    def _run_batches(self, mutation: str, input_type: str, inputs: List[Dict[str, Any]], fields: str):
+        batches = _chunks(inputs, self.batch_size)
+        if self.max_concurrency > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="linear") as executor:
+                outcomes = list(executor.map(propagate(lambda b: self._mutate_batch(mutation, input_type, b, fields)), batches))
+        else:
+            outcomes = [self._mutate_batch(mutation, input_type, b, fields) for b in batches]
+        results, conflicts, failures = [], [], []
+        for batch_results, batch_conflicts, batch_failures in outcomes:
+            results.extend(batch_results)
+            conflicts.extend(batch_conflicts)
+            failures.extend(batch_failures)
+        return results, conflicts, failures
+
+    def create_issues(
+        self,
+        tasks: Sequence["Task"],
+        team_id: str,
+        project_id: str,
+        linear_users: Dict[str, str],
+        scope: str = "",
+    ) -> List[LinearIssueResult]:
+        """Create one issue per task, reusing issues already created under the same ids"""
+        inputs = [issue_input(task, team_id, project_id, linear_users, scope, self.label_ids) for task in tasks]
+        existing = self.fetch_issues([data["id"] for data in inputs])
+        to_create = [data for data in inputs if data["id"] not in existing]
+
+        created: Dict[str, Dict[str, Any]] = {}
+        if to_create:
+            results, conflicts, failures = self._run_batches(
+                "issueCreate", "IssueCreateInput", to_create, f"issue {{ {ISSUE_FIELDS} }}"
+            )
+            for result in results:
+                if result.get("success") and result.get("issue"):
+                    created[result["issue"]["id"]] = result["issue"]
+            if conflicts:
+                # Created concurrently by another attempt since the lookup
+                existing.update(self.fetch_issues(conflicts))
+            if failures:
+                raise LinearAPIError(f"Failed to create {len(failures)} Linear issues: {failures}")
+
+        issues = []
+        for task, data in zip(tasks, inputs):
+            issue = created.get(data["id"]) or existing.get(data["id"])
+            if issue is None:
+                raise LinearAPIError(f"Linear issue for '{task.task_title}' was not created")
+            issues.append(
+                LinearIssueResult(
+                    task_title=task.task_title,
+                    issue_id=issue["id"],
+                    identifier=issue.get("identifier"),
+                    url=issue.get("url"),
+                    created=data["id"] in created,
+                )
+            )
+        logger.info(f"Linear issues: {sum(i.created for i in issues)} created, {sum(not i.created for i in issues)} reused")
+        return issues
+
+    def update_issues(self, updates: Sequence[Tuple[str, "Task"]], linear_users: Dict[str, str]) -> List[str]:
+        """Update the issues given as (issue id or identifier, task) with the task's fields; returns the ids updated"""
+        updated: List[str] = []
+        failures: List[str] = []
+        for chunk in _chunks(list(updates), self.batch_size):
+            aliases = [f"m{i}" for i in range(len(chunk))]
+            declarations = ", ".join(f"${alias}Id: String!, ${alias}: IssueUpdateInput!" for alias in aliases)
+            body = " ".join(
+                f"{alias}: issueUpdate(id: ${alias}Id, input: ${alias}) {{ success issue {{ {ISSUE_FIELDS} }} }}"
+                for alias in aliases
+            )
+            variables: Dict[str, Any] = {}
+            for alias, (issue_id, task) in zip(aliases, chunk):
+                variables[f"{alias}Id"] = issue_id
+                variables[alias] = issue_update_input(task, linear_users)
+            data, errors = self.execute(f"mutation Update({declarations}) {{ {body} }}", variables)
+            failures.extend(error.get("message", str(error)) for error in errors)
+            updated.extend(issue_id for alias, (issue_id, _) in zip(aliases, chunk) if (data.get(alias) or {}).get("success"))
+        if failures:
+            raise LinearAPIError(f"Failed to update {len(failures)} Linear issues: {failures}")
+        logger.info(f"Linear issues: {len(updated)} updated")
+        return updated
+
+    def link_issues(self, relations: Iterable[Tuple[str, str, str]]) -> int:
+        """Create issue relations given as (issue_id, related_issue_id, type) with type "blocks" or "related"
+
+        Returns the number of relations created; relations that already exist are skipped.
+        """
+        inputs = [
+            {"id": linear_id("relation", issue_id, related_id, kind), "issueId": issue_id, "relatedIssueId": related_id, "type": kind}
+            for issue_id, related_id, kind in relations
+        ]
+        if not inputs:
+            return 0
+        results, _, failures = self._run_batches("issueRelationCreate", "IssueRelationCreateInput", inputs, "")
+        if failures:
+            raise LinearAPIError(f"Failed to link {len(failures)} Linear issues: {failures}")
+        return sum(1 for result in results if result.get("success"))
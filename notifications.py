@@ -0,0 +1,300 @@
+import os
+import time
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+from pydantic import BaseModel, Field
+
+from phi.utils.log import logger
+
+from ratelimit import TokenBucket
+from resilience import check_abandoned
+from tracing import record
+
+if TYPE_CHECKING:
+    from workflow import LinearIssueList, MeetingSummary, TaskList
+
+SLACK_API_URL = "https://slack.com/api"
+
+# Slack truncates message text beyond roughly 4000 characters
+MAX_MESSAGE_CHARS = 3500
+
+
+class SlackAPIError(Exception):
+    pass
+
+
+class NotificationStats(BaseModel):
+    events: int = Field(0, description="Notifications enqueued")
+    messages_sent: int = Field(0, description="Slack messages posted")
+    failed_messages: int = Field(0, description="Slack messages that could not be posted")
+    pending: int = Field(0, description="Notifications waiting for the next digest")
+
+
+def _bullets(lines: Sequence[str], empty: Optional[str] = None) -> List[str]:
+    if not lines:
+        return [empty] if empty else []
+    return [f"• {line}" for line in lines]
+
+
+def render_meeting_update(
+    meeting_summary: "MeetingSummary",
+    tasks: "TaskList",
+    linear_issues: Optional["LinearIssueList"] = None,
+    priority_alerts: Sequence[str] = (),
+    workload_alerts: Sequence[str] = (),
+) -> str:
+    """Slack mrkdwn update for one meeting: summary, tasks with their Linear links and alerts"""
+    links = {issue.issue_title: issue.issue_link for issue in (linear_issues.issues if linear_issues else [])}
+    meeting_type = f" ({meeting_summary.meeting_type})" if meeting_summary.meeting_type else ""
+    lines = [
+        f"*Meeting {meeting_summary.date:%Y-%m-%d}{meeting_type}* · {len(meeting_summary.attendees)} attendees",
+        "*Key points*",
+        *_bullets(meeting_summary.key_points, "_None_"),
+    ]
+    if meeting_summary.decisions:
+        lines += ["*Decisions*", *_bullets(meeting_summary.decisions)]
+
+    task_lines = []
+    for task in tasks.tasks:
+        title = f"<{links[task.task_title]}|{task.task_title}>" if links.get(task.task_title) else task.task_title
+        details = [task.task_assignee or "unassigned", task.priority.level]
+        if task.deadline is not None:
+            details.append(f"due {task.deadline:%Y-%m-%d}")
+        task_lines.append(f"{title} — {' · '.join(details)}")
+    lines += [f"*Tasks* ({len(tasks.tasks)})", *_bullets(task_lines, "_None_")]
+
+    if priority_alerts:
+        lines += [":rotating_light: *Priority alerts*", *_bullets(priority_alerts)]
+    if workload_alerts:
+        lines += [":warning: *Workload alerts*", *_bullets(workload_alerts)]
+    return "\n".join(lines)
+
+
+def pack_messages(entries: Sequence[str], max_chars: int = MAX_MESSAGE_CHARS) -> List[str]:
+    """Join digest entries into as few messages of at most `max_chars` as possible"""
+    header = f"*PM digest* · {len(entries)} update{'s' if len(entries) != 1 else ''}"
+    messages: List[str] = []
+    current = header
+    for entry in entries:
+        if len(entry) > max_chars:
+            entry = entry[: max_chars - 20].rsplit("\n", 1)[0] + "\n_…truncated_"
+        if len(current) + 2 + len(entry) > max_chars:
+            messages.append(current)
+            current = entry
+        else:
+            current = f"{current}\n\n{entry}"
+    messages.append(current)
+    return messages
+
+
+class SlackClient:
+    """Pooled Slack Web API client that paces chat.postMessage per channel
+
+    Slack allows about one message per second per channel; each channel gets its own token bucket,
+    and 429 responses pause it for the Retry-After the API returns.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        api_url: str = SLACK_API_URL,
+        messages_per_second: float = 1.0,
+        burst: int = 3,
+        timeout: float = 10.0,
+        retries: int = 3,
+        resilience: Optional[Any] = None,
+    ):
+        try:
+            import requests
+            from requests.adapters import HTTPAdapter
+        except ImportError:
+            raise ImportError("`requests` not installed. Please install it with `pip install requests`")
+
+        self.api_url = api_url.rstrip("/")
+        self.messages_per_second = messages_per_second
+        self.burst = burst
+        self.timeout = timeout
+        # A resilience.Resilience that posts go through as the "slack" service, which then does the retrying
+        self.resilience = resilience
+        self.retries = 0 if resilience is not None else retries
+        self.requests_sent = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+        token = token or os.getenv("SLACK_BOT_TOKEN") or os.getenv("SLACK_TOKEN", "")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {"Authorization": f"Bearer {token}", "Content-Type": "application/json; charset=utf-8"}
+        )
+
+    def _bucket(self, channel: str) -> TokenBucket:
+        with self._lock:
+            if channel not in self._buckets:
+                self._buckets[channel] = TokenBucket(rate=self.messages_per_second, capacity=self.burst)
+            return self._buckets[channel]
+
+    def post_message(self, channel: str, text: str) -> Dict[str, Any]:
+        """Post a message, waiting out the channel's rate limit"""
+        if self.resilience is not None:
+            return self.resilience.call("slack", self._post_message, channel, text)
+        return self._post_message(channel, text)
+
+    def _post_message(self, channel: str, text: str) -> Dict[str, Any]:
+        bucket = self._bucket(channel)
+        for attempt in range(self.retries + 1):
+            check_abandoned()
+            bucket.acquire()
+            response = self.session.post(
+                f"{self.api_url}/chat.postMessage",
+                json={"channel": channel, "text": text, "unfurl_links": False},
+                timeout=self.timeout,
+            )
+            with self._lock:
+                self.requests_sent += 1
+            record("requests")
+            if attempt:
+                record("retries")
+            if response.status_code == 429:
+                # Paused even on the last attempt, so an outer retry waits out the limit too
+                bucket.pause(float(response.headers.get("Retry-After", 1)))
+                if attempt < self.retries:
+                    continue
+                break
+            response.raise_for_status()
+            payload = response.json()
+            if not payload.get("ok"):
+                raise SlackAPIError(f"Slack error posting to {channel}: {payload.get('error')}")
+            return payload
+        raise SlackAPIError(f"Slack still rate limited posting to {channel} after {self.retries} retries")
+
+
+class NotificationQueue:
+    """Coalesces notifications from many workflow runs into one digest per channel
+
+    A channel's pending notifications are posted as a digest once the oldest has waited
+    `window_seconds` or `max_events` have accumulated, whichever comes first. Call `start` to flush
+    from a background thread; otherwise thresholds are checked on every `enqueue` and the workflow
+    flushes its channel at the end of each run. `close` posts whatever is still pending.
+    """
+
+    def __init__(
+        self,
+        client: SlackClient,
+        window_seconds: float = 60.0,
+        max_events: int = 20,
+        max_chars: int = MAX_MESSAGE_CHARS,
+        clock=time.monotonic,
+    ):
+        self.client = client
+        self.window_seconds = window_seconds
+        self.max_events = max_events
+        self.max_chars = max_chars
+        self._clock = clock
+        self._pending: Dict[str, List[str]] = {}
+        self._oldest: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._stats = NotificationStats()
+
+    def enqueue(self, channel: str, text: str) -> None:
+        """Add a notification to the channel's next digest"""
+        with self._condition:
+            if channel not in self._pending:
+                self._pending[channel] = []
+                self._oldest[channel] = self._clock()
+            self._pending[channel].append(text)
+            self._stats.events += 1
+            self._condition.notify()
+            due = self._due() if self._thread is None else []
+        if due:
+            self._send(self._take(due))
+
+    def _due(self) -> List[str]:
+        now = self._clock()
+        return [
+            channel
+            for channel, entries in self._pending.items()
+            if len(entries) >= self.max_events or now - self._oldest[channel] >= self.window_seconds
+        ]
+
+    def _take(self, channels: Sequence[str]) -> List[Tuple[str, List[str]]]:
+        with self._condition:
+            batches = []
+            for channel in channels:
+                entries = self._pending.pop(channel, None)
+                self._oldest.pop(channel, None)
+                if entries:
+                    batches.append((channel, entries))
+            return batches
+
+    def _send(self, batches: List[Tuple[str, List[str]]]) -> int:
+        sent = 0
+        for channel, entries in batches:
+            for message in pack_messages(entries, self.max_chars):
+                try:
+                    self.client.post_message(channel, message)
+                    sent += 1
+                except Exception as e:
+                    logger.error(f"Error posting Slack digest to {channel}: {e}")
+                    with self._condition:
+                        self._stats.failed_messages += 1
+        with self._condition:
+            self._stats.messages_sent += sent
+        return sent
+
+    def flush(self, channel: Optional[str] = None) -> int:
+        """Post pending digests now, for one channel or all; returns the number of messages sent"""
+        with self._condition:
+            channels = [channel] if channel is not None else list(self._pending)
+        return self._send(self._take(channels))
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                due = self._due()
+                while not due and not self._stopped:
+                    timeout = None
+                    if self._oldest:
+                        timeout = max(0.0, min(self._oldest.values()) + self.window_seconds - self._clock())
+                    self._condition.wait(timeout=timeout)
+                    due = self._due()
+                if self._stopped:
+                    return
+            self._send(self._take(due))
+
+    @property
+    def started(self) -> bool:
+        """Whether digests are flushed from a background thread"""
+        return self._thread is not None
+
+    def start(self) -> "NotificationQueue":
+        """Flush digests from a background thread as thresholds are reached"""
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="pm-notifications", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """Stop the background thread and post everything still pending"""
+        if self._thread is not None:
+            with self._condition:
+                self._stopped = True
+                self._condition.notify()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> NotificationStats:
+        with self._condition:
+            return self._stats.model_copy(update={"pending": sum(len(e) for e in self._pending.values())})
+
+    def __enter__(self) -> "NotificationQueue":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
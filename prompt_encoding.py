@@ -0,0 +1,181 @@
+import json
+import threading
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from phi.utils.log import logger
+
+from history import estimate_tokens
+
+# Task fields each consumer reads, in pydantic include format
+_ACTION_ITEM_FIELDS = {"task_title": True, "task_description": True, "task_assignee": True, "deadline": True, "priority": {"level": True}}
+
+# Fields of each section each stage actually reads; sections without an entry are sent whole
+STAGE_FIELDS: Dict[str, Dict[str, Any]] = {
+    "generate_tasks": {
+        "meeting_summary": {
+            "date": True,
+            "attendees": True,
+            "key_points": True,
+            "decisions": True,
+            "context": True,
+            "meeting_type": True,
+            "action_items": {"__all__": _ACTION_ITEM_FIELDS},
+        },
+    },
+    "create_linear_issues": {
+        "tasks": {
+            "__all__": {
+                "task_title": True,
+                "task_description": True,
+                "task_assignee": True,
+                "priority": True,
+                "deadline": True,
+                "tags": True,
+            }
+        },
+    },
+    "create_github_issues": {
+        "tasks": {"__all__": {"task_title": True, "task_description": True, "task_assignee": True, "tags": True}},
+    },
+    "send_notifications": {
+        "summary": {"date": True, "meeting_type": True, "attendees": True, "key_points": True, "decisions": True},
+        "tasks": {"__all__": {"task_title": True, "task_assignee": True, "priority": {"level": True}, "deadline": True}},
+        "issues": {"__all__": {"issue_title": True, "issue_link": True}},
+    },
+}
+
+
+class StageTokens(BaseModel):
+    stage: str = Field(..., description="Workflow stage the payloads were sent from")
+    calls: int = Field(0, description="Payloads encoded for the stage")
+    baseline_tokens: int = Field(0, description="Estimated tokens of the payloads as full JSON dumps")
+    encoded_tokens: int = Field(0, description="Estimated tokens of the encoded payloads")
+
+    @property
+    def saved_fraction(self) -> float:
+        return 1 - self.encoded_tokens / self.baseline_tokens if self.baseline_tokens else 0.0
+
+
+def _compact(value: Any) -> Any:
+    """Drop None, empty strings and empty containers, recursively, and write midnight datetimes as dates"""
+    if isinstance(value, str) and len(value) == 19 and value.endswith("T00:00:00"):
+        return value[:10]
+    if isinstance(value, dict):
+        items = ((key, _compact(item)) for key, item in value.items())
+        return {key: item for key, item in items if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        items = (_compact(item) for item in value)
+        return [item for item in items if item not in (None, "", [], {})]
+    return value
+
+
+def _dump(value: Any, include: Optional[Dict[str, Any]] = None, prune: bool = True) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", include=include, exclude_none=prune, exclude_defaults=prune)
+    if isinstance(value, list):
+        item_include = include.get("__all__") if include else None
+        return [_dump(item, item_include, prune) for item in value]
+    return value
+
+
+def _flatten(row: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    flat: Dict[str, Any] = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _cell(value: Any) -> str:
+    # Escaped rather than rewritten, so descriptions reach the issue body unchanged
+    if not isinstance(value, str):
+        value = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return value.replace("\\", "\\\\").replace("|", "\\|").replace("\r", "\\r").replace("\n", "\\n")
+
+
+def encode_table(rows: List[Dict[str, Any]]) -> str:
+    """Pipe-separated table with one header line, nested keys dotted and non-string values as JSON
+
+    Backslashes, pipes and line breaks in cells are escaped as `\\\\`, `\\|`, `\\r` and `\\n`.
+    """
+    flat_rows = [_flatten(row) for row in rows]
+    columns: List[str] = []
+    for row in flat_rows:
+        columns.extend(key for key in row if key not in columns)
+    lines = ["|".join(columns)]
+    lines.extend("|".join(_cell(row[column]) if column in row else "" for column in columns) for row in flat_rows)
+    return "\n".join(lines)
+
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, list) and len(value) > 1 and all(isinstance(item, dict) for item in value)
+
+
+class PromptEncoder:
+    """Compact, per-stage serialization of the payloads sent to the agents
+
+    Each section is reduced to the fields its stage reads (`STAGE_FIELDS`), with None, default and
+    empty values dropped and JSON written without whitespace. Lists of objects, such as tasks, are
+    written as pipe-separated tables so keys are not repeated per row. Estimated tokens before and
+    after encoding are accumulated per stage.
+    """
+
+    def __init__(self, tabular: bool = True, prune: bool = True, stage_fields: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.tabular = tabular
+        self.prune = prune
+        self.stage_fields = STAGE_FIELDS if stage_fields is None else stage_fields
+        self._reports: Dict[str, StageTokens] = {}
+        self._lock = threading.Lock()
+
+    def _render(self, name: str, value: Any) -> List[str]:
+        if isinstance(value, str):
+            return [f"## {name}", value]
+        if self.tabular and isinstance(value, dict):
+            # Pull lists of objects (e.g. a summary's action items) out into their own tables
+            tables = {key: item for key, item in value.items() if _is_table(item)}
+            rest = {key: item for key, item in value.items() if key not in tables}
+            lines = [f"## {name}", json.dumps(rest, separators=(",", ":"), ensure_ascii=False)] if rest else []
+            for key, rows in tables.items():
+                lines += [f"## {name}.{key}", encode_table(rows)]
+            return lines
+        if self.tabular and _is_table(value):
+            return [f"## {name}", encode_table(value)]
+        return [f"## {name}", json.dumps(value, separators=(",", ":"), ensure_ascii=False)]
+
+    def encode(self, stage: str, **sections: Any) -> str:
+        """Encode the named payload sections for `stage` into one prompt string"""
+        fields = self.stage_fields.get(stage, {})
+        lines: List[str] = []
+        baseline: Dict[str, Any] = {}
+        for name, value in sections.items():
+            # What the stage used to send: every field as JSON
+            baseline[name] = _dump(value, prune=False)
+            data = _dump(value, fields.get(name) if self.prune else None, self.prune)
+            if self.prune:
+                data = _compact(data)
+            if data in (None, "", [], {}):
+                continue
+            lines += self._render(name, data)
+        text = "\n".join(lines)
+
+        baseline_tokens = estimate_tokens(json.dumps(baseline, separators=(",", ":"), default=str))
+        encoded_tokens = estimate_tokens(text)
+        with self._lock:
+            report = self._reports.setdefault(stage, StageTokens(stage=stage))
+            report.calls += 1
+            report.baseline_tokens += baseline_tokens
+            report.encoded_tokens += encoded_tokens
+        logger.debug(f"{stage} payload: {baseline_tokens} -> {encoded_tokens} tokens")
+        return text
+
+    def report(self) -> Dict[str, StageTokens]:
+        """Tokens before and after encoding, per stage"""
+        with self._lock:
+            return {stage: report.model_copy() for stage, report in self._reports.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reports.clear()
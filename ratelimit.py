@@ -0,0 +1,84 @@
+import time
+import threading
+from typing import Mapping, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket that can be re-synchronised from API rate-limit headers
+
+    `rate` tokens are added per second up to `capacity`. When a response reports the remaining
+    quota and its reset time, the bucket never holds more tokens than the server allows, and once
+    fewer than `low_watermark` requests remain it spreads them evenly over the rest of the window.
+    A Retry-After or an exhausted quota pauses it until then.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        low_watermark: float = 100,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.base_rate = rate
+        self.rate = rate
+        self.low_watermark = low_watermark
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until `tokens` are available; returns False if that would take longer than `timeout`"""
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = max(self._paused_until - now, (tokens - self._tokens) / self.rate if self.rate > 0 else 1.0)
+            if deadline is not None and self._clock() + wait > deadline:
+                return False
+            self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds`, e.g. after a Retry-After response"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def update(self, remaining: float, reset_in: float) -> None:
+        """Adopt the server's view: `remaining` requests allowed over the next `reset_in` seconds"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens = min(self._tokens, remaining)
+            if remaining <= 0:
+                self._paused_until = max(self._paused_until, now + reset_in)
+            elif remaining < self.low_watermark and reset_in > 0:
+                self.rate = min(self.base_rate, remaining / reset_in)
+            else:
+                self.rate = self.base_rate
+
+    def update_from_headers(self, headers: Mapping[str, str], now_epoch: Optional[float] = None) -> None:
+        """Apply Retry-After and X-RateLimit-Remaining/Reset style headers"""
+        lowered = {key.lower(): value for key, value in headers.items()}
+        retry_after = lowered.get("retry-after")
+        if retry_after is not None:
+            try:
+                self.pause(float(retry_after))
+            except ValueError:
+                pass
+        remaining = lowered.get("x-ratelimit-remaining")
+        reset = lowered.get("x-ratelimit-reset")
+        if remaining is not None and reset is not None:
+            now_epoch = time.time() if now_epoch is None else now_epoch
+            self.update(float(remaining), max(0.0, float(reset) - now_epoch))
@@ -0,0 +1,395 @@
+import time
+import random
+import functools
+import threading
+from collections import deque
+from contextvars import ContextVar
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel, Field
+
+from phi.tools import Toolkit
+from phi.tools.function import Function, StopAgentRun
+from phi.utils.log import logger
+
+from tracing import propagate, record
+
+SERVICES = ("openai", "linear", "github", "slack", "postgres")
+
+
+class ResiliencePolicy(BaseModel):
+    attempts: int = Field(3, ge=1, description="Attempts per call, including the first")
+    base_delay: float = Field(0.5, description="Backoff ceiling before the first retry, doubled per retry")
+    max_delay: float = Field(8.0, description="Largest backoff ceiling")
+    deadline_seconds: Optional[float] = Field(None, description="Give up on a call, retries included, after this many seconds")
+    failure_threshold: int = Field(5, description="Consecutive failures that open the service's circuit")
+    reset_seconds: float = Field(30.0, description="Seconds an open circuit rejects calls before letting a trial call through")
+    hedge: bool = Field(False, description="Start a duplicate of a call still running past the service's hedge_quantile latency")
+    hedge_quantile: float = Field(0.95, description="Latency quantile after which a call is hedged")
+    hedge_min_samples: int = Field(20, description="Successful calls to observe before hedging")
+
+
+# LLM calls are slow and idempotent, so they are hedged; Postgres calls are fast and retried quickly
+DEFAULT_POLICIES: Dict[str, ResiliencePolicy] = {
+    "openai": ResiliencePolicy(base_delay=1.0, max_delay=16.0, deadline_seconds=180.0, hedge=True),
+    "linear": ResiliencePolicy(deadline_seconds=60.0),
+    "github": ResiliencePolicy(deadline_seconds=60.0),
+    "slack": ResiliencePolicy(deadline_seconds=30.0),
+    "postgres": ResiliencePolicy(base_delay=0.1, max_delay=2.0, deadline_seconds=30.0),
+}
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, service: str, retry_in: float):
+        super().__init__(f"Circuit for {service} is open, retry in {retry_in:.1f}s")
+        self.service = service
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+# Set for every attempt the current context runs inside once that attempt is given up, innermost last
+_abandoned: ContextVar[Tuple[threading.Event, ...]] = ContextVar("pm_abandoned", default=())
+
+
+def check_abandoned() -> None:
+    """Raise DeadlineExceeded if the resilience layer gave up on the attempt running in this context
+
+    Clients call this before each request, so an attempt abandoned at its deadline, or beaten by its
+    hedge, stops at its next request instead of running to completion in the background.
+    """
+    if any(event.is_set() for event in _abandoned.get()):
+        raise DeadlineExceeded("Attempt was abandoned")
+
+
+def _abandonable(abandoned: threading.Event, func: Callable[[], Any]) -> Callable[[], Any]:
+    def run() -> Any:
+        token = _abandoned.set(_abandoned.get() + (abandoned,))
+        try:
+            return func()
+        finally:
+            _abandoned.reset(token)
+
+    return run
+
+
+def _stop_if_abandoned() -> None:
+    try:
+        check_abandoned()
+    except DeadlineExceeded as e:
+        raise StopAgentRun(e) from e
+
+
+def stop_when_abandoned(agent: Any) -> None:
+    """Stop the agent's run at its next tool call once the attempt running it is abandoned
+
+    Agents call the model again after each tool call, so this is where an abandoned LLM attempt
+    stops; a model request already in flight still completes.
+    """
+    for tool in agent.tools or []:
+        functions = tool.functions.values() if isinstance(tool, Toolkit) else [tool] if isinstance(tool, Function) else []
+        for function in functions:
+            if function.pre_hook is None:
+                function.pre_hook = _stop_if_abandoned
+
+
+class _Attempt:
+    """One attempt of a call, timed from when a worker starts running it rather than from its submission"""
+
+    def __init__(self, func: Callable[[], Any], clock: Callable[[], float]):
+        self.abandoned = threading.Event()
+        self.started: Optional[float] = None
+        self._func = func
+        self._clock = clock
+
+    def __call__(self) -> Any:
+        self.started = self._clock()
+        return _abandonable(self.abandoned, self._func)()
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float, rng: Any = random) -> float:
+    """Full-jitter exponential backoff: uniform between 0 and min(max_delay, base_delay * 2**attempt)"""
+    return rng.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+class CircuitBreaker:
+    """Fails calls to a service fast while it keeps failing
+
+    The circuit opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_seconds`. Then a single trial call is let through (half-open): its success closes the
+    circuit, its failure opens it again.
+    """
+
+    def __init__(self, service: str, failure_threshold: int = 5, reset_seconds: float = 30.0, clock=time.monotonic):
+        self.service = service
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> Literal["closed", "open", "half_open"]:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "open" if self._clock() - self._opened_at < self.reset_seconds else "half_open"
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = self._clock() - self._opened_at
+            if waited >= self.reset_seconds and not self._trial_running:
+                self._trial_running = True
+                return
+            raise CircuitOpenError(self.service, max(0.0, self.reset_seconds - waited))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_running:
+                    logger.warning(f"Opening the circuit for {self.service} after {self._failures} failures")
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+
+class LatencyWindow:
+    """Latencies of a service's most recent successful calls"""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class ServiceStats(BaseModel):
+    service: str = Field(..., description="Service name")
+    state: str = Field(..., description="State of the service's circuit")
+    calls: int = Field(0, description="Calls made through the resilience layer")
+    failures: int = Field(0, description="Calls that failed after every attempt")
+    retries: int = Field(0, description="Attempts beyond the first")
+    hedges: int = Field(0, description="Duplicate requests started for slow calls")
+    hedges_skipped: int = Field(0, description="Hedges not started because every worker was busy")
+    rejected: int = Field(0, description="Calls rejected by an open circuit")
+    deadlines: int = Field(0, description="Calls abandoned at their deadline")
+    abandoned: int = Field(0, description="Attempts given up at their deadline or beaten by their hedge")
+    p95_seconds: Optional[float] = Field(None, description="95th percentile latency of recent successful calls")
+
+
+class Resilience:
+    """Retries, circuit breakers, deadlines and hedging for calls to external services
+
+    Each call names its service (see SERVICES), whose policy decides how often it is retried, with
+    full-jitter exponential backoff, and how long it may take in total. Consecutive failures open
+    the service's circuit so later calls fail fast. With hedging on, an attempt still running past
+    the service's recent p95 latency gets a duplicate, and whichever answers first wins; latency is
+    measured from when a worker starts the attempt, and no hedge starts while every worker is busy.
+    Attempts that pass the deadline, or lose to their hedge, cannot be interrupted: they are flagged
+    so that `check_abandoned` stops them at their next request, and `func` must be safe to run twice.
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, ResiliencePolicy]] = None,
+        default: Optional[ResiliencePolicy] = None,
+        max_workers: int = 32,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        seed: Optional[int] = None,
+    ):
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.default = default or ResiliencePolicy()
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = random.Random(seed)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self._stats: Dict[str, ServiceStats] = {}
+        self._lock = threading.Lock()
+        self._max_workers = max_workers
+        self._outstanding = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pm-resilience")
+
+    def close(self, wait: bool = True) -> None:
+        """Stop the workers, by default after the attempts still running, abandoned ones included, finish"""
+        self._executor.shutdown(wait=wait)
+
+    def policy(self, service: str) -> ResiliencePolicy:
+        return self.policies.get(service, self.default)
+
+    def breaker(self, service: str) -> CircuitBreaker:
+        with self._lock:
+            if service not in self._breakers:
+                policy = self.policy(service)
+                self._breakers[service] = CircuitBreaker(service, policy.failure_threshold, policy.reset_seconds, self._clock)
+                self._latencies[service] = LatencyWindow()
+                self._stats[service] = ServiceStats(service=service, state="closed")
+            return self._breakers[service]
+
+    def _count(self, service: str, counter: str) -> None:
+        with self._lock:
+            stats = self._stats[service]
+            setattr(stats, counter, getattr(stats, counter) + 1)
+        if counter in ("retries", "hedges"):
+            record(counter)
+
+    def call(
+        self, service: str, func: Callable[..., Any], *args: Any, policy: Optional[ResiliencePolicy] = None, **kwargs: Any
+    ) -> Any:
+        """Call `func(*args, **kwargs)` under the service's policy (or `policy`), returning its result or raising its last error"""
+        policy = policy or self.policy(service)
+        breaker = self.breaker(service)
+        deadline = None if policy.deadline_seconds is None else self._clock() + policy.deadline_seconds
+        self._count(service, "calls")
+        last_error: Optional[BaseException] = None
+        for attempt in range(policy.attempts):
+            try:
+                breaker.check()
+            except CircuitOpenError:
+                self._count(service, "rejected")
+                self._count(service, "failures")
+                raise
+            if attempt:
+                self._count(service, "retries")
+            try:
+                result = self._attempt(service, policy, functools.partial(func, *args, **kwargs), deadline)
+            except DeadlineExceeded:
+                breaker.record_failure()
+                self._count(service, "deadlines")
+                self._count(service, "failures")
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                last_error = e
+                if attempt + 1 == policy.attempts:
+                    break
+                delay = backoff_delay(attempt, policy.base_delay, policy.max_delay, self._rng)
+                if deadline is not None and self._clock() + delay >= deadline:
+                    break
+                logger.warning(f"{service} call failed ({e}), retrying in {delay:.2f}s")
+                self._sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+        self._count(service, "failures")
+        raise last_error
+
+    def _attempt(self, service: str, policy: ResiliencePolicy, func: Callable[[], Any], deadline: Optional[float]) -> Any:
+        latencies = self._latencies[service]
+        hedge_after = None
+        if policy.hedge and len(latencies) >= policy.hedge_min_samples:
+            hedge_after = latencies.quantile(policy.hedge_quantile)
+        if deadline is None and hedge_after is None:
+            started = self._clock()
+            result = func()
+            latencies.add(self._clock() - started)
+            return result
+
+        pending: Dict[Future, _Attempt] = {}
+
+        def submit() -> None:
+            attempt = _Attempt(func, self._clock)
+            with self._lock:
+                self._outstanding += 1
+            future = self._executor.submit(propagate(attempt))
+            future.add_done_callback(self._release)
+            pending[future] = attempt
+
+        def running_since() -> Optional[float]:
+            started = [attempt.started for attempt in pending.values() if attempt.started is not None]
+            return min(started, default=None)
+
+        submit()
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                now = self._clock()
+                timeouts = []
+                if deadline is not None:
+                    timeouts.append(deadline - now)
+                if hedge_after is not None and not hedged:
+                    # An attempt still queued is not hedged yet; look again once it may have started
+                    started = running_since()
+                    timeouts.append(hedge_after if started is None else started + hedge_after - now)
+                done, _ = wait(list(pending), timeout=max(0.0, min(timeouts)) if timeouts else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    attempt = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    latencies.add(self._clock() - attempt.started)
+                    return result
+                now = self._clock()
+                if deadline is not None and now >= deadline:
+                    raise DeadlineExceeded(f"{service} call exceeded its {policy.deadline_seconds}s deadline")
+                started = running_since()
+                if pending and hedge_after is not None and not hedged and started is not None and now - started >= hedge_after:
+                    hedged = True
+                    if self._idle():
+                        self._count(service, "hedges")
+                        submit()
+                    else:
+                        self._count(service, "hedges_skipped")
+            raise error
+        finally:
+            # Attempts still pending lost to their hedge or ran past the deadline
+            for future, attempt in pending.items():
+                future.cancel()
+                attempt.abandoned.set()
+                self._count(service, "abandoned")
+
+    def _idle(self) -> bool:
+        with self._lock:
+            return self._outstanding < self._max_workers
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._outstanding -= 1
+
+    def stats(self) -> List[ServiceStats]:
+        """Counters, circuit state and recent p95 latency per service called so far"""
+        with self._lock:
+            services = list(self._stats)
+        report = []
+        for service in services:
+            state = self._breakers[service].state
+            with self._lock:
+                stats = self._stats[service].model_copy(update={"state": state})
+            stats.p95_seconds = self._latencies[service].quantile(0.95)
+            report.append(stats)
+        return report
+
+
+@functools.lru_cache(maxsize=None)
+def default_resilience() -> Resilience:
+    """The process-wide resilience layer, so every workflow shares the services' circuits and latencies"""
+    return Resilience()
@@ -0,0 +1,186 @@
+import os
+import json
+import functools
+import time
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel, Field
+
+from phi.agent.agent import Agent
+from phi.memory.agent import AgentMemory
+from phi.run.response import RunResponse
+from phi.utils.log import logger
+
+from tracing import propagate, record
+
+
+class ModelRoute(BaseModel):
+    models: List[str] = Field(..., min_length=1, description="Model ids to try, primary first")
+    budget_seconds: Optional[float] = Field(None, description="Give up on the stage after this many seconds")
+    hedge_after_seconds: Optional[float] = Field(
+        None, description="Start the next model alongside a call that has not answered after this many seconds"
+    )
+
+
+class RoutingConfig(BaseModel):
+    default: Optional[ModelRoute] = Field(None, description="Route of agents without their own")
+    stages: Dict[str, ModelRoute] = Field(default_factory=dict, description="Routes by workflow agent field name")
+
+
+class ModelCall(BaseModel):
+    stage: str = Field(..., description="Workflow agent field name the call was made for")
+    model: str = Field(..., description="Model id")
+    outcome: Literal["served", "failed", "abandoned", "timeout"] = Field(..., description="What became of the call")
+    seconds: float = Field(..., description="Time from the start of the call until it answered or was given up")
+    hedged: bool = Field(False, description="Started as a hedge or fallback rather than as the primary")
+
+
+def openai_model(model_id: str) -> Any:
+    from phi.model.openai import OpenAIChat
+
+    return OpenAIChat(id=model_id)
+
+
+class StageBudgetExceeded(TimeoutError):
+    pass
+
+
+class ModelRouter:
+    """Runs each workflow agent on the models configured for its stage
+
+    A stage's primary model gets the call first. If it fails, or has not answered after
+    `hedge_after_seconds`, the next model is started (a hedge: whichever answers first wins); calls
+    still running after `budget_seconds` are abandoned and the stage fails. Agents without a route
+    keep their own model. Every call is recorded as a ModelCall, with the model that served it.
+    """
+
+    def __init__(
+        self,
+        config: Optional[RoutingConfig] = None,
+        model_factory: Callable[[str], Any] = openai_model,
+        max_workers: int = 32,
+        history: int = 1000,
+    ):
+        self.config = config or RoutingConfig()
+        self.model_factory = model_factory
+        self.calls: Deque[ModelCall] = deque(maxlen=history)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pm-model")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs: Any) -> "ModelRouter":
+        with open(path, encoding="utf-8") as f:
+            return cls(RoutingConfig.model_validate(json.load(f)), **kwargs)
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> Optional["ModelRouter"]:
+        """Router for the JSON routing file named by PM_MODEL_ROUTES, if set"""
+        path = os.getenv("PM_MODEL_ROUTES")
+        return cls.from_file(path, **kwargs) if path else None
+
+    def route(self, stage: str) -> Optional[ModelRoute]:
+        return self.config.stages.get(stage, self.config.default)
+
+    def agent_for(self, stage: str, agent: Agent, model_id: Optional[str] = None) -> Agent:
+        """Shallow copy of `agent` with its own memory, on `model_id` or the stage's primary model"""
+        route = self.route(stage)
+        model_id = model_id or (route.models[0] if route is not None else None)
+        update: Dict[str, Any] = {"memory": AgentMemory()}
+        if model_id is not None:
+            update["model"] = self.model_factory(model_id)
+        return agent.model_copy(update=update)
+
+    def _record(self, sink: Optional[List[ModelCall]], call: ModelCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+        if sink is not None:
+            sink.append(call)
+
+    def run(self, stage: str, agent: Agent, message: str, sink: Optional[List[ModelCall]] = None) -> RunResponse:
+        """Run `agent` on `message` through the stage's route; the response's `model` names the model that served it"""
+        route = self.route(stage)
+        if route is None:
+            return agent.run(message)
+
+        started = time.monotonic()
+        deadline = started + route.budget_seconds if route.budget_seconds is not None else None
+        pending: Dict[Future, Tuple[str, float, bool]] = {}
+        next_model = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal next_model
+            model_id = route.models[next_model]
+            copy = self.agent_for(stage, agent, model_id)
+            pending[self._executor.submit(propagate(copy.run), message)] = (model_id, time.monotonic(), next_model > 0)
+            next_model += 1
+
+        launch()
+        while pending:
+            now = time.monotonic()
+            timeouts = []
+            if deadline is not None:
+                timeouts.append(deadline - now)
+            if route.hedge_after_seconds is not None and next_model < len(route.models):
+                last_launch = max(launched for _, launched, _ in pending.values())
+                timeouts.append(last_launch + route.hedge_after_seconds - now)
+            done, _ = wait(list(pending), timeout=max(0.0, min(timeouts)) if timeouts else None, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                model_id, launched, hedged = pending.pop(future)
+                seconds = time.monotonic() - launched
+                try:
+                    response = future.result()
+                    if response is None or response.content is None:
+                        raise ValueError("empty response")
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Model {model_id} failed for {stage}: {e}")
+                    self._record(sink, ModelCall(stage=stage, model=model_id, outcome="failed", seconds=seconds, hedged=hedged))
+                    continue
+                self._record(sink, ModelCall(stage=stage, model=model_id, outcome="served", seconds=seconds, hedged=hedged))
+                for other, (other_id, other_launched, other_hedged) in pending.items():
+                    self._record(
+                        sink,
+                        ModelCall(
+                            stage=stage,
+                            model=other_id,
+                            outcome="abandoned",
+                            seconds=time.monotonic() - other_launched,
+                            hedged=other_hedged,
+                        ),
+                    )
+                response.model = model_id
+                return response
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                for model_id, launched, hedged in pending.values():
+                    self._record(sink, ModelCall(stage=stage, model=model_id, outcome="timeout", seconds=now - launched, hedged=hedged))
+                raise StageBudgetExceeded(f"{stage} exceeded its {route.budget_seconds}s budget")
+            if next_model < len(route.models):
+                failed_over = not pending
+                slow = (
+                    route.hedge_after_seconds is not None
+                    and now - max(launched for _, launched, _ in pending.values()) >= route.hedge_after_seconds
+                ) if pending else False
+                if failed_over or slow:
+                    record("fallbacks" if failed_over else "hedges")
+                    launch()
+
+        raise last_error if last_error is not None else RuntimeError(f"No model answered for {stage}")
+
+
+@functools.lru_cache(maxsize=None)
+def default_router() -> Optional[ModelRouter]:
+    """The process-wide router configured by PM_MODEL_ROUTES, shared so its threads are too"""
+    return ModelRouter.from_env()
+
+
+def run_agent(router: Optional[ModelRouter], stage: str, agent: Agent, message: str, sink: Optional[List[ModelCall]] = None) -> RunResponse:
+    """Run an agent through `router` if there is one, else on its own model"""
+    if router is None:
+        return agent.run(message)
+    return router.run(stage, agent, message, sink)
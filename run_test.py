@@ -6,17 +6,14 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-# Get DB_URL and modify protocol if needed
-db_url = os.getenv("DB_URL", "").replace("postgresql+psycopg://", "postgresql://")
-print(f"Using DB_URL: {db_url}")
-
 # Add the current directory to Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
 # Import the simplified workflow
+from routing import default_router
 from simple_workflow import SimpleProductManagerWorkflow
-from phi.storage.workflow.postgres import PgWorkflowStorage
+from storage import workflow_storage
 
 # Sample meeting notes
 SAMPLE_MEETING_NOTES = '''
@@ -57,10 +54,8 @@ def test_workflow():
     # Initialize workflow
     workflow = SimpleProductManagerWorkflow(
         session_id="test-session",
-        storage=PgWorkflowStorage(
-            table_name="workflow_sessions",
-            db_url=os.getenv("DB_URL")
-        ),
+        storage=workflow_storage("workflow_sessions"),
+        model_router=default_router(),
     )
     
     # Run the workflow
@@ -5,6 +5,8 @@ from phi.workflow.workflow import Workflow
 from phi.agent.agent import Agent
 from phi.run.response import RunResponse
 
+from routing import ModelCall, ModelRouter, run_agent
+
 # Reuse the models from the main workflow
 class TaskPriority(BaseModel):
     level: Literal["Low", "Medium", "High", "Critical"]
@@ -42,12 +44,19 @@ class SimpleProductManagerWorkflow(Workflow):
         ],
         response_model=TaskList,
     )
+    # Routes the agent to its configured models; see routing.py
+    model_router: Optional[ModelRouter] = None
+    model_calls: List[ModelCall] = Field(default_factory=list)
 
     def run(self, meeting_notes: str, team_capacity: Dict[str, int]) -> RunResponse:
         """Run the simplified workflow to generate tasks from meeting notes"""
         try:
             # Process meeting notes and generate tasks
-            response = self.task_agent.run(
+            self.model_calls = []
+            response = run_agent(
+                self.model_router,
+                "task_agent",
+                self.task_agent,
                 f"""
                 Meeting Notes:
                 {meeting_notes}
@@ -57,7 +66,8 @@ class SimpleProductManagerWorkflow(Workflow):
                 
                 Please analyze the meeting notes and generate tasks based on the updates and next steps.
                 Consider team capacity when assigning and estimating tasks.
-                """
+                """,
+                self.model_calls,
             )
             
             if response and response.content:
@@ -0,0 +1,232 @@
+import os
+import copy
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import Engine, make_url
+    from sqlalchemy.inspection import inspect
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+except ImportError:
+    raise ImportError("`sqlalchemy` not installed. Please install it with `pip install sqlalchemy`")
+
+from phi.workflow import WorkflowSession, WorkflowStorage
+from phi.storage.workflow.sqlite import SqlWorkflowStorage
+from phi.utils.log import logger
+
+DEFAULT_DB_URL = "postgresql+psycopg://ai:ai@localhost:5532/ai"
+
+# Pool settings for the shared engine, overridable per process through the environment
+DEFAULT_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DEFAULT_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DEFAULT_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+_lock = threading.Lock()
+_engines: Dict[str, Engine] = {}
+_storages: Dict[Tuple[str, str, Optional[str], Optional[str]], WorkflowStorage] = {}
+
+
+class SharedConnectionPool(StaticPool):
+    """StaticPool lending its one connection to one thread at a time
+
+    An in-memory SQLite database lives in a single connection, which sqlite3 does not let two
+    threads use at once.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._borrowed = threading.RLock()
+
+    def _do_get(self):
+        self._borrowed.acquire()
+        return super()._do_get()
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        self._borrowed.release()
+
+
+def normalize_db_url(db_url: str) -> str:
+    """Give a bare postgres:// or postgresql:// URL an installed driver (psycopg 3, else psycopg2)"""
+    url = make_url(db_url)
+    if url.drivername in ("postgres", "postgresql"):
+        try:
+            import psycopg  # noqa: F401
+
+            url = url.set(drivername="postgresql+psycopg")
+        except ImportError:
+            url = url.set(drivername="postgresql+psycopg2")
+    return url.render_as_string(hide_password=False)
+
+
+def get_engine(
+    db_url: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    pool_pre_ping: bool = True,
+    pool_recycle: Optional[int] = None,
+) -> Engine:
+    """The process-wide engine for a database, created with a bounded, pre-pinged pool on first use
+
+    Every storage and task store built through this module shares it, so a batch of concurrent
+    workflows holds at most pool_size + max_overflow connections per database. Pool settings only
+    apply to the call that creates the engine.
+    """
+    db_url = normalize_db_url(db_url or os.getenv("DB_URL") or DEFAULT_DB_URL)
+    with _lock:
+        engine = _engines.get(db_url)
+        if engine is None:
+            if db_url in ("sqlite://", "sqlite:///:memory:"):
+                # One connection shared by all threads, so they all see the same in-memory database
+                engine = create_engine(db_url, poolclass=SharedConnectionPool, connect_args={"check_same_thread": False})
+            elif db_url.startswith("sqlite"):
+                engine = create_engine(db_url, connect_args={"check_same_thread": False}, pool_pre_ping=pool_pre_ping)
+            else:
+                engine = create_engine(
+                    db_url,
+                    pool_size=DEFAULT_POOL_SIZE if pool_size is None else pool_size,
+                    max_overflow=DEFAULT_MAX_OVERFLOW if max_overflow is None else max_overflow,
+                    pool_pre_ping=pool_pre_ping,
+                    pool_recycle=DEFAULT_POOL_RECYCLE if pool_recycle is None else pool_recycle,
+                )
+            _engines[db_url] = engine
+            logger.debug(f"Created shared engine for {make_url(db_url).render_as_string(hide_password=True)}")
+        return engine
+
+
+def dispose_engines() -> None:
+    """Close every pooled connection, e.g. after forking worker processes"""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        # In-memory stores hold no connections, and dropping them would lose their sessions
+        for key in [key for key in _storages if key[0] != "memory"]:
+            del _storages[key]
+
+
+class MemoryWorkflowStorage(WorkflowStorage):
+    """Workflow storage in a dict, for tests and benchmarks
+
+    Sessions are copied on the way in and out, so callers never share state with the store, the
+    same as with a database.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, WorkflowSession] = {}
+        self._lock = threading.Lock()
+
+    def create(self) -> None:
+        pass
+
+    def read(self, session_id: str, user_id: Optional[str] = None) -> Optional[WorkflowSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or (user_id and session.user_id != user_id):
+                return None
+            return session.model_copy(deep=True)
+
+    def _matching(self, user_id: Optional[str], workflow_id: Optional[str]) -> List[WorkflowSession]:
+        sessions = [
+            session
+            for session in self._sessions.values()
+            if (not user_id or session.user_id == user_id) and (workflow_id is None or session.workflow_id == workflow_id)
+        ]
+        return sorted(sessions, key=lambda session: session.created_at or 0, reverse=True)
+
+    def get_all_session_ids(self, user_id: Optional[str] = None, workflow_id: Optional[str] = None) -> List[str]:
+        with self._lock:
+            return [session.session_id for session in self._matching(user_id, workflow_id)]
+
+    def get_all_sessions(
+        self, user_id: Optional[str] = None, workflow_id: Optional[str] = None
+    ) -> List[WorkflowSession]:
+        with self._lock:
+            return [session.model_copy(deep=True) for session in self._matching(user_id, workflow_id)]
+
+    def upsert(self, session: WorkflowSession) -> Optional[WorkflowSession]:
+        now = int(time.time())
+        with self._lock:
+            existing = self._sessions.get(session.session_id)
+            stored = session.model_copy(deep=True)
+            stored.created_at = existing.created_at if existing is not None else now
+            stored.updated_at = now if existing is not None else None
+            self._sessions[session.session_id] = stored
+            return stored.model_copy(deep=True)
+
+    def delete_session(self, session_id: Optional[str] = None):
+        if session_id is None:
+            logger.warning("No session_id provided for deletion.")
+            return
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def drop(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+    def upgrade_schema(self) -> None:
+        pass
+
+    def __deepcopy__(self, memo):
+        # Copies of a workflow keep writing to the same store, as they would to a database
+        return self
+
+
+class SqliteWorkflowStorage(SqlWorkflowStorage):
+    """phi's SQLite workflow storage, but on a file or a shared in-memory database
+
+    phi's class ignores a given db_engine, and its in-memory default gives every thread its own
+    empty database; this one always uses the shared engine from `get_engine`.
+    """
+
+    def __init__(self, table_name: str, db_file: Optional[str] = None, db_engine: Optional[Engine] = None):
+        if db_engine is None:
+            db_engine = get_engine(f"sqlite:///{os.path.abspath(db_file)}" if db_file else "sqlite://")
+        super().__init__(table_name=table_name, db_engine=db_engine)
+        self.db_engine = db_engine
+        self.inspector = inspect(db_engine)
+        self.Session = sessionmaker(bind=db_engine)
+
+    def __deepcopy__(self, memo):
+        copied = copy.copy(self)
+        memo[id(self)] = copied
+        return copied
+
+
+def workflow_storage(
+    table_name: str,
+    backend: Optional[str] = None,
+    db_url: Optional[str] = None,
+    schema: Optional[str] = "ai",
+) -> WorkflowStorage:
+    """Workflow storage for `table_name` on the configured backend, shared by every caller in the process
+
+    `backend` is "postgres", "sqlite" or "memory", defaulting to the PM_STORAGE environment variable
+    and then to Postgres at DB_URL. For SQLite, `db_url` may name a file (sqlite:///path).
+    """
+    backend = (backend or os.getenv("PM_STORAGE") or "postgres").lower()
+    if backend not in ("postgres", "sqlite", "memory"):
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    if backend == "sqlite":
+        db_url = db_url or os.getenv("SQLITE_URL") or "sqlite://"
+    db_url = None if backend == "memory" else normalize_db_url(db_url or os.getenv("DB_URL") or DEFAULT_DB_URL)
+    key = (backend, table_name, schema if backend == "postgres" else None, db_url)
+    with _lock:
+        storage = _storages.get(key)
+    if storage is None:
+        if backend == "memory":
+            storage = MemoryWorkflowStorage()
+        elif backend == "sqlite":
+            storage = SqliteWorkflowStorage(table_name, db_engine=get_engine(db_url))
+        else:
+            from phi.storage.workflow.postgres import PgWorkflowStorage
+
+            storage = PgWorkflowStorage(table_name=table_name, schema=schema, db_engine=get_engine(db_url))
+        with _lock:
+            storage = _storages.setdefault(key, storage)
+    return storage
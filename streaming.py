@@ -0,0 +1,157 @@
+import re
+import functools
+from typing import Any, Iterable, Iterator, List, Optional, Type, TypeVar
+from pydantic import BaseModel, TypeAdapter
+
+from phi.agent.agent import Agent
+from phi.memory.agent import AgentMemory
+from phi.run.response import RunResponse
+from phi.utils.log import logger
+
+ItemT = TypeVar("ItemT", bound=BaseModel)
+
+
+@functools.lru_cache(maxsize=None)
+def type_adapter(annotation: Any) -> TypeAdapter:
+    """Cached TypeAdapter for `annotation`, so its validator is only built once per process"""
+    return TypeAdapter(annotation)
+
+
+class JsonArrayItemScanner:
+    """Incrementally cut the objects of one array field out of a streamed JSON document
+
+    Feed it chunks of model output as they arrive; every object in the `key` array is returned
+    as raw JSON text as soon as its closing brace is seen. Only the text of the object being read
+    is kept, so memory does not grow with the length of the output.
+    """
+
+    def __init__(self, key: str):
+        self._start = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        # Text kept before the array starts, enough to hold the key split across chunks
+        self._lookbehind = len(key) + 64
+        self._buffer = ""
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item: List[str] = []
+
+    @property
+    def found(self) -> bool:
+        return self._in_array or self._done
+
+    def feed(self, chunk: str) -> List[str]:
+        items: List[str] = []
+        if self._done:
+            return items
+        if not self._in_array:
+            self._buffer += chunk
+            match = self._start.search(self._buffer)
+            if match is None:
+                self._buffer = self._buffer[-self._lookbehind:]
+                return items
+            chunk = self._buffer[match.end():]
+            self._buffer = ""
+            self._in_array = True
+
+        for char in chunk:
+            if self._depth > 0:
+                self._item.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._item = [char]
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # The closing bracket of the array itself
+                    self._done = True
+                    self._in_array = False
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    items.append("".join(self._item))
+                    self._item = []
+        return items
+
+
+def streaming_copy(agent: Agent) -> Agent:
+    """Copy of a structured-output agent, with its own memory, that streams its JSON as plain text"""
+    return agent.model_copy(
+        update={
+            "response_model": None,
+            "additional_context": agent.get_json_output_prompt(),
+            "memory": AgentMemory(),
+        }
+    )
+
+
+def _strip_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text
+
+
+def parse_items(
+    chunks: Iterable[str],
+    key: str,
+    item_type: Type[ItemT],
+    response_model: Optional[Type[BaseModel]] = None,
+) -> Iterator[ItemT]:
+    """Yield each validated item of the `key` array in a JSON document arriving as `chunks`
+
+    Items are validated with a cached TypeAdapter as soon as their object closes; invalid ones are
+    logged and skipped. The chunks are only kept until the array starts, so that a document
+    without one can still be validated whole against `response_model` at the end.
+    """
+    scanner = JsonArrayItemScanner(key)
+    adapter = type_adapter(item_type)
+    head: Optional[List[str]] = []
+    for chunk in chunks:
+        if head is not None:
+            head.append(chunk)
+        for raw in scanner.feed(chunk):
+            try:
+                yield adapter.validate_json(raw)
+            except Exception as e:
+                logger.warning(f"Skipping invalid {item_type.__name__} in stream: {e}")
+        if scanner.found:
+            head = None
+
+    if head is not None and response_model is not None:
+        parsed = type_adapter(response_model).validate_json(_strip_fences("".join(head)))
+        yield from getattr(parsed, key)
+
+
+def _text_chunks(responses: Iterable[Any]) -> Iterator[str]:
+    for response in responses:
+        chunk = response.content if isinstance(response, RunResponse) else response
+        if isinstance(chunk, str):
+            yield chunk
+
+
+def stream_items(
+    agent: Agent,
+    message: Any,
+    key: str,
+    item_model: Type[ItemT],
+    response_model: Optional[Type[BaseModel]] = None,
+) -> Iterator[ItemT]:
+    """Run `agent` streaming and yield each validated item of its `key` array as soon as it closes
+
+    If the output never contains a recognisable array (for example the model answered without
+    streaming), the whole output is validated against `response_model` at the end instead.
+    """
+    responses = streaming_copy(agent).run(message, stream=True)
+    yield from parse_items(_text_chunks(responses), key, item_model, response_model)
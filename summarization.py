@@ -0,0 +1,184 @@
+import re
+from collections import Counter
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
+
+from dependencies import task_key
+from workload import PRIORITY_RANK
+
+if TYPE_CHECKING:
+    from workflow import MeetingSummary, Task
+
+# Transcripts longer than this are summarized in chunks of at most this many characters
+DEFAULT_CHUNK_CHARS = 12000
+
+# "Sarah:", "Mike Chen:", "[00:12:03] Sarah:", "- **Emma**:"
+_SPEAKER = re.compile(r"^\s*(?:\[?\d{1,2}:\d{2}(?::\d{2})?\]?\s*)?(?:[-*]\s+)?\**[A-Z][\w.'-]*(?: [A-Z][\w.'-]*){0,3}\**\s*:")
+# Markdown headings, "Action Items:" on a line of its own, and horizontal rules
+_SECTION = re.compile(r"^\s*(?:#{1,6}\s+\S|[A-Z][A-Za-z0-9 /&()-]{2,60}:\s*$|-{3,}\s*$|={3,}\s*$)")
+# Header fields that look like speaker turns
+_METADATA = re.compile(r"^\s*(?:date|time|attendees|participants|present|location|duration|facilitator|agenda|meeting|title)\b[^:]{0,20}:", re.I)
+
+
+def _segments(notes: str) -> List[Tuple[bool, str]]:
+    """Split notes at speaker turns and section headings; each segment is (starts a section, text)"""
+    segments: List[Tuple[bool, str]] = []
+    current: List[str] = []
+    section = False
+    headings_only = True
+    for line in notes.replace("\r\n", "\n").split("\n"):
+        heading = bool(_SECTION.match(line))
+        # A heading stays attached to the turn that follows it
+        if current and (heading or _SPEAKER.match(line)) and not headings_only:
+            segments.append((section, "\n".join(current)))
+            current = []
+        if not current:
+            section = heading
+            headings_only = True
+        current.append(line)
+        headings_only = headings_only and (heading or not line.strip())
+    if current and "\n".join(current).strip():
+        segments.append((section, "\n".join(current)))
+    return segments
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Split a segment longer than `max_chars` at line breaks, or at spaces within a very long line"""
+    if len(text) <= max_chars:
+        return [text]
+    pieces: List[str] = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > max_chars:
+            cut = line.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:cut])
+            line = line[cut:].lstrip()
+        if current and len(current) + 1 + len(line) > max_chars:
+            pieces.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_transcript(notes: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    """Split meeting notes into chunks of at most `max_chars`, only at speaker turns and headings
+
+    Segments are packed greedily in order. A new section starts a new chunk once the current chunk
+    is half full, so chunks tend to follow the agenda. Only a single turn longer than `max_chars`
+    is split mid-turn.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for section, text in _segments(notes):
+        for piece in _split_long(text, max_chars):
+            if current and (size + len(piece) > max_chars or (section and size >= max_chars // 2)):
+                chunks.append("\n".join(current).strip("\n"))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+            section = False
+    if current:
+        chunks.append("\n".join(current).strip("\n"))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def transcript_preamble(notes: str, max_chars: int = 1000) -> str:
+    """Lines before the first speaker turn or section, such as the title, date and attendee list"""
+    lines: List[str] = []
+    for line in notes.strip().split("\n"):
+        if _METADATA.match(line):
+            pass
+        elif _SECTION.match(line):
+            if lines:
+                break
+        elif _SPEAKER.match(line):
+            break
+        lines.append(line)
+    return "\n".join(lines)[:max_chars].strip()
+
+
+def _text_key(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+def _unique(values: Iterable[str]) -> List[str]:
+    """Values in first-seen order, dropping repeats that differ only in case, spacing or punctuation"""
+    seen = set()
+    unique = []
+    for value in values:
+        key = _text_key(value)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(value.strip())
+    return unique
+
+
+def _most_common(values: Sequence[Optional[str]]) -> Optional[str]:
+    """Most frequent non-empty value, ties going to the one seen first"""
+    present = [value for value in values if value]
+    if not present:
+        return None
+    counts = Counter(present)
+    return max(present, key=lambda value: (counts[value], -present.index(value)))
+
+
+def _merge_task(task: "Task", other: "Task") -> "Task":
+    """Fill in what `task` is missing from a repeat of it, keeping the higher priority"""
+    update = {}
+    for field in ("task_description", "task_assignee", "deadline"):
+        if getattr(task, field) is None and getattr(other, field) is not None:
+            update[field] = getattr(other, field)
+    if PRIORITY_RANK.get(other.priority.level, 4) < PRIORITY_RANK.get(task.priority.level, 4):
+        update["priority"] = other.priority
+    for field in ("tags", "required_skills"):
+        update[field] = _unique([*getattr(task, field), *getattr(other, field)])
+    known = {dependency.task_id for dependency in task.dependencies}
+    update["dependencies"] = task.dependencies + [d for d in other.dependencies if d.task_id not in known]
+    return task.model_copy(update=update)
+
+
+def merge_summaries(partials: Sequence["MeetingSummary"]) -> "MeetingSummary":
+    """Merge the summaries of consecutive transcript chunks into one, independent of run timing
+
+    Lists are concatenated in chunk order with repeats dropped; action items are matched by title.
+    The date comes from the first chunk, which sees the transcript header, and the duration is the
+    longest any chunk reported.
+    """
+    if not partials:
+        raise ValueError("No summaries to merge")
+    first = partials[0]
+
+    action_items = {}
+    for summary in partials:
+        for task in summary.action_items:
+            key = task_key(task.task_title)
+            action_items[key] = _merge_task(action_items[key], task) if key in action_items else task
+
+    contexts = [summary.context for summary in partials]
+    context = first.context.model_copy(
+        update={
+            "project_phase": _most_common([c.project_phase for c in contexts]),
+            "recurring_topics": _unique(t for c in contexts for t in c.recurring_topics),
+            "blockers": _unique(b for c in contexts for b in c.blockers),
+            "follow_ups": _unique(f for c in contexts for f in c.follow_ups),
+        }
+    )
+    durations = [summary.duration_minutes for summary in partials if summary.duration_minutes]
+    return first.model_copy(
+        update={
+            "attendees": _unique(a for summary in partials for a in summary.attendees),
+            "key_points": _unique(p for summary in partials for p in summary.key_points),
+            "decisions": _unique(d for summary in partials for d in summary.decisions),
+            "action_items": list(action_items.values()),
+            "context": context,
+            "duration_minutes": max(durations) if durations else None,
+            "meeting_type": _most_common([summary.meeting_type for summary in partials]),
+        }
+    )
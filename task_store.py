@@ -0,0 +1,393 @@
+import json
+import hashlib
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+from pydantic import BaseModel, Field
+
+from phi.utils.log import logger
+
+try:
+    from sqlalchemy import (
+        Column,
+        DateTime,
+        Float,
+        Index,
+        Integer,
+        MetaData,
+        String,
+        Table,
+        Text,
+        case,
+        create_engine,
+        delete,
+        select,
+        tuple_,
+        update,
+    )
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.types import JSON
+except ImportError:
+    raise ImportError("`sqlalchemy` not installed. Please install it with `pip install sqlalchemy`")
+
+from dependencies import task_key
+
+if TYPE_CHECKING:
+    from github_client import GithubIssueResult
+    from workflow import MeetingSummary, Task
+
+# Task statuses that count as closed in open-task queries
+CLOSED_STATUSES = ("Done",)
+
+
+class StoredTask(BaseModel):
+    session_id: str = Field(..., description="Workflow session the task belongs to")
+    task_key: str = Field(..., description="Identifier of the task within the session, derived from its title")
+    title: str = Field(..., description="The title of the task")
+    description: Optional[str] = Field(None, description="The description of the task")
+    assignee: Optional[str] = Field(None, description="The assignee of the task")
+    status: str = Field(..., description="Current status of the task")
+    priority: str = Field(..., description="Priority level of the task")
+    deadline: Optional[datetime] = Field(None, description="Deadline for the task")
+    complexity: Optional[str] = Field(None, description="Task complexity")
+    minimum_hours: Optional[float] = Field(None, description="Minimum estimated hours")
+    maximum_hours: Optional[float] = Field(None, description="Maximum estimated hours")
+    meeting_id: Optional[str] = Field(None, description="Meeting the task was last discussed in")
+    tags: List[str] = Field(default_factory=list, description="Tags of the task")
+    depends_on: List[str] = Field(default_factory=list, description="Keys of the tasks this task depends on")
+    issue_links: Dict[str, str] = Field(default_factory=dict, description="Issue links by provider (linear, github)")
+
+
+class StoreDelta(BaseModel):
+    tasks_written: int = Field(0, description="Tasks inserted or updated")
+    tasks_unchanged: int = Field(0, description="Tasks skipped because they were already stored as is")
+    links_written: int = Field(0, description="Issue links inserted or updated")
+
+
+def _tables(metadata: MetaData, prefix: str) -> Dict[str, Table]:
+    meetings = Table(
+        f"{prefix}meetings",
+        metadata,
+        Column("meeting_id", String(64), primary_key=True),
+        Column("session_id", String(255), nullable=False),
+        Column("date", DateTime),
+        Column("meeting_type", String(100)),
+        Column("duration_minutes", Integer),
+        Column("project_phase", String(255)),
+        Column("attendees", JSON),
+        Column("key_points", JSON),
+        Column("decisions", JSON),
+        Column("blockers", JSON),
+        Column("updated_at", DateTime, nullable=False),
+        Index(f"ix_{prefix}meetings_session_date", "session_id", "date"),
+    )
+    tasks = Table(
+        f"{prefix}tasks",
+        metadata,
+        Column("session_id", String(255), primary_key=True),
+        Column("task_key", String(255), primary_key=True),
+        Column("title", Text, nullable=False),
+        Column("description", Text),
+        Column("assignee", String(255)),
+        Column("status", String(32), nullable=False),
+        Column("priority", String(16), nullable=False),
+        Column("deadline", DateTime),
+        Column("complexity", String(16)),
+        Column("minimum_hours", Float),
+        Column("maximum_hours", Float),
+        Column("meeting_id", String(64)),
+        Column("content_hash", String(40), nullable=False),
+        Column("updated_at", DateTime, nullable=False),
+        Index(f"ix_{prefix}tasks_assignee_status", "assignee", "status"),
+        Index(f"ix_{prefix}tasks_status", "status"),
+        Index(f"ix_{prefix}tasks_deadline", "deadline"),
+        Index(f"ix_{prefix}tasks_meeting", "meeting_id"),
+    )
+    tags = Table(
+        f"{prefix}task_tags",
+        metadata,
+        Column("session_id", String(255), primary_key=True),
+        Column("task_key", String(255), primary_key=True),
+        Column("tag", String(255), primary_key=True),
+        Index(f"ix_{prefix}task_tags_tag", "tag"),
+    )
+    dependencies = Table(
+        f"{prefix}task_dependencies",
+        metadata,
+        Column("session_id", String(255), primary_key=True),
+        Column("task_key", String(255), primary_key=True),
+        Column("depends_on", String(255), primary_key=True),
+        Column("dependency_type", String(32), nullable=False),
+        Column("impact_level", String(16), nullable=False),
+        Index(f"ix_{prefix}task_dependencies_depends_on", "session_id", "depends_on"),
+    )
+    issue_links = Table(
+        f"{prefix}issue_links",
+        metadata,
+        Column("session_id", String(255), primary_key=True),
+        Column("task_key", String(255), primary_key=True),
+        Column("provider", String(16), primary_key=True),
+        Column("url", Text, nullable=False),
+        Column("updated_at", DateTime, nullable=False),
+    )
+    return {
+        "meetings": meetings,
+        "tasks": tasks,
+        "tags": tags,
+        "dependencies": dependencies,
+        "issue_links": issue_links,
+    }
+
+
+def _task_rows(
+    session_id: str, meeting_id: str, task: "Task", now: datetime
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    key = task_key(task.task_title)
+    row = {
+        "session_id": session_id,
+        "task_key": key,
+        "title": task.task_title,
+        "description": task.task_description,
+        "assignee": task.task_assignee,
+        "status": task.status,
+        "priority": task.priority.level,
+        "deadline": task.deadline,
+        "complexity": task.complexity,
+        "minimum_hours": task.time_estimate.minimum_hours,
+        "maximum_hours": task.time_estimate.maximum_hours,
+        "meeting_id": meeting_id,
+    }
+    tags = [{"session_id": session_id, "task_key": key, "tag": tag} for tag in sorted(set(task.tags))]
+    dependencies = {}
+    for dependency in task.dependencies:
+        dependencies[task_key(dependency.task_id)] = {
+            "session_id": session_id,
+            "task_key": key,
+            "depends_on": task_key(dependency.task_id),
+            "dependency_type": dependency.dependency_type,
+            "impact_level": dependency.impact_level,
+        }
+    material = json.dumps([row, tags, sorted(dependencies.items())], sort_keys=True, default=str)
+    row["content_hash"] = hashlib.sha1(material.encode("utf-8")).hexdigest()
+    row["updated_at"] = now
+    return row, tags, list(dependencies.values())
+
+
+class TaskStore:
+    """Normalized, indexed store of meetings, tasks, dependencies and issue links
+
+    Runs are written as upserts batched with executemany. Task content hashes are compared in the
+    upsert itself, so a run only rewrites the tasks that changed, together with their tags and
+    dependencies, even with several writers. Works on Postgres and, for tests and local use, SQLite.
+    """
+
+    def __init__(
+        self,
+        db_url: Optional[str] = None,
+        db_engine: Optional[Engine] = None,
+        schema: Optional[str] = None,
+        table_prefix: str = "pm_",
+        create_tables: bool = True,
+    ):
+        if db_engine is None and db_url is None:
+            raise ValueError("Must provide either db_url or db_engine")
+        self.engine: Engine = db_engine if db_engine is not None else create_engine(db_url)
+        if self.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif self.engine.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise ValueError(f"Unsupported database: {self.engine.dialect.name}")
+        self._insert = insert
+
+        self.metadata = MetaData(schema=schema)
+        tables = _tables(self.metadata, table_prefix)
+        self.meetings = tables["meetings"]
+        self.tasks = tables["tasks"]
+        self.tags = tables["tags"]
+        self.dependencies = tables["dependencies"]
+        self.issue_links = tables["issue_links"]
+        if create_tables:
+            self.create()
+
+    def create(self) -> None:
+        self.metadata.create_all(self.engine)
+
+    def _upsert(
+        self, connection, table: Table, rows: List[Dict[str, Any]], changed: Optional[str] = None
+    ) -> List[Tuple]:
+        """Insert or update `rows`; with `changed`, existing rows are only updated when that column differs
+        and the primary keys of the rows actually written are returned"""
+        if not rows:
+            return []
+        statement = self._insert(table)
+        keys = [column.name for column in table.primary_key.columns]
+        updates = {name: statement.excluded[name] for name in rows[0] if name not in keys}
+        if table is self.tasks:
+            # Regenerated tasks come back "Not Started"; keep the status set since then
+            updates["status"] = case(
+                (statement.excluded.status == "Not Started", table.c.status), else_=statement.excluded.status
+            )
+        if updates:
+            where = table.c[changed] != statement.excluded[changed] if changed else None
+            statement = statement.on_conflict_do_update(index_elements=keys, set_=updates, where=where)
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=keys)
+        if changed is None:
+            connection.execute(statement, rows)
+            return []
+        return [tuple(row) for row in connection.execute(statement.returning(*table.primary_key.columns), rows)]
+
+    def save_run(
+        self,
+        session_id: str,
+        meeting_id: str,
+        meeting_summary: Optional["MeetingSummary"],
+        tasks: Sequence["Task"],
+        linear_urls: Optional[Dict[str, str]] = None,
+        github_issues: Sequence["GithubIssueResult"] = (),
+    ) -> StoreDelta:
+        """Upsert a run's meeting, tasks and issue links, skipping tasks stored unchanged
+
+        `linear_urls` maps task titles to their Linear issues.
+        """
+        now = datetime.now()
+        delta = StoreDelta()
+        links = {(task_key(title), "linear"): url for title, url in (linear_urls or {}).items() if url}
+        links.update({(task_key(issue.task_title), "github"): issue.url for issue in github_issues})
+
+        with self.engine.begin() as connection:
+            if meeting_summary is not None:
+                self._upsert(
+                    connection,
+                    self.meetings,
+                    [
+                        {
+                            "meeting_id": meeting_id,
+                            "session_id": session_id,
+                            "date": meeting_summary.date,
+                            "meeting_type": meeting_summary.meeting_type,
+                            "duration_minutes": meeting_summary.duration_minutes,
+                            "project_phase": meeting_summary.context.project_phase,
+                            "attendees": meeting_summary.attendees,
+                            "key_points": meeting_summary.key_points,
+                            "decisions": meeting_summary.decisions,
+                            "blockers": meeting_summary.context.blockers,
+                            "updated_at": now,
+                        }
+                    ],
+                )
+
+            task_rows: Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]] = {}
+            for task in tasks:
+                rows = _task_rows(session_id, meeting_id, task, now)
+                task_rows.setdefault(rows[0]["task_key"], rows)
+
+            # Tasks stored with the same content hash are left alone, whoever wrote them
+            changed = self._upsert(connection, self.tasks, [rows[0] for rows in task_rows.values()], changed="content_hash")
+            if changed:
+                for table in (self.tags, self.dependencies):
+                    for start in range(0, len(changed), 500):
+                        batch = changed[start : start + 500]
+                        connection.execute(delete(table).where(tuple_(table.c.session_id, table.c.task_key).in_(batch)))
+                self._upsert(connection, self.tags, [tag for _, key in changed for tag in task_rows[key][1]])
+                self._upsert(connection, self.dependencies, [dep for _, key in changed for dep in task_rows[key][2]])
+            delta.tasks_written = len(changed)
+            delta.tasks_unchanged = len(tasks) - len(changed)
+
+            link_rows = [
+                {"session_id": session_id, "task_key": key, "provider": provider, "url": url, "updated_at": now}
+                for (key, provider), url in links.items()
+            ]
+            delta.links_written = len(self._upsert(connection, self.issue_links, link_rows, changed="url"))
+
+        logger.debug(f"Task store: {delta.tasks_written} tasks written, {delta.tasks_unchanged} unchanged")
+        return delta
+
+    def set_status(self, session_id: str, title: str, status: str) -> bool:
+        """Update the status of a stored task; False if there is no such task
+
+        Later runs that regenerate the task as "Not Started" keep this status.
+        """
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                update(self.tasks)
+                .where(self.tasks.c.session_id == session_id, self.tasks.c.task_key == task_key(title))
+                .values(status=status, updated_at=datetime.now())
+            )
+        return result.rowcount > 0
+
+    def _query(self, *conditions, order_by=None) -> List[StoredTask]:
+        statement = select(self.tasks).where(*conditions)
+        statement = statement.order_by(*(order_by or (self.tasks.c.deadline, self.tasks.c.task_key)))
+        with self.engine.connect() as connection:
+            rows = [dict(row._mapping) for row in connection.execute(statement)]
+            if not rows:
+                return []
+            keys = [(row["session_id"], row["task_key"]) for row in rows]
+            tags: Dict[Tuple[str, str], List[str]] = {}
+            for session_id, key, tag in connection.execute(
+                select(self.tags.c.session_id, self.tags.c.task_key, self.tags.c.tag)
+                .where(tuple_(self.tags.c.session_id, self.tags.c.task_key).in_(keys))
+                .order_by(self.tags.c.tag)
+            ):
+                tags.setdefault((session_id, key), []).append(tag)
+            depends_on: Dict[Tuple[str, str], List[str]] = {}
+            for session_id, key, other in connection.execute(
+                select(self.dependencies.c.session_id, self.dependencies.c.task_key, self.dependencies.c.depends_on)
+                .where(tuple_(self.dependencies.c.session_id, self.dependencies.c.task_key).in_(keys))
+                .order_by(self.dependencies.c.depends_on)
+            ):
+                depends_on.setdefault((session_id, key), []).append(other)
+            links: Dict[Tuple[str, str], Dict[str, str]] = {}
+            for session_id, key, provider, url in connection.execute(
+                select(
+                    self.issue_links.c.session_id, self.issue_links.c.task_key, self.issue_links.c.provider, self.issue_links.c.url
+                ).where(tuple_(self.issue_links.c.session_id, self.issue_links.c.task_key).in_(keys))
+            ):
+                links.setdefault((session_id, key), {})[provider] = url
+        return [
+            StoredTask(
+                **{name: value for name, value in row.items() if name in StoredTask.model_fields},
+                tags=tags.get(key, []),
+                depends_on=depends_on.get(key, []),
+                issue_links=links.get(key, {}),
+            )
+            for row, key in zip(rows, keys)
+        ]
+
+    def _session(self, session_id: Optional[str]) -> list:
+        return [self.tasks.c.session_id == session_id] if session_id is not None else []
+
+    def session_tasks(self, session_id: str) -> List[StoredTask]:
+        """Every task of a session"""
+        return self._query(self.tasks.c.session_id == session_id)
+
+    def open_tasks(self, assignee: str, session_id: Optional[str] = None) -> List[StoredTask]:
+        """Tasks of an assignee that are not done, soonest deadline first"""
+        return self._query(
+            self.tasks.c.assignee == assignee,
+            self.tasks.c.status.not_in(CLOSED_STATUSES),
+            *self._session(session_id),
+        )
+
+    def tasks_with_tag(self, tag: str, session_id: Optional[str] = None) -> List[StoredTask]:
+        tagged = select(self.tags.c.session_id, self.tags.c.task_key).where(self.tags.c.tag == tag)
+        return self._query(tuple_(self.tasks.c.session_id, self.tasks.c.task_key).in_(tagged), *self._session(session_id))
+
+    def tasks_due(self, before: datetime, session_id: Optional[str] = None, open_only: bool = True) -> List[StoredTask]:
+        """Tasks with a deadline before `before`"""
+        conditions = [self.tasks.c.deadline.is_not(None), self.tasks.c.deadline < before, *self._session(session_id)]
+        if open_only:
+            conditions.append(self.tasks.c.status.not_in(CLOSED_STATUSES))
+        return self._query(*conditions)
+
+    def meeting_tasks(self, meeting_id: str) -> List[StoredTask]:
+        """Tasks last discussed in a meeting"""
+        return self._query(self.tasks.c.meeting_id == meeting_id)
+
+    def dependents(self, session_id: str, title: str) -> List[StoredTask]:
+        """Tasks that depend on the given task"""
+        dependent = select(self.dependencies.c.session_id, self.dependencies.c.task_key).where(
+            self.dependencies.c.session_id == session_id, self.dependencies.c.depends_on == task_key(title)
+        )
+        return self._query(tuple_(self.tasks.c.session_id, self.tasks.c.task_key).in_(dependent))
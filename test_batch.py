@@ -0,0 +1,75 @@
+import threading
+
+from phi.run.response import RunEvent, RunResponse
+
+from batch import BatchResult, BatchStats, run_batch
+
+
+class StubWorkflow:
+    def __init__(self, event=RunEvent.workflow_completed, gate=None):
+        self.event = event
+        self.gate = gate
+        self.stage_timings = {"generate_tasks": 0.1}
+
+    def run(self, **kwargs):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        return RunResponse(event=self.event, content=kwargs["meeting_notes"])
+
+
+def test_reads_meetings_no_further_ahead_than_max_pending():
+    gate = threading.Event()
+    pulled = []
+
+    def meetings():
+        for i in range(20):
+            pulled.append(i)
+            yield {"meeting_notes": f"Meeting {i}"}
+
+    results = run_batch(meetings(), workflow_factory=lambda item: StubWorkflow(gate=gate), max_workers=2, max_pending=3)
+    # Nothing completes until the gate opens, so the batch blocks after filling its pending slots
+    first = []
+    thread = threading.Thread(target=lambda: first.append(next(results)))
+    thread.start()
+    thread.join(timeout=0.3)
+    assert len(pulled) == 3
+    gate.set()
+    thread.join(timeout=5)
+    assert len(first) + len(list(results)) == 20 and len(pulled) == 20
+
+
+def test_one_failing_meeting_does_not_stop_the_batch():
+    def factory(item):
+        if item.meeting_id == "boom":
+            raise RuntimeError("storage unavailable")
+        return StubWorkflow(event="WorkflowFailed" if item.meeting_id == "bad" else RunEvent.workflow_completed)
+
+    meetings = [
+        {"meeting_id": "ok", "meeting_notes": "Standup"},
+        {"meeting_id": "boom", "meeting_notes": "Planning"},
+        {"meeting_id": "bad", "meeting_notes": "Retro"},
+        {"meeting_id": "invalid"},
+    ]
+    stats = BatchStats()
+    results = {result.meeting_id: result for result in run_batch(meetings, workflow_factory=factory, stats=stats)}
+    assert results["ok"].status == "completed" and results["ok"].content == "Standup"
+    assert results["boom"].status == "error" and "storage unavailable" in results["boom"].error
+    assert results["bad"].status == "failed"
+    assert results["invalid"].status == "error"
+
+    summary = stats.summary()
+    assert (summary.total, summary.completed, summary.failed) == (4, 1, 3)
+    assert summary.stages["generate_tasks"].count == 2
+
+
+def test_batch_stats_percentiles():
+    stats = BatchStats()
+    for i in range(1, 101):
+        stats.record(
+            BatchResult(meeting_id=str(i), status="completed", latency_seconds=float(i), stage_seconds={"summary": i / 10})
+        )
+    summary = stats.summary()
+    assert summary.latency.count == 100 and summary.latency.mean_seconds == 50.5
+    assert summary.latency.p50_seconds in (50.0, 51.0) and summary.latency.p95_seconds in (95.0, 96.0)
+    assert summary.latency.max_seconds == 100.0 and summary.stages["summary"].max_seconds == 10.0
+    assert summary.meetings_per_minute > 0
@@ -0,0 +1,42 @@
+import pytest
+
+from bench_startup import measure_startup
+from benchmark import FakeBackends, benchmark, check_regressions
+from storage import SqliteWorkflowStorage
+from workflow import EnhancedProductManagerWorkflow
+
+
+def test_benchmark_runs_offline_and_flags_regressions():
+    storage = SqliteWorkflowStorage("benchmark_test")
+    with FakeBackends() as backends:
+        results = [
+            benchmark("enhanced", 8, 1, storage, backends, latency=0.01),
+            benchmark("simple", 8, 1, storage, backends),
+            benchmark("tweet", 3, 1, storage, backends),
+        ]
+        assert backends.linear.issues and backends.slack.messages
+
+    enhanced = results[0]
+    assert all(result.completed == result.runs for result in results)
+    assert {"get_meeting_summary", "generate_tasks", "create_linear_issues", "send_notifications"} <= set(
+        enhanced.stage_seconds
+    )
+    # Two simulated model calls are not counted as overhead
+    assert enhanced.wall_seconds - enhanced.overhead_seconds == pytest.approx(0.02)
+    assert enhanced.storage_writes >= 1 and enhanced.session_bytes > 0
+
+    assert check_regressions(results, [result.model_dump() for result in results]) == []
+    faster = [dict(result.model_dump(), overhead_seconds=result.overhead_seconds / 10 - 0.01) for result in results]
+    assert len(check_regressions(results, faster, min_slack_seconds=0.0)) == len(results)
+    assert check_regressions(results, max_overhead_ms_per_task=0.0)
+
+
+def test_import_and_agents_are_lazy():
+    # A fresh interpreter without service tokens imports the workflow without loading integrations
+    assert measure_startup(repeats=1).heavy_modules == []
+
+    workflow = EnhancedProductManagerWorkflow(session_id="lazy")
+    assert workflow.linear_agent is None and workflow.task_agent is None
+    agent = workflow.agent("task_agent")
+    assert agent is workflow.agent("task_agent") is workflow.task_agent and agent.session_id == "lazy"
+    assert workflow.linear_agent is None
@@ -0,0 +1,44 @@
+import cache
+from cache import MemoryResultCache, PgResultCache, ResultCache, cache_key, normalize_notes, notes_digest
+from phi.agent.agent import Agent
+from workflow import TaskPriority
+
+
+def test_memory_tier_evicts_least_recently_used_and_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    tier = MemoryResultCache(max_entries=2, ttl_seconds=60)
+    tier.set("a", "Stage", {"v": 1})
+    tier.set("b", "Stage", {"v": 2})
+    assert tier.get("a") == {"v": 1}
+    tier.set("c", "Stage", {"v": 3})
+    assert tier.get("b") is None and tier.get("a") == {"v": 1} and tier.get("c") == {"v": 3}
+
+    now[0] += 61
+    assert tier.get("a") is None
+    assert (tier.hits, tier.misses) == (3, 2)
+
+
+def test_hits_in_the_database_tier_are_promoted(tmp_path):
+    memory = MemoryResultCache()
+    database = PgResultCache(schema=None, db_url=f"sqlite:///{tmp_path / 'cache.db'}")
+    ResultCache([database]).set("key", TaskPriority(level="High", reason="Launch"))
+
+    tiered = ResultCache([memory, database])
+    first = tiered.get("key", TaskPriority)
+    assert first == TaskPriority(level="High", reason="Launch")
+    assert tiered.get("key", TaskPriority) == first and tiered.get("key", TaskPriority) is not first
+    assert tiered.stats() == {"MemoryResultCache": {"hits": 2, "misses": 1}, "PgResultCache": {"hits": 1, "misses": 0}}
+
+
+def test_cache_key_normalizes_notes_and_covers_instructions_and_model():
+    assert normalize_notes("Standup\r\n  Mike:   auth  \n\n\n\nEmma: UI\t") == "Standup\nMike: auth\n\nEmma: UI"
+    assert notes_digest("a  b\n") == notes_digest("a b")
+
+    agent = Agent(name="Task Agent", instructions=["Write tasks"])
+    key = cache_key(agent, {"summary": "x", "tasks": [1]})
+    assert key == cache_key(agent, {"tasks": [1], "summary": "x"})
+    assert key != cache_key(agent.model_copy(update={"instructions": ["Write fewer tasks"]}), {"summary": "x", "tasks": [1]})
+    assert key != cache_key(agent, {"summary": "y", "tasks": [1]})
+    assert key == cache_key(agent, {"summary": "x", "tasks": [1]}, model_id="gpt-4o")
+    assert key != cache_key(agent, {"summary": "x", "tasks": [1]}, model_id="gpt-4o-mini")
@@ -0,0 +1,85 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from conftest import canned_tasks
+from capacity import CapacityLedger
+from workflow import EnhancedProductManagerWorkflow
+
+MONDAY = date(2024, 1, 15)
+
+
+def task(title: str, assignee: str, hours: float, deadline: date):
+    return canned_tasks(1).tasks[0].model_copy(
+        update={
+            "task_title": title,
+            "task_assignee": assignee,
+            "deadline": datetime.combine(deadline, datetime.min.time()),
+            "time_estimate": canned_tasks(1).tasks[0].time_estimate.model_copy(update={"minimum_hours": hours, "maximum_hours": hours}),
+        }
+    )
+
+
+def test_overallocation_windows_and_what_if():
+    tasks = [
+        task("Auth service", "Mike", 30, MONDAY + timedelta(days=2)),
+        task("Rate limiting", "Mike", 20, MONDAY + timedelta(days=4)),
+        task("Dashboard", "Emma", 10, MONDAY + timedelta(days=11)),
+        task("Load tests", "James", 8, MONDAY + timedelta(days=18)),
+    ]
+    ledger = CapacityLedger.from_tasks({"Mike": 40, "Emma": 40, "James": 40}, tasks, start=MONDAY)
+
+    # Hours are spread over workdays only, up to each deadline
+    assert abs(ledger.planned.sum() - 68) < 1e-9
+    assert (ledger.planned[:, ~ledger.workday] == 0).all()
+    assert abs(ledger.planned[ledger.members.index("Mike"), 0] - (10 + 4)) < 1e-9
+
+    assert ledger.overbooked(days=21) == ["Mike"]
+    [window] = ledger.overallocations(days=21, window=5)
+    assert (window.member, window.start, window.end) == ("Mike", MONDAY, MONDAY + timedelta(days=4))
+    assert abs(window.planned_hours - 50) < 1e-9 and window.capacity_hours == 40
+    assert window.peak_utilization > 1.2
+    assert "Mike: 50.0hrs planned against 40.0hrs available" in window.alert()
+
+    # Moving a task to someone with room clears the overbooking without touching the original ledger
+    relieved = ledger.what_if({"Rate limiting": "James"})
+    assert relieved.overbooked(days=21) == [] and ledger.overbooked(days=21) == ["Mike"]
+    assert relieved.remaining()["Mike"] == ledger.remaining()["Mike"] + 20
+    # Tasks assigned to someone outside the team get a member without capacity
+    assert ledger.what_if({"Load tests": "Contractor"}).overbooked(days=21) == ["Mike", "Contractor"]
+
+    rolling = ledger.rolling_utilization(window=7)
+    assert rolling.shape == (3, ledger.days - 6) and np.isfinite(rolling).all()
+
+
+def test_questions_for_large_teams_are_answered_from_the_ledger_arrays(monkeypatch):
+    members = {f"member-{i}": 40.0 for i in range(300)}
+    tasks = canned_tasks(5000).tasks
+    names = list(members)
+    tasks = [t.model_copy(update={"task_assignee": names[i * 7 % len(names)]}) for i, t in enumerate(tasks)]
+    ledger = CapacityLedger.from_tasks(members, tasks, start=date(2024, 1, 12))
+    assert ledger.planned.shape == (300, ledger.days)
+
+    # Hours are spread in one vectorized pass per direction, never per task
+    spread = CapacityLedger._spread
+    calls = []
+
+    def counting_spread(self, members, *args):
+        calls.append(len(members))
+        spread(self, members, *args)
+
+    monkeypatch.setattr(CapacityLedger, "_spread", counting_spread)
+    overbooked = ledger.overbooked(days=21)
+    windows = ledger.overallocations(days=21)
+    assert calls == []
+    relieved = ledger.what_if({tasks[0].task_title: "member-1", tasks[1].task_title: "member-2"})
+    assert calls == [2, 2]
+    assert overbooked and {window.member for window in windows} == set(overbooked)
+    assert abs(relieved.planned.sum() - ledger.planned.sum()) < 1e-6
+
+
+def test_update_team_capacity_charges_hours():
+    workflow = EnhancedProductManagerWorkflow(session_id="capacity", team_capacity={"Mike": 40.0})
+    workflow.update_team_capacity("Mike", 8)
+    workflow.update_team_capacity("Emma", 5)
+    assert workflow.team_capacity == {"Mike": 32.0, "Emma": -5.0}
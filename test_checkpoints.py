@@ -0,0 +1,43 @@
+import pytest
+
+from conftest import TEAM, canned_responses, replay_agent
+from fake_services import FakeLinearServer
+from linear_client import LinearClient
+from storage import SqliteWorkflowStorage
+from workflow import AGENT_FACTORIES, WORKFLOW_FAILED, EnhancedProductManagerWorkflow
+from phi.run.response import RunEvent
+
+
+def test_resume_skips_completed_stages_and_reuses_issues(tmp_path, monkeypatch):
+    monkeypatch.delenv("LINEAR_PROJECT_ID", raising=False)
+    monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+    storage = SqliteWorkflowStorage("checkpoints", str(tmp_path / "sessions.db"))
+    responses = canned_responses(6)
+    capacity = {name: 40.0 for name in TEAM}
+
+    def build(linear_client):
+        agents = {name: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+        return EnhancedProductManagerWorkflow(session_id="standup", storage=storage, linear_client=linear_client, **agents)
+
+    with FakeLinearServer() as linear:
+        client = LinearClient(api_key="test", endpoint=linear.url)
+        workflow = build(client)
+        failed = workflow.run(meeting_notes="Standup", linear_users={}, team_capacity=capacity)
+        assert failed.event == WORKFLOW_FAILED and not linear.issues
+        assert set(workflow.session_state["checkpoints"][failed.run_id]["stages"]) == {"get_meeting_summary", "generate_tasks"}
+
+        # A new process picks the run up from storage and only repeats the Linear stage onwards
+        monkeypatch.setenv("LINEAR_PROJECT_ID", "project")
+        workflow = build(client)
+        resumed = workflow.resume(failed.run_id)
+        assert resumed.event == RunEvent.workflow_completed and resumed.run_id == failed.run_id
+        assert workflow.meeting_summary_agent.model.calls == 0 and workflow.task_agent.model.calls == 0
+        assert len(linear.issues) == 6
+        assert failed.run_id not in storage.read("standup").session_data["session_state"]["checkpoints"]
+        with pytest.raises(ValueError):
+            workflow.resume(failed.run_id)
+
+        # Linear issue ids are derived from the meeting, so repeating the stage creates nothing new
+        workflow._issue_scope = None
+        assert workflow.create_linear_issues(workflow.generate_tasks(workflow.get_meeting_summary("Standup")), {})
+        assert len(linear.issues) == 6
@@ -0,0 +1,113 @@
+import json
+import random
+
+from conftest import TEAM, canned_responses, canned_tasks, replay_agent
+from dedup import TaskIndex
+from fake_services import FakeLinearServer
+from linear_client import LinearClient
+from phi.run.response import RunEvent
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow, TaskPriority, TaskTimeEstimate
+from task_store import TaskStore
+
+
+def test_classifies_new_updates_and_duplicates_per_assignee():
+    index = TaskIndex()
+    task = canned_tasks(1).tasks[0].model_copy(
+        update={
+            "task_title": "Implement authentication service",
+            "task_description": "Mike will implement the authentication service with OAuth2 and JWT refresh tokens.",
+            "task_assignee": "Mike",
+        }
+    )
+    assert index.classify("s1", task).classification == "new"
+    index.add("s1", task, "https://linear.app/fake/1")
+
+    reworded = task.model_copy(
+        update={
+            "task_title": "Build the authentication service",
+            "task_description": "Mike is implementing the authentication service with OAuth2 and JWT refresh tokens.",
+        }
+    )
+    match = index.classify("s1", reworded)
+    assert (match.classification, match.matched_title, match.issue_link) == ("update", task.task_title, "https://linear.app/fake/1")
+    assert match.changes == ["description"]
+    assert index.classify("s1", task.model_copy(update={"task_assignee": " mike"})).classification == "duplicate"
+    moved = task.model_copy(update={"time_estimate": TaskTimeEstimate(minimum_hours=1, maximum_hours=2, confidence_level="Low")})
+    assert index.classify("s1", moved).changes == ["estimate"]
+    assert index.classify("s1", task.model_copy(update={"priority": TaskPriority(level="Critical")})).changes == ["priority"]
+
+    assert index.classify("s1", task.model_copy(update={"task_assignee": "Emma"})).classification == "new"
+    assert index.classify("s2", task).classification == "new"
+    unrelated = task.model_copy(update={"task_title": "Redesign dashboard charts", "task_description": "New color palette."})
+    assert index.classify("s1", unrelated).classification == "new"
+
+    index.add_tasks("s1", [reworded], matches=[match])
+    assert len(index) == 1 and index.classify("s1", reworded).issue_link == "https://linear.app/fake/1"
+
+
+def test_lookups_only_compare_tasks_sharing_a_band():
+    rng = random.Random(1)
+    index = TaskIndex()
+    tasks = canned_tasks(20_000).tasks
+    texts = [" ".join(f"term{rng.randrange(50_000)}" for _ in range(10)) for _ in tasks]
+    for task, text in zip(tasks, texts):
+        index.add("s1", task.model_copy(update={"task_title": text[:30], "task_description": text}))
+    probes = [
+        tasks[i].model_copy(update={"task_title": f"Rework {texts[i][:30]}", "task_description": texts[i]})
+        for i in range(0, len(tasks), 100)
+    ]
+    matches = index.classify_tasks("s1", probes)
+    assert [match.matched_title for match in matches] == [texts[i][:30] for i in range(0, len(tasks), 100)]
+    # Each assignee has 4000 tasks; a lookup compares a few dozen at most
+    assert index.comparisons <= 50 * len(probes)
+
+
+def test_workflow_files_only_new_tasks(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINEAR_PROJECT_ID", "project")
+    monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+    responses = canned_responses(6)
+    agents = {name: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+    store = TaskStore(db_url=f"sqlite:///{tmp_path / 'tasks.db'}")
+    workflow = EnhancedProductManagerWorkflow(session_id="standup", task_index=TaskIndex(), task_store=store, **agents)
+    capacity = {name: 40.0 for name in TEAM}
+
+    first = workflow.run(meeting_notes="Standup", linear_users={}, team_capacity=capacity)
+    assert first.event == RunEvent.workflow_completed
+    assert {match.classification for match in workflow.task_matches} == {"new"}
+    assert workflow.linear_agent.model.calls == 1
+
+    # The same standup again, in a new process that only has the task store: nothing is filed
+    workflow = EnhancedProductManagerWorkflow(session_id="standup", task_index=TaskIndex(), task_store=store, **agents)
+    second = workflow.run(meeting_notes="Standup", linear_users={}, team_capacity=capacity)
+    assert second.event == RunEvent.workflow_completed
+    assert {match.classification for match in workflow.task_matches} == {"duplicate"}
+    assert workflow.linear_agent.model.calls == 1
+    assert '"issue_link":"https://linear.app/fake/issue/ENG-1"' in second.content["linear_issues"]
+
+
+def test_workflow_updates_the_issues_of_changed_tasks(monkeypatch):
+    monkeypatch.setenv("LINEAR_PROJECT_ID", "project")
+    monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+    responses = canned_responses(6)
+    tasks = canned_tasks(6)
+    tasks.tasks[0] = tasks.tasks[0].model_copy(update={"priority": TaskPriority(level="Critical")})
+    changed = {**responses, "Task Agent": [tasks.model_dump_json()]}
+    capacity = {name: 40.0 for name in TEAM}
+    index = TaskIndex()
+
+    with FakeLinearServer() as linear:
+        for run_responses in (responses, changed):
+            agents = {name: replay_agent(factory(), run_responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+            workflow = EnhancedProductManagerWorkflow(
+                session_id="standup", task_index=index, linear_client=LinearClient(api_key="test", endpoint=linear.url), **agents
+            )
+            result = workflow.run(meeting_notes="Standup", linear_users={}, team_capacity=dict(capacity))
+            assert result.event == RunEvent.workflow_completed
+
+        matches = json.loads(result.content["task_matches"])
+        assert [(m["task_title"], m["classification"], m["changes"]) for m in matches if m["classification"] == "update"] == [
+            (tasks.tasks[0].task_title, "update", ["priority"])
+        ]
+        assert len(linear.issues) == 6 and linear.updates == 1
+        issue = next(issue for issue in linear.issues.values() if issue["title"] == tasks.tasks[0].task_title)
+        assert issue["input"]["priority"] == 1 and "**Priority:** Critical" in issue["input"]["description"]
@@ -0,0 +1,87 @@
+import pytest
+
+from conftest import make_task
+from dependencies import DependencyCycleError, TaskGraph
+
+
+def test_topological_order_and_critical_path():
+    graph = TaskGraph()
+    graph.add_tasks([
+        make_task("Auth tests", 4, 6, dependencies=[("Auth service", "Blocks")]),
+        make_task("Auth service", 16, 24, dependencies=[("User service integration", "Required by")]),
+        make_task("User service integration", 8, 12),
+        make_task("Dashboard", 10, 40, dependencies=[("Auth service", "Related to")]),
+    ])
+
+    order = graph.topological_order()
+    assert order.index("auth-service") < order.index("auth-tests")
+    assert order.index("auth-service") < order.index("user-service-integration")
+
+    path = graph.critical_path()
+    assert path.tasks == ["Dashboard"]
+    assert path.maximum_hours == 40
+    assert graph.critical_path("minimum").tasks == ["Auth service", "User service integration"]
+    assert graph.links("dashboard").related_to == ["Auth service"]
+
+
+def test_pending_dependencies_resolve_incrementally_and_survive_state():
+    graph = TaskGraph()
+    graph.add_tasks([make_task("Deploy", 2, 3, dependencies=[("Security scan", "Blocks")])])
+    assert graph.links("deploy").blocked_by == []
+
+    graph = TaskGraph.from_state(graph.to_state())
+    graph.add_tasks([make_task("Security scan", 5, 8)])
+    assert graph.links("deploy").blocked_by == ["Security scan"]
+    assert graph.critical_path().tasks == ["Security scan", "Deploy"]
+
+    graph.add_tasks([make_task("Security scan", 5, 8, status="Done")])
+    assert graph.critical_path().maximum_hours == 3
+
+
+def test_cycle_detection():
+    graph = TaskGraph()
+    graph.add_tasks([
+        make_task("A", 1, 1, dependencies=[("B", "Blocks")]),
+        make_task("B", 1, 1, dependencies=[("C", "Blocks")]),
+        make_task("C", 1, 1, dependencies=[("A", "Blocks")]),
+        make_task("D", 1, 1, dependencies=[("C", "Blocks")]),
+    ])
+
+    assert sorted(graph.find_cycle()[:-1]) == ["A", "B", "C"]
+    assert len(graph.topological_order()) == 4
+    with pytest.raises(DependencyCycleError):
+        graph.critical_path()
+    assert any(alert.startswith("Dependency cycle") for alert in graph.priority_alerts([]))
+
+
+def test_readding_a_task_replaces_its_dependencies():
+    graph = TaskGraph()
+    graph.add_tasks([
+        make_task("API", 4, 6),
+        make_task("Docs", 1, 2, dependencies=[("API", "Blocks")]),
+        make_task("Launch", 1, 1, dependencies=[("API", "Blocks"), ("Docs", "Blocks")]),
+    ])
+    # Docs no longer waits on the API; Launch still does, through its own declaration
+    graph.add_tasks([make_task("Docs", 1, 2), make_task("API", 4, 6, dependencies=[("Launch", "Required by")])])
+    graph = TaskGraph.from_state(graph.to_state())
+    assert graph.links("docs").blocked_by == []
+    assert graph.links("launch").blocked_by == ["API", "Docs"]
+    graph.add_tasks([make_task("Launch", 1, 1, dependencies=[("Docs", "Blocks")])])
+    assert graph.links("launch").blocked_by == ["API", "Docs"]
+    graph.add_tasks([make_task("API", 4, 6)])
+    assert graph.links("launch").blocked_by == ["Docs"] and graph.links("api").blocks == []
+
+
+def test_prune_bounds_the_graph_and_keeps_dependencies_pending():
+    graph = TaskGraph()
+    graph.add_tasks([make_task("Old done", 1, 1, status="Done"), make_task("Old open", 1, 1)])
+    graph.add_tasks([make_task(f"Task {i}", 1, 1, dependencies=[("Old open", "Blocks")]) for i in range(3)])
+    assert graph.prune(4, keep=["task-0", "task-1", "task-2"]) == 1
+    assert "old-done" not in graph and "old-open" in graph
+    assert graph.prune(3, keep=["task-0", "task-1", "task-2"]) == 1
+    assert len(graph) == 3 and graph.links("task-0").blocked_by == []
+
+    # The dropped blocker is linked again if a later meeting brings it back
+    graph = TaskGraph.from_state(graph.to_state())
+    graph.add_tasks([make_task("Old open", 1, 1)])
+    assert graph.links("old-open").blocks == ["Task 0", "Task 1", "Task 2"]
@@ -0,0 +1,38 @@
+from bench_fusion import measure_fusion
+from conftest import TEAM, canned_responses, replay_agent
+from phi.run.response import RunEvent
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow, TaskList
+
+
+def run_workflow(responses, **kwargs):
+    agents = {name: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+    workflow = EnhancedProductManagerWorkflow(session_id="standup", fuse_summary_and_tasks=True, **agents, **kwargs)
+    result = workflow.run(meeting_notes="Standup", linear_users={}, team_capacity={name: 40.0 for name in TEAM})
+    return workflow, result
+
+
+def test_fused_mode_makes_one_call_and_falls_back(monkeypatch):
+    monkeypatch.setenv("LINEAR_PROJECT_ID", "project")
+    monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+    responses = canned_responses(6)
+
+    workflow, result = run_workflow(responses)
+    assert result.event == RunEvent.workflow_completed
+    assert workflow.meeting_plan_agent.model.calls == 1
+    assert workflow.meeting_summary_agent.model.calls == 0 and workflow.task_agent.model.calls == 0
+    tasks = TaskList.model_validate_json(result.content["tasks"])
+    assert len(tasks.tasks) == 6 and "generate_tasks" not in workflow.stage_timings
+    assert len(workflow.session_state["task_history"]["recent"]) == 6
+
+    # A plan without tasks fails validation, and the run falls back to one call per stage
+    responses["Meeting Planner Agent"] = ['{"summary": ' + responses["Meeting Summary Agent"][0] + ', "tasks": []}']
+    workflow, result = run_workflow(responses)
+    assert result.event == RunEvent.workflow_completed
+    assert workflow.meeting_summary_agent.model.calls == 1 and workflow.task_agent.model.calls == 1
+
+
+def test_fusion_benchmark_saves_a_round_trip_with_parity():
+    result = measure_fusion(20, repeats=1)
+    assert (result.two_call_model_calls, result.fused_model_calls) == (2, 1)
+    assert result.fused_prompt_tokens < result.two_call_prompt_tokens
+    assert result.summary_parity and result.task_parity == 1.0
@@ -0,0 +1,82 @@
+import pytest
+
+from conftest import make_task
+from fake_services import FakeGithubServer
+from github_client import GithubIssueWriter
+from ratelimit import TokenBucket
+
+
+def test_create_issues_caches_lookups_and_is_idempotent():
+    tasks = [make_task(f"Task {i}", assignee="Mike", tags=["code", "backend"]) for i in range(6)]
+    linear_urls = {"Task 0": "https://linear.app/fake/issue/ENG-1"}
+    with FakeGithubServer(secondary_limit_every=4, page_size=4) as server:
+        writer = GithubIssueWriter(token="fake", api_url=server.url, max_concurrency=3)
+        first = writer.create_issues(
+            tasks, "acme/app", linear_urls=linear_urls, scope="meeting-1", milestone="Sprint 1",
+            github_users={"Mike": "mike-gh"},
+        )
+        assert [issue.task_title for issue in first] == [task.task_title for task in tasks]
+        assert all(issue.created for issue in first)
+        assert server.rejected >= 1
+        issues = server.issues["acme/app"]
+        assert len(issues) == 6
+        first_issue = next(i for i in issues if i["title"] == "Task 0")
+        assert "https://linear.app/fake/issue/ENG-1" in first_issue["body"]
+        assert first_issue["assignees"] == ["mike-gh"] and first_issue["milestone"] == 1
+        assert set(server.labels["acme/app"]) == {"pm-agent", "code", "backend"}
+
+        # Labels and milestones were listed once; a second batch only creates issues
+        requests_before = len(server.requests)
+        writer.create_issues([make_task("Task 6")], "acme/app", scope="meeting-1", milestone="Sprint 1")
+        assert {(r["method"], r["path"]) for r in server.requests[requests_before:]} == {("POST", "/repos/acme/app/issues")}
+
+        # A fresh writer (e.g. a retried run) finds the issues through their markers, across pages
+        retry = GithubIssueWriter(token="fake", api_url=server.url).create_issues(
+            tasks, "acme/app", scope="meeting-1"
+        )
+        assert [issue.number for issue in retry] == [issue.number for issue in first]
+        assert not any(issue.created for issue in retry)
+        assert len(server.issues["acme/app"]) == 7
+
+
+def test_retry_after_lost_create_response_reuses_the_filed_issue():
+    with FakeGithubServer() as server:
+        writer = GithubIssueWriter(token="fake", api_url=server.url, retries=0)
+        writer.create_issues([make_task("Task 0")], "acme/app", scope="meeting-1")
+
+        # The issue is filed but the response never makes it back
+        server.inject_faults(lost_rate=1.0)
+        with pytest.raises(Exception):
+            writer.create_issues([make_task("Task 1")], "acme/app", scope="meeting-1")
+        server.inject_faults()
+        assert len(server.issues["acme/app"]) == 2
+
+        retry = writer.create_issues([make_task("Task 0"), make_task("Task 1")], "acme/app", scope="meeting-1")
+        assert not any(issue.created for issue in retry)
+        assert len(server.issues["acme/app"]) == 2
+
+
+def test_token_bucket_follows_rate_limit_headers():
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=10, capacity=2, low_watermark=50, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire() and bucket.acquire()
+    assert not bucket.acquire(timeout=0.01)
+
+    # Few requests left: spread them over the remaining window
+    bucket.update_from_headers({"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": "100"}, now_epoch=0)
+    assert bucket.rate == 0.1
+    # Quota exhausted: wait for the reset
+    bucket.update_from_headers({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "30"}, now_epoch=0)
+    assert bucket.acquire()
+    assert now[0] >= 30
+    # Plenty left again after the reset
+    bucket.update_from_headers({"X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": "3600"}, now_epoch=0)
+    assert bucket.rate == 10
+    bucket.update_from_headers({"Retry-After": "5"})
+    started = now[0]
+    bucket.acquire()
+    assert now[0] - started >= 5
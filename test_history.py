@@ -0,0 +1,51 @@
+import json
+
+from conftest import canned_tasks
+from history import OTHERS, TaskHistory, estimate_tokens
+
+
+def test_window_compacts_older_tasks_into_statistics():
+    tasks = canned_tasks(30).tasks
+    history = TaskHistory(window=10)
+    history.record(tasks[:20])
+    history.record(tasks[20:])
+    assert [task.title for task in history.recent] == [task.task_title for task in tasks[20:]]
+    assert history.compacted_tasks == 20
+    assert sum(stats.count for stats in history.complexity_stats.values()) == 20
+    assert sum(load.tasks for load in history.assignee_load.values()) == sum(1 for task in tasks[:20] if task.task_assignee)
+
+    # Persisted state round-trips, and a smaller window compacts on load
+    restored = TaskHistory.from_state(history.model_dump(), window=5)
+    assert len(restored.recent) == 5 and restored.compacted_tasks == 25
+
+
+def test_prompt_payload_fits_the_token_budget():
+    history = TaskHistory(window=200)
+    history.record(canned_tasks(200).tasks)
+    for budget in (200, 1500, 5000):
+        payload = history.prompt_payload(token_budget=budget)
+        assert estimate_tokens(json.dumps(payload)) <= budget + 10
+    small, large = history.prompt_payload(token_budget=500), history.prompt_payload(token_budget=5000)
+    assert 0 < len(small["recent_tasks"]) < len(large["recent_tasks"])
+    # The most recent tasks are kept first
+    assert small["recent_tasks"][0]["title"] == "Task 199"
+
+
+def test_legacy_task_lists_are_migrated():
+    legacy = [canned_tasks(4).model_dump(mode="json"), canned_tasks(3).model_dump(mode="json")]
+    history = TaskHistory.from_state(legacy, window=5)
+    assert len(history.recent) == 5 and history.compacted_tasks == 2
+
+
+def test_statistics_are_capped_for_many_distinct_tags_and_assignees():
+    tasks = [
+        task.model_copy(update={"tags": [f"tag-{i}"], "task_assignee": f"person-{i}"})
+        for i, task in enumerate(canned_tasks(300).tasks)
+    ]
+    history = TaskHistory(window=10, max_tags=20, max_assignees=15)
+    for start in range(0, 300, 50):
+        history.record(tasks[start : start + 50])
+    assert len(history.tag_stats) == 20 and len(history.assignee_load) == 15
+    assert sum(stats.count for stats in history.tag_stats.values()) == 290
+    assert history.tag_stats[OTHERS].count == 290 - 19
+    assert sum(load.tasks for load in history.assignee_load.values()) == 290
@@ -0,0 +1,44 @@
+from conftest import make_task
+from fake_services import FakeLinearServer
+from linear_client import LinearClient
+
+LINEAR_USERS = {"Mike": "user_uuid_2"}
+
+
+def test_create_issues_batches_and_is_idempotent():
+    tasks = [make_task(f"Task {i}", assignee="Mike") for i in range(5)]
+    with FakeLinearServer() as server:
+        client = LinearClient(api_key="fake", endpoint=server.url, batch_size=2, max_concurrency=1)
+        first = client.create_issues(tasks, "team", "project", LINEAR_USERS, scope="meeting-1")
+        assert [issue.task_title for issue in first] == [task.task_title for task in tasks]
+        assert all(issue.created for issue in first)
+        # One lookup plus three batched mutations
+        assert client.requests_sent == 4
+        assert next(iter(server.issues.values()))["input"]["assigneeId"] == "user_uuid_2"
+
+        retry = client.create_issues(tasks, "team", "project", LINEAR_USERS, scope="meeting-1")
+        assert [issue.issue_id for issue in retry] == [issue.issue_id for issue in first]
+        assert not any(issue.created for issue in retry)
+        assert len(server.issues) == 5
+
+        client.create_issues(tasks[:1], "team", "project", LINEAR_USERS, scope="meeting-2")
+        assert len(server.issues) == 6
+
+
+def test_conflicts_after_lookup_reuse_existing_issues():
+    tasks = [make_task("Auth service"), make_task("Dashboard")]
+    with FakeLinearServer() as server:
+        client = LinearClient(api_key="fake", endpoint=server.url)
+        client.create_issues(tasks[:1], "team", "project", {})
+
+        # Simulate another attempt creating the issue between our lookup and our mutation
+        lookup = client.fetch_issues
+        client.fetch_issues = lambda ids: {} if len(ids) == 2 else lookup(ids)
+        issues = client.create_issues(tasks, "team", "project", {})
+
+        assert [issue.created for issue in issues] == [False, True]
+        assert len(server.issues) == 2
+
+        relations = [(issues[0].issue_id, issues[1].issue_id, "blocks")]
+        assert client.link_issues(relations) == 1
+        assert client.link_issues(relations) == 0
@@ -0,0 +1,83 @@
+import time
+from datetime import datetime
+
+from workflow import EnhancedProductManagerWorkflow, LinearIssue, LinearIssueList, MeetingSummary, Task, TaskList, TaskPriority, TaskTimeEstimate
+from fake_services import FakeSlackServer
+from notifications import NotificationQueue, SlackClient, pack_messages, render_meeting_update
+
+
+def make_update(title):
+    task = Task(
+        task_title=title,
+        task_assignee="Mike",
+        priority=TaskPriority(level="High"),
+        time_estimate=TaskTimeEstimate(minimum_hours=2, maximum_hours=4, confidence_level="Medium"),
+        complexity="Simple",
+        deadline=datetime(2024, 1, 15),
+    )
+    summary = MeetingSummary(
+        date=datetime(2024, 1, 8), attendees=["Sarah", "Mike"], key_points=["Auth"], action_items=[], decisions=[]
+    )
+    issues = LinearIssueList(
+        issues=[LinearIssue(issue_title=title, issue_link="https://linear.app/x/ENG-1", priority=task.priority)]
+    )
+    return render_meeting_update(summary, TaskList(tasks=[task]), issues, workload_alerts=["Mike: 4hrs remaining"])
+
+
+def test_render_and_pack():
+    text = make_update("Auth service")
+    assert "<https://linear.app/x/ENG-1|Auth service> — Mike · High · due 2024-01-15" in text
+    assert "Mike: 4hrs remaining" in text
+
+    messages = pack_messages([text] * 10, max_chars=len(text) * 3 + 100)
+    assert len(messages) == 4
+    assert messages[0].startswith("*PM digest* · 10 updates")
+    assert all(len(message) <= len(text) * 3 + 100 for message in messages)
+
+
+def test_queue_coalesces_per_channel_on_size_and_time():
+    now = [0.0]
+    with FakeSlackServer(min_interval=0.02, retry_after=0.02) as server:
+        client = SlackClient(token="fake", api_url=server.url, messages_per_second=1000)
+        queue = NotificationQueue(client, window_seconds=60, max_events=3, clock=lambda: now[0])
+        for i in range(4):
+            queue.enqueue("#eng", make_update(f"Task {i}"))
+        now[0] = 30.0
+        queue.enqueue("#design", make_update("Mockups"))
+        # Size threshold reached on #eng; the rest waits for the window
+        assert len(server.messages["#eng"]) == 1
+        assert "Task 2" in server.messages["#eng"][0] and "Task 3" not in server.messages["#eng"][0]
+
+        now[0] = 61.0
+        queue.enqueue("#eng", make_update("Task 4"))
+        assert len(server.messages["#eng"]) == 2
+        assert "#design" not in server.messages
+        queue.close()
+        assert len(server.messages["#design"]) == 1
+        assert queue.stats().messages_sent == 3 and queue.stats().pending == 0
+
+
+def test_background_flush_after_window():
+    with FakeSlackServer() as server:
+        client = SlackClient(token="fake", api_url=server.url)
+        with NotificationQueue(client, window_seconds=0.1, max_events=100) as queue:
+            for i in range(5):
+                queue.enqueue("#eng", make_update(f"Task {i}"))
+            deadline = time.monotonic() + 2
+            while "#eng" not in server.messages and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert len(server.messages["#eng"]) == 1
+            assert queue.stats().events == 5
+
+
+def test_workflow_posts_its_update_when_the_queue_is_not_started(monkeypatch):
+    monkeypatch.setenv("SLACK_CHANNEL", "#eng")
+    summary = MeetingSummary(
+        date=datetime(2024, 1, 8), attendees=["Sarah", "Mike"], key_points=["Auth"], action_items=[], decisions=[]
+    )
+    with FakeSlackServer() as server:
+        queue = NotificationQueue(SlackClient(token="fake", api_url=server.url), window_seconds=300, max_events=20)
+        workflow = EnhancedProductManagerWorkflow(session_id="digest", notification_queue=queue)
+        assert workflow.send_notifications(summary, TaskList(tasks=[]), LinearIssueList(issues=[]))
+        assert len(server.messages["#eng"]) == 1
+        assert queue.stats().pending == 0
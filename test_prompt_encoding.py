@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from conftest import make_task
+from workflow import MeetingSummary
+from prompt_encoding import PromptEncoder, encode_table
+
+
+def test_encode_table_flattens_and_escapes():
+    table = encode_table([{"a": "x|y", "b": {"c": 1}}, {"a": "line\nbreak \\ end", "d": ["p,q", "r"]}])
+    assert table.split("\n") == ["a|b.c|d", "x\\|y|1|", 'line\\nbreak \\\\ end||["p,q","r"]']
+
+
+def test_stage_pruning_and_report():
+    encoder = PromptEncoder()
+    tasks = [
+        make_task(
+            f"Task {i}",
+            2,
+            4,
+            assignee="Mike" if i % 2 else None,
+            reason="Launch",
+            tags=["code", "backend"],
+            dependencies=[("Task 0", "Blocks")] if i else [],
+            task_description=f"Build part {i}",
+            deadline=datetime(2024, 1, 15),
+        )
+        for i in range(20)
+    ]
+    text = encoder.encode("create_github_issues", tasks=tasks, repo="acme/app", linear_issues={})
+    lines = text.split("\n")
+    assert lines[:2] == ["## tasks", "task_title|task_description|tags|task_assignee"]
+    assert lines[2] == 'Task 0|Build part 0|["code","backend"]|'
+    assert "dependencies" not in text and "linear_issues" not in text
+
+    summary = MeetingSummary(
+        date=datetime(2024, 1, 8), attendees=["Sarah"], key_points=["Auth"], action_items=tasks[:3], decisions=[]
+    )
+    text = encoder.encode("generate_tasks", meeting_summary=summary, team_capacity={"Mike": 30.0})
+    assert '{"date":"2024-01-08","attendees":["Sarah"],"key_points":["Auth"]}' in text
+    assert "## meeting_summary.action_items" in text and "complexity" not in text
+
+    report = encoder.report()
+    assert set(report) == {"create_github_issues", "generate_tasks"}
+    assert report["create_github_issues"].calls == 1
+    assert report["create_github_issues"].saved_fraction > 0.6
+
+    # Without pruning or tables everything is kept as compact JSON
+    full = PromptEncoder(tabular=False, prune=False).encode("create_github_issues", tasks=tasks[:1])
+    assert '"complexity":"Simple"' in full and '"dependencies":[]' in full
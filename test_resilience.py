@@ -0,0 +1,244 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bench_resilience import measure_resilience
+from conftest import TEAM, canned_responses, canned_tasks, replay_agent
+from fake_services import FakeLinearServer
+from linear_client import LinearClient
+from phi.run.response import RunEvent
+from phi.tools.function import FunctionCall, StopAgentRun
+from resilience import (
+    CircuitOpenError,
+    DeadlineExceeded,
+    Resilience,
+    ResiliencePolicy,
+    _abandonable,
+    check_abandoned,
+    stop_when_abandoned,
+)
+from routing import ModelRoute, ModelRouter, RoutingConfig
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def flaky(failures: int):
+    calls = []
+
+    def func(value):
+        calls.append(value)
+        if len(calls) <= failures:
+            raise ConnectionError("transient")
+        return value
+
+    return func, calls
+
+
+def test_retries_with_jittered_backoff_and_opens_the_circuit():
+    clock = Clock()
+    policy = ResiliencePolicy(attempts=3, base_delay=1.0, max_delay=4.0, failure_threshold=3, reset_seconds=30)
+    resilience = Resilience({"linear": policy}, clock=clock, sleep=clock.sleep, seed=1)
+
+    func, calls = flaky(2)
+    assert resilience.call("linear", func, "ok") == "ok" and len(calls) == 3
+    assert 0 <= clock.sleeps[0] <= 1.0 and 0 <= clock.sleeps[1] <= 2.0
+
+    # Three failed attempts in a row open the circuit, which then rejects calls without making them
+    func, calls = flaky(10)
+    with pytest.raises(ConnectionError):
+        resilience.call("linear", func, "x")
+    with pytest.raises(CircuitOpenError):
+        resilience.call("linear", func, "x")
+    assert len(calls) == 3 and resilience.breaker("linear").state == "open"
+
+    # After reset_seconds one trial call goes through; its success closes the circuit
+    clock.now += 30
+    assert resilience.breaker("linear").state == "half_open"
+    assert resilience.call("linear", lambda: "back") == "back"
+    assert resilience.breaker("linear").state == "closed"
+    [stats] = resilience.stats()
+    assert (stats.calls, stats.failures, stats.retries, stats.rejected) == (4, 2, 4, 1)
+
+
+def wait_for(condition, seconds: float = 5.0) -> None:
+    expires = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < expires, "condition not met"
+        time.sleep(0.001)
+
+
+def warmed_up(clock: Clock, **kwargs) -> Resilience:
+    """Resilience that has seen five openai calls of 0.01s each, so it hedges past 0.01s"""
+    resilience = Resilience({"openai": ResiliencePolicy(hedge=True, hedge_min_samples=5, attempts=1)}, clock=clock, **kwargs)
+    for _ in range(5):
+        resilience.call("openai", lambda: setattr(clock, "now", clock.now + 0.01))
+    return resilience
+
+
+def test_deadline_abandons_slow_calls():
+    resilience = Resilience({"openai": ResiliencePolicy(deadline_seconds=0.05, attempts=1)})
+    release, stopped = threading.Event(), threading.Event()
+
+    def slow():
+        release.wait(5)
+        try:
+            check_abandoned()
+        except DeadlineExceeded:
+            stopped.set()
+
+    with pytest.raises(DeadlineExceeded):
+        resilience.call("openai", slow)
+    release.set()
+    resilience.close()
+    [stats] = resilience.stats()
+    assert (stats.calls, stats.failures, stats.deadlines, stats.abandoned) == (1, 1, 1, 1)
+    assert stopped.is_set()
+
+
+def test_hedges_attempts_running_past_p95():
+    clock = Clock()
+    resilience = warmed_up(clock)
+    release = threading.Event()
+    attempts = iter(["primary", "hedge"])
+
+    def answer():
+        name = next(attempts)
+        if name == "primary":
+            clock.now += 1
+            release.wait(5)
+        return name
+
+    assert resilience.call("openai", answer) == "hedge"
+    release.set()
+    resilience.close()
+    [stats] = resilience.stats()
+    assert (stats.hedges, stats.hedges_skipped, stats.abandoned) == (1, 0, 1)
+
+
+def test_no_hedge_while_every_worker_is_busy():
+    clock = Clock()
+    resilience = warmed_up(clock, max_workers=1)
+    release = threading.Event()
+
+    def primary():
+        clock.now += 1
+        release.wait(5)
+        return "primary"
+
+    with ThreadPoolExecutor(1) as caller:
+        result = caller.submit(resilience.call, "openai", primary)
+        wait_for(lambda: resilience.stats()[0].hedges_skipped == 1)
+        release.set()
+        assert result.result() == "primary"
+    [stats] = resilience.stats()
+    assert (stats.hedges, stats.hedges_skipped, stats.abandoned) == (0, 1, 0)
+
+
+def test_latency_is_timed_from_the_start_of_the_attempt():
+    clock = Clock()
+    resilience = Resilience({"openai": ResiliencePolicy(deadline_seconds=100, attempts=1)}, max_workers=1, clock=clock)
+    started, release = threading.Event(), threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    with ThreadPoolExecutor(2) as callers:
+        first = callers.submit(resilience.call, "openai", blocker)
+        started.wait(5)
+        queued = callers.submit(resilience.call, "openai", lambda: "queued")
+        wait_for(lambda: resilience.stats()[0].calls == 2)
+        # The second call waits 5s for the only worker, which is not latency of its own
+        clock.now += 5
+        release.set()
+        first.result(), queued.result()
+    assert resilience._latencies["openai"].quantile(0.0) == 0.0
+    assert resilience._latencies["openai"].quantile(0.95) == 5.0
+
+
+def test_abandoned_attempts_stop_at_their_next_request():
+    resilience = Resilience({"linear": ResiliencePolicy(deadline_seconds=0.1, attempts=1)})
+    with FakeLinearServer(latency=0.15) as linear:
+        client = LinearClient(api_key="test", endpoint=linear.url, batch_size=1, max_concurrency=1)
+        with pytest.raises(DeadlineExceeded):
+            resilience.call("linear", client.create_issues, canned_tasks(6).tasks, "team", "project", {})
+        resilience.close()
+        # The lookup in flight at the deadline completes, but the abandoned attempt creates nothing after it
+        assert len(linear.requests) == 1 and linear.issues == {}
+    assert resilience.stats()[0].abandoned == 1
+
+
+def test_abandoned_agent_runs_stop_at_their_next_tool_call():
+    calls = []
+    agent = AGENT_FACTORIES["linear_agent"]()
+    [toolkit] = agent.tools
+    function = next(iter(toolkit.functions.values())).model_copy(update={"entrypoint": lambda: calls.append("called")})
+    agent.tools = [function]
+    stop_when_abandoned(agent)
+    stop_when_abandoned(agent)
+
+    abandoned = threading.Event()
+    run = _abandonable(abandoned, lambda: FunctionCall(function=function).execute())
+    assert run() and calls == ["called"]
+    abandoned.set()
+    with pytest.raises(StopAgentRun):
+        run()
+    assert calls == ["called"]
+
+
+def test_one_layer_retries_and_hedges_each_call():
+    with FakeLinearServer() as linear:
+        config = RoutingConfig(stages={"task_agent": ModelRoute(models=["gpt-4o", "gpt-4o-mini"], budget_seconds=60)})
+        workflow = EnhancedProductManagerWorkflow(
+            session_id="standup",
+            linear_client=LinearClient(api_key="test", endpoint=linear.url),
+            model_router=ModelRouter(config),
+            resilience=Resilience(),
+        )
+        assert workflow.linear_client.retries == 0
+
+        # The router hedges, falls back and keeps the budget of routed stages; other agents are hedged by resilience
+        policy = workflow._routed_policy("task_agent")
+        assert (policy.hedge, policy.attempts, policy.deadline_seconds) == (False, 1, None)
+        assert workflow._routed_policy("linear_agent") is None
+
+
+def test_workflow_survives_faulty_linear_and_model(monkeypatch):
+    monkeypatch.setenv("LINEAR_PROJECT_ID", "project")
+    monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+    responses = canned_responses(6)
+    agents = {name: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+    policy = ResiliencePolicy(attempts=6, base_delay=0.01, max_delay=0.05)
+    resilience = Resilience({"linear": policy, "openai": policy})
+
+    with FakeLinearServer() as linear:
+        linear.inject_faults(failure_rate=0.4, seed=3)
+        workflow = EnhancedProductManagerWorkflow(
+            session_id="standup",
+            linear_client=LinearClient(api_key="test", endpoint=linear.url, retries=0),
+            resilience=resilience,
+            **agents,
+        )
+        result = workflow.run(meeting_notes="Standup", linear_users={}, team_capacity={name: 40.0 for name in TEAM})
+        assert result.event == RunEvent.workflow_completed
+        assert linear.faults_injected > 0 and len(linear.issues) == 6
+
+
+def test_resilience_recovers_failed_and_stalled_calls():
+    direct, resilient = measure_resilience(calls=150, latency=0.005, slow_seconds=0.3)
+    assert direct.succeeded < direct.calls and resilient.succeeded == resilient.calls
+    assert resilient.retries > 0 and resilient.hedges > 0 and resilient.abandoned > 0
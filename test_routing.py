@@ -0,0 +1,111 @@
+import threading
+from typing import ClassVar, List
+
+import pytest
+
+from cache import MemoryResultCache, ResultCache
+from conftest import TEAM, ReplayModel, canned_responses, canned_summary, canned_tasks, replay_agent
+from phi.model.message import Message
+from phi.run.response import RunEvent
+from routing import ModelRoute, ModelRouter, RoutingConfig, StageBudgetExceeded
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow
+
+
+class FailingModel(ReplayModel):
+    def response(self, messages: List[Message]):
+        raise ConnectionError("model unavailable")
+
+
+class BlockedModel(ReplayModel):
+    """Does not answer until the test releases it"""
+
+    released: ClassVar[threading.Event] = threading.Event()
+
+    def response(self, messages: List[Message]):
+        self.released.wait()
+        return super().response(messages)
+
+
+def router(responses: List[str], latencies: dict, **route) -> ModelRouter:
+    def factory(model_id: str):
+        if latencies[model_id] is None:
+            return FailingModel(id=model_id)
+        if latencies[model_id] == "blocked":
+            return BlockedModel(id=model_id, responses=responses)
+        return ReplayModel(id=model_id, responses=responses, latency=latencies[model_id])
+
+    config = RoutingConfig(stages={"task_agent": ModelRoute(models=list(latencies), **route)})
+    return ModelRouter(config, model_factory=factory)
+
+
+def test_hedges_slow_primary_and_falls_back_on_failure():
+    responses = canned_responses(3)
+    agent = AGENT_FACTORIES["task_agent"]()
+    tasks = responses[agent.name]
+
+    BlockedModel.released.clear()
+    slow = router(tasks, {"gpt-4o": "blocked", "gpt-4o-mini": 0.0}, hedge_after_seconds=0.01)
+    calls = []
+    response = slow.run("task_agent", agent, "Standup", calls)
+    assert response.model == "gpt-4o-mini" and len(response.content.tasks) == 3
+    assert [(call.model, call.outcome, call.hedged) for call in calls] == [
+        ("gpt-4o-mini", "served", True),
+        ("gpt-4o", "abandoned", False),
+    ]
+
+    # A failed primary hands over without any hedge delay
+    failing = router(tasks, {"gpt-4o": None, "gpt-4o-mini": 0.0})
+    calls = []
+    assert failing.run("task_agent", agent, "Standup", calls).model == "gpt-4o-mini"
+    assert [(call.outcome, call.hedged) for call in calls] == [("failed", False), ("served", True)]
+
+    budget = router(tasks, {"gpt-4o": "blocked", "gpt-4o-mini": "blocked"}, budget_seconds=0.1, hedge_after_seconds=0.02)
+    calls = []
+    with pytest.raises(StageBudgetExceeded):
+        budget.run("task_agent", agent, "Standup", calls)
+    assert [call.outcome for call in calls] == ["timeout", "timeout"]
+    BlockedModel.released.set()
+
+    # Stages without a route run on the agent's own model
+    assert agent.model is None and slow.route("slack_agent") is None
+
+
+def test_workflow_records_the_model_serving_each_stage(monkeypatch):
+    monkeypatch.setenv("LINEAR_PROJECT_ID", "project")
+    monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+    responses = canned_responses(4)
+    agents = {name: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+    model_router = router(responses["Task Agent"], {"gpt-4o": None, "gpt-4o-mini": 0.0})
+    workflow = EnhancedProductManagerWorkflow(session_id="standup", model_router=model_router, **agents)
+
+    result = workflow.run(meeting_notes="Standup", linear_users={}, team_capacity={name: 40.0 for name in TEAM})
+    assert result.event == RunEvent.workflow_completed
+    assert [(call.stage, call.model, call.outcome) for call in workflow.model_calls] == [
+        ("task_agent", "gpt-4o", "failed"),
+        ("task_agent", "gpt-4o-mini", "served"),
+    ]
+    assert workflow.task_agent.model.calls == 0 and workflow.linear_agent.model.calls == 1
+
+
+def test_cache_keys_follow_the_routed_model():
+    responses = canned_responses(3)
+    agents = {name: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+    cache = ResultCache([MemoryResultCache()])
+    summary = canned_summary(canned_tasks(3))
+
+    def generate(latencies: dict) -> List[str]:
+        calls = []
+        workflow = EnhancedProductManagerWorkflow(
+            session_id="standup", model_router=router(responses["Task Agent"], latencies), cache=cache, **agents
+        )
+        workflow.model_calls = calls
+        assert len(workflow.generate_tasks(summary).tasks) == 3
+        return [call.model for call in calls if call.outcome == "served"]
+
+    # A fallback's answer is not cached under the primary model
+    assert generate({"gpt-4o": None, "gpt-4o-mini": 0.0}) == ["gpt-4o-mini"]
+    assert generate({"gpt-4o": 0.0}) == ["gpt-4o"]
+    assert generate({"gpt-4o": 0.0}) == []
+    # Routing the stage to another model misses the entries of the old one
+    assert generate({"gpt-4o-mini": 0.0}) == ["gpt-4o-mini"]
+    assert generate({"gpt-4o-mini": 0.0}) == []
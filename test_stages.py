@@ -0,0 +1,60 @@
+import threading
+import time
+
+from conftest import TEAM, canned_responses, replay_agent
+from fake_services import FakeGithubServer, FakeLinearServer
+from github_client import GithubIssueWriter
+from linear_client import LinearClient
+from phi.run.response import RunEvent
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow
+
+CAPACITY = {name: 40.0 for name in TEAM}
+
+
+def build(linear, github, **kwargs):
+    responses = canned_responses(6)
+    agents = {name: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+    return EnhancedProductManagerWorkflow(
+        session_id="standup",
+        linear_client=LinearClient(api_key="test", endpoint=linear.url),
+        github_client=GithubIssueWriter(token="fake", api_url=github.url),
+        **agents,
+        **kwargs,
+    )
+
+
+def join_stage_threads():
+    for thread in threading.enumerate():
+        if thread.name.startswith("pm-stage"):
+            thread.join(timeout=10)
+
+
+def test_concurrent_stages_match_sequential(monkeypatch):
+    for name, value in {"LINEAR_PROJECT_ID": "project", "LINEAR_TEAM_ID": "team", "GITHUB_REPO": "acme/app"}.items():
+        monkeypatch.setenv(name, value)
+    results = []
+    for concurrent in (False, True):
+        with FakeLinearServer() as linear, FakeGithubServer() as github:
+            workflow = build(linear, github, concurrent_stages=concurrent)
+            result = workflow.run(meeting_notes="Standup", linear_users={}, team_capacity=dict(CAPACITY))
+            assert result.event == RunEvent.workflow_completed
+            assert workflow.slack_agent.model.calls == 1
+            results.append((len(linear.issues), sorted(issue.task_title for issue in workflow.github_issues)))
+    assert results[0] == results[1] and results[0][0] == 6 and len(results[0][1]) == 3
+
+
+def test_timed_out_stage_is_cancelled_and_its_late_result_dropped(monkeypatch):
+    for name, value in {"LINEAR_PROJECT_ID": "project", "LINEAR_TEAM_ID": "team", "GITHUB_REPO": "acme/app"}.items():
+        monkeypatch.setenv(name, value)
+    with FakeLinearServer() as linear, FakeGithubServer(latency=0.2) as github:
+        workflow = build(linear, github, concurrent_stages=True, stage_timeouts={"create_github_issues": 0.05})
+        started = time.perf_counter()
+        result = workflow.run(meeting_notes="Standup", linear_users={}, team_capacity=dict(CAPACITY))
+        assert result.event == RunEvent.workflow_completed
+        assert time.perf_counter() - started < 0.5 and workflow.github_issues == []
+
+        # The abandoned stage finishes its in-flight call, but neither its issues nor a checkpoint reach the run
+        join_stage_threads()
+        assert github.issues.get("acme/app")
+        assert workflow.github_issues == []
+        assert result.run_id not in workflow.session_state.get("checkpoints", {})
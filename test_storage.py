@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from phi.workflow import WorkflowSession
+
+from storage import MemoryWorkflowStorage, SqliteWorkflowStorage, get_engine, normalize_db_url, workflow_storage
+
+
+def test_memory_and_sqlite_storage_share_sessions_across_threads(tmp_path):
+    for storage in (MemoryWorkflowStorage(), SqliteWorkflowStorage("sessions"), SqliteWorkflowStorage("s", str(tmp_path / "s.db"))):
+        storage.create()
+
+        def write(i):
+            storage.upsert(WorkflowSession(session_id=f"s{i}", workflow_id="w", session_data={"session_state": {"i": i}}))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(write, range(8)))
+        session = storage.read("s3")
+        assert session.session_data == {"session_state": {"i": 3}}
+        session.session_data["session_state"]["i"] = 99
+        assert storage.read("s3").session_data == {"session_state": {"i": 3}}
+        assert sorted(storage.get_all_session_ids(workflow_id="w")) == sorted(f"s{i}" for i in range(8))
+        storage.delete_session("s3")
+        assert storage.read("s3") is None
+
+
+def test_engines_and_storages_are_shared_per_database():
+    assert normalize_db_url("postgres://ai:ai@localhost:5532/ai") == "postgresql+psycopg://ai:ai@localhost:5532/ai"
+    assert normalize_db_url("postgresql+psycopg2://h/db") == "postgresql+psycopg2://h/db"
+
+    engine = get_engine("postgresql://ai:ai@localhost:5532/pooled", pool_size=3, max_overflow=1)
+    assert engine is get_engine("postgresql+psycopg://ai:ai@localhost:5532/pooled")
+    assert engine.pool.size() == 3 and engine.pool._pre_ping
+
+    storage = workflow_storage("sessions", backend="sqlite")
+    assert storage is workflow_storage("sessions", backend="sqlite")
+    assert storage.db_engine is get_engine("sqlite://")
+    memory = workflow_storage("sessions", backend="memory")
+    assert isinstance(memory, MemoryWorkflowStorage) and memory is workflow_storage("sessions", backend="memory")
+    assert memory is not workflow_storage("other", backend="memory")
@@ -0,0 +1,136 @@
+import json
+import tracemalloc
+
+import pytest
+
+from conftest import TEAM, canned_responses, canned_tasks, replay_agent
+from fake_services import FakeGithubServer, FakeLinearServer
+from github_client import GithubIssueWriter
+from linear_client import LinearClient
+from phi.run.response import RunEvent
+from streaming import JsonArrayItemScanner, parse_items
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow, LinearIssue
+
+DOCUMENT = json.dumps(
+    {
+        "note": 'mentions "tasks": [ and {braces} inside a string',
+        "tasks": [
+            {"title": 'quote " and backslash \\ and } bracket', "tags": ["a", "]"], "meta": {"nested": [{"x": 1}]}},
+            {"title": "second", "escaped": "\\\"}\\"},
+            {"title": "third"},
+        ],
+        "after": [{"ignored": True}],
+    }
+)
+
+
+def test_scanner_cuts_items_at_any_chunk_boundary():
+    expected = json.loads(DOCUMENT)["tasks"]
+    for size in range(1, 12):
+        scanner = JsonArrayItemScanner("tasks")
+        raw = []
+        for start in range(0, len(DOCUMENT), size):
+            raw.extend(scanner.feed(DOCUMENT[start : start + size]))
+        assert [json.loads(item) for item in raw] == expected, size
+
+
+def issue_chunks(count: int, consumed: list):
+    yield '{"issues": ['
+    for i in range(count):
+        issue = LinearIssue(issue_title=f"Issue {i}", issue_description="x" * 200, priority={"level": "Medium"})
+        text = ("," if i else "") + issue.model_dump_json()
+        for start in range(0, len(text), 40):
+            consumed[0] += 1
+            yield text[start : start + 40]
+    yield "]}"
+
+
+def test_items_are_emitted_as_they_close_with_flat_memory():
+    consumed = [0]
+    stream = parse_items(issue_chunks(10000, consumed), "issues", LinearIssue)
+    first = next(stream)
+    assert first.issue_title == "Issue 0" and consumed[0] < 10
+
+    tracemalloc.start()
+    count = 1 + sum(1 for _ in stream)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The parser only holds the item it is in; what remains is pydantic's bounded string cache
+    assert count == 10000 and consumed[0] * 40 > 2_500_000
+    assert peak < consumed[0] * 40 / 4
+
+
+def test_workflow_streams_linear_issues_from_the_agent(monkeypatch):
+    monkeypatch.setenv("LINEAR_PROJECT_ID", "project")
+    monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+    responses = canned_responses(5)
+    agents = {name: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+    workflow = EnhancedProductManagerWorkflow(session_id="streaming", **agents)
+    tasks = canned_tasks(5)
+    workflow.update_task_graph(tasks)
+
+    issues = list(workflow.create_linear_issues_stream(tasks, {}))
+    assert [issue.issue_title for issue in issues] == [task.task_title for task in tasks.tasks]
+    assert "create_linear_issues" in workflow.stage_timings
+
+
+class RecordingWriter(GithubIssueWriter):
+    """Records how many events the caller had seen when the GitHub stage started"""
+
+    def __init__(self, events, **kwargs):
+        super().__init__(**kwargs)
+        self.events = events
+        self.seen_at_start = None
+
+    def create_issues(self, *args, **kwargs):
+        self.seen_at_start = list(self.events)
+        return super().create_issues(*args, **kwargs)
+
+
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_stream_yields_issues_as_their_stages_create_them(monkeypatch, concurrent):
+    for name, value in {"LINEAR_PROJECT_ID": "project", "LINEAR_TEAM_ID": "team", "GITHUB_REPO": "acme/app"}.items():
+        monkeypatch.setenv(name, value)
+    responses = canned_responses(6)
+    agents = {name: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+    events = []
+    with FakeLinearServer() as linear, FakeGithubServer() as github:
+        writer = RecordingWriter(events, token="fake", api_url=github.url)
+        workflow = EnhancedProductManagerWorkflow(
+            session_id="streaming",
+            linear_client=LinearClient(api_key="test", endpoint=linear.url),
+            github_client=writer,
+            concurrent_stages=concurrent,
+            **agents,
+        )
+        for event in workflow.run(meeting_notes="Standup", linear_users={}, team_capacity={name: 40.0 for name in TEAM}, stream=True):
+            events.append(event.content_type if event.event == RunEvent.run_response else event.event)
+
+    assert events == (
+        ["MeetingSummary"] + ["Task"] * 6 + ["LinearIssue"] * 6 + ["GithubIssueResult"] * 3 + [RunEvent.workflow_completed]
+    )
+    # Linear issues were streamed before the GitHub stage began
+    assert writer.seen_at_start == ["MeetingSummary"] + ["Task"] * 6 + ["LinearIssue"] * 6
+
+
+def test_streamed_run_streams_issues_from_the_linear_agent(monkeypatch):
+    monkeypatch.setenv("LINEAR_PROJECT_ID", "project")
+    monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+    monkeypatch.setattr(EnhancedProductManagerWorkflow, "create_linear_issues", lambda *args: pytest.fail("not streamed"))
+    responses = canned_responses(4)
+    agents = {name: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()}
+    workflow = EnhancedProductManagerWorkflow(session_id="streaming", **agents)
+    saved = []
+    save_checkpoint = EnhancedProductManagerWorkflow._save_checkpoint
+    monkeypatch.setattr(
+        EnhancedProductManagerWorkflow,
+        "_save_checkpoint",
+        lambda self, stage, *args, **kwargs: saved.append(stage) or save_checkpoint(self, stage, *args, **kwargs),
+    )
+
+    events = [
+        event.content_type if event.event == RunEvent.run_response else event.event
+        for event in workflow.run(meeting_notes="Standup", linear_users={}, team_capacity={name: 40.0 for name in TEAM}, stream=True)
+    ]
+    assert events == ["MeetingSummary"] + ["Task"] * 4 + ["LinearIssue"] * 4 + [RunEvent.workflow_completed]
+    assert "create_linear_issues" in saved
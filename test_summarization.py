@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from conftest import canned_summary, canned_tasks, replay_agent
+from workflow import (
+    EnhancedProductManagerWorkflow,
+    MeetingContext,
+    MeetingSummary,
+    TaskPriority,
+    build_meeting_summary_agent,
+    build_summary_reconcile_agent,
+)
+from summarization import merge_summaries, split_transcript, transcript_preamble
+
+NOTES = "\n".join(
+    [
+        "Sprint Planning",
+        "Date: 2024-01-15",
+        "Attendees: Sarah, Mike",
+        "",
+        "## Backend",
+        *[f"Mike: update {i} on the auth service rollout." for i in range(6)],
+        "## Frontend",
+        *[f"Emma: update {i} on the dashboard." for i in range(6)],
+    ]
+)
+
+
+def test_split_keeps_turns_whole_and_starts_chunks_at_sections():
+    chunks = split_transcript(NOTES, max_chars=200)
+    assert [line for line in "\n".join(chunks).split("\n") if line] == [line for line in NOTES.split("\n") if line]
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert any(chunk.startswith("## Frontend") for chunk in chunks)
+    assert all(line.startswith(("Mike:", "Emma:", "##", "Sprint", "Date", "Attendees")) for c in chunks for line in c.split("\n") if line)
+    assert transcript_preamble(NOTES) == "Sprint Planning\nDate: 2024-01-15\nAttendees: Sarah, Mike"
+    assert split_transcript("Mike: " + "word " * 100, max_chars=100)[0].startswith("Mike: word")
+
+
+def test_merge_dedupes_in_chunk_order():
+    tasks = canned_tasks(3).tasks
+    first = MeetingSummary(
+        date=datetime(2024, 1, 15),
+        attendees=["Sarah", "Mike"],
+        key_points=["Auth rollout"],
+        action_items=[tasks[0], tasks[1].model_copy(update={"task_assignee": None})],
+        decisions=["Use Postgres"],
+        context=MeetingContext(blockers=["Vendor API keys"]),
+        meeting_type="planning",
+    )
+    second = MeetingSummary(
+        date=datetime(2024, 1, 16),
+        attendees=["mike ", "Emma"],
+        key_points=["auth rollout.", "Dashboard"],
+        action_items=[tasks[1].model_copy(update={"priority": TaskPriority(level="Critical")}), tasks[2]],
+        decisions=["Use Postgres"],
+        context=MeetingContext(blockers=["vendor API keys", "Flaky CI"]),
+        duration_minutes=120,
+    )
+    merged = merge_summaries([first, second])
+    assert merged.date == first.date and merged.meeting_type == "planning" and merged.duration_minutes == 120
+    assert merged.attendees == ["Sarah", "Mike", "Emma"]
+    assert merged.key_points == ["Auth rollout", "Dashboard"] and merged.decisions == ["Use Postgres"]
+    assert merged.context.blockers == ["Vendor API keys", "Flaky CI"]
+    assert [t.task_title for t in merged.action_items] == [t.task_title for t in tasks]
+    assert merged.action_items[1].task_assignee == tasks[1].task_assignee
+    assert merged.action_items[1].priority.level == "Critical"
+
+
+def test_workflow_summarizes_long_notes_in_chunks():
+    summary = canned_summary(canned_tasks(4))
+    responses = {"Meeting Summary Agent": [summary.model_dump_json()], "Summary Reconcile Agent": ["not json"]}
+    workflow = EnhancedProductManagerWorkflow(
+        summary_chunk_chars=250,
+        meeting_summary_agent=replay_agent(build_meeting_summary_agent(), responses, 0, 0),
+        summary_reconcile_agent=replay_agent(build_summary_reconcile_agent(), responses, 0, 0),
+    )
+    result = workflow.get_meeting_summary(NOTES)
+    # Every chunk returned the same summary, and the unparseable reconcile pass falls back to the merge
+    assert result is not None and result.model_dump() == merge_summaries([summary]).model_dump()
+    assert workflow.meeting_summary_agent.model.calls == len(split_transcript(NOTES, 250)) > 1
+    assert workflow.summary_reconcile_agent.model.calls == 1
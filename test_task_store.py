@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from conftest import canned_summary, canned_tasks
+from github_client import GithubIssueResult
+from workflow import TaskDependency
+from task_store import TaskStore
+
+
+def test_save_run_writes_deltas_and_answers_indexed_queries(tmp_path):
+    store = TaskStore(db_url=f"sqlite:///{tmp_path / 'tasks.db'}")
+    tasks = canned_tasks(10).tasks
+    tasks[1] = tasks[1].model_copy(
+        update={"dependencies": [TaskDependency(task_id=tasks[0].task_title, dependency_type="Blocks", impact_level="High")]}
+    )
+    summary = canned_summary(canned_tasks(10))
+    linear_urls = {task.task_title: f"https://linear.app/fake/{i}" for i, task in enumerate(tasks)}
+    github = [GithubIssueResult(task_title=tasks[0].task_title, number=1, url="https://github.com/acme/app/issues/1", created=True)]
+
+    delta = store.save_run("s1", "meeting-1", summary, tasks, linear_urls, github)
+    assert (delta.tasks_written, delta.tasks_unchanged, delta.links_written) == (10, 0, 11)
+
+    # Re-running the same meeting writes nothing; changing one task rewrites only that task
+    assert store.save_run("s1", "meeting-1", summary, tasks, linear_urls, github).tasks_written == 0
+    tasks[2] = tasks[2].model_copy(update={"task_assignee": "Zoe", "tags": ["urgent"]})
+    delta = TaskStore(db_url=f"sqlite:///{tmp_path / 'tasks.db'}").save_run("s1", "meeting-1", summary, tasks, linear_urls, github)
+    assert (delta.tasks_written, delta.tasks_unchanged, delta.links_written) == (1, 9, 0)
+
+    zoe = store.open_tasks("Zoe")
+    assert [task.title for task in zoe] == [tasks[2].task_title] and zoe[0].tags == ["urgent"]
+    assert zoe[0].issue_links == {"linear": "https://linear.app/fake/2"}
+    assert store.set_status("s1", tasks[2].task_title, "Done") and store.open_tasks("Zoe") == []
+    # A later run regenerating the task as "Not Started" keeps the status
+    store.save_run("s1", "meeting-2", summary, [tasks[2].model_copy(update={"task_description": "again"})])
+    assert store.open_tasks("Zoe") == [] and store.meeting_tasks("meeting-2")[0].status == "Done"
+
+    assert [task.title for task in store.dependents("s1", tasks[0].task_title)] == [tasks[1].task_title]
+    assert len(store.tasks_with_tag("urgent", session_id="s1")) == 1
+    due = store.tasks_due(datetime(2100, 1, 1))
+    assert len(due) == sum(1 for task in tasks if task.deadline) - 1
+
+
+def test_writers_compare_against_the_stored_hash(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tasks.db'}"
+    first, second = TaskStore(db_url=url), TaskStore(db_url=url)
+    tasks = canned_tasks(3).tasks
+    changed = [tasks[0].model_copy(update={"task_assignee": "Zoe"}), *tasks[1:]]
+
+    assert first.save_run("s1", "meeting-1", None, tasks).tasks_written == 3
+    assert second.save_run("s1", "meeting-1", None, changed).tasks_written == 1
+    # The other writer changed the task since, so writing the original back is not skipped
+    delta = first.save_run("s1", "meeting-1", None, tasks)
+    assert (delta.tasks_written, delta.tasks_unchanged) == (1, 2)
+    assert first.open_tasks("Zoe") == []
@@ -0,0 +1,62 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import LogExporter, PrometheusExporter, Tracer, propagate, record, record_usage
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+def test_spans_collect_counters_across_threads():
+    spans = ListExporter()
+    prometheus = PrometheusExporter()
+    tracer = Tracer([spans, prometheus])
+
+    record("requests")  # no active span: ignored
+    with tracer.span("create_github_issues", run_id="r1", session_id="s1"):
+        record("payload_bytes", 120)
+        record_usage({"input_tokens": [100, 50], "output_tokens": [20, 5]})
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(propagate(lambda _: record("requests")), range(10)))
+    try:
+        with tracer.span("write", kind="storage"):
+            raise RuntimeError("db down")
+    except RuntimeError:
+        pass
+
+    stage, storage = spans.spans
+    assert stage.to_record()["requests"] == 10
+    assert (stage.counters["prompt_tokens"], stage.counters["completion_tokens"]) == (150, 25)
+    assert stage.to_record()["retries"] == 0 and stage.run_id == "r1"
+    assert storage.status == "error" and storage.error == "db down"
+
+    metrics = prometheus.render()
+    assert 'pm_span_requests_total{kind="stage",span="create_github_issues"} 10' in metrics
+    assert 'pm_spans_total{kind="storage",span="write",status="error"} 1' in metrics
+    assert 'pm_span_duration_seconds_bucket{kind="stage",span="create_github_issues",le="+Inf"} 1' in metrics
+
+
+def test_log_exporter_writes_json_lines_and_each_span_is_exported_once(caplog):
+    tracer = Tracer([LogExporter(level=logging.WARNING)])
+    with caplog.at_level(logging.WARNING, logger="pm_agent.tracing"):
+        with tracer.span("generate_tasks"):
+            record("retries", 2)
+    assert json.loads(caplog.records[0].getMessage())["retries"] == 2
+
+    # Per-span cost is bounded by work, not wall-clock time (measured by `benchmark.py --metrics`)
+    spans = ListExporter()
+    prometheus = PrometheusExporter()
+    tracer = Tracer([spans, prometheus])
+    for _ in range(2000):
+        with tracer.span("generate_tasks"):
+            record("requests")
+    record("requests")
+    assert len(spans.spans) == 2000
+    assert all(span.counters == {"requests": 1} for span in spans.spans)
+    assert 'pm_span_requests_total{kind="stage",span="generate_tasks"} 2000' in prometheus.render()
@@ -0,0 +1,97 @@
+from conftest import TEAM, canned_responses, replay_agent
+from batch import BatchItem
+from storage import SqliteWorkflowStorage
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow
+from worker import AgentPool, JobQueue, WorkerService, default_workflow_factory
+
+
+def test_worker_serves_tenants_fairly_and_resumes_failed_jobs(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINEAR_PROJECT_ID", "project")
+    monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+    queue = JobQueue(db_url=f"sqlite:///{tmp_path / 'jobs.db'}")
+    capacity = {name: 40.0 for name in TEAM}
+    big = [queue.enqueue(BatchItem(meeting_id=f"a{i}", meeting_notes=f"Standup {i}", team_capacity=capacity), "acme") for i in range(4)]
+    small = queue.enqueue(BatchItem(meeting_id="b0", meeting_notes="Standup", team_capacity=capacity), "beta")
+    flaky = queue.enqueue(BatchItem(meeting_id="c0", meeting_notes="Planning", team_capacity=capacity, session_id="gamma-1"), "gamma")
+
+    responses = canned_responses(4)
+    pool = AgentPool({name: lambda factory=factory: replay_agent(factory(), responses, 0, 0) for name, factory in AGENT_FACTORIES.items()})
+    storage = SqliteWorkflowStorage("worker_sessions", str(tmp_path / "sessions.db"))
+    attempts = []
+
+    def factory(job, agent_pool):
+        attempts.append(job.id)
+        # The first attempt of the flaky job cannot reach Linear
+        if job.id == flaky and attempts.count(flaky) == 1:
+            monkeypatch.delenv("LINEAR_TEAM_ID")
+        else:
+            monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+        return EnhancedProductManagerWorkflow(session_id=job.session_id, storage=storage, agent_pool=agent_pool)
+
+    service = WorkerService(queue, factory, max_workers=1, tenant_cap=1, agent_pool=pool, poll_seconds=0.01)
+    summary = service.drain()
+
+    # One worker alternates between tenants instead of working through acme's backlog first
+    assert attempts[:3] == [big[0], small, flaky] and attempts[3] == big[1]
+    assert attempts.count(flaky) == 2 and summary.completed == 6 and summary.failed == 1
+    job = queue.get(flaky)
+    assert job.status == "completed" and job.attempts == 2
+    # The retry resumed its run from the checkpoints instead of summarizing the meeting again
+    assert pool.acquire("meeting_summary_agent").model.calls == 6
+    assert pool.reused > pool.built
+
+    metrics = service.metrics()
+    assert metrics.queue_depth == {} and metrics.retries == 1 and metrics.runs.latency.count == 7
+    text = service.render_metrics()
+    assert 'pm_worker_jobs_total{status="completed"} 6' in text and "pm_worker_queue_wait_seconds_count 7" in text
+
+
+def test_claims_one_job_per_session_and_gives_up_expired_jobs(tmp_path):
+    queue = JobQueue(db_url=f"sqlite:///{tmp_path / 'jobs.db'}")
+    first = queue.enqueue(BatchItem(meeting_id="a0", meeting_notes="Standup", session_id="s1"), "acme", max_attempts=1)
+    second = queue.enqueue(BatchItem(meeting_id="a1", meeting_notes="Standup", session_id="s1"), "acme", max_attempts=2)
+
+    # The lease runs out right away, as if the worker died
+    assert queue.claim("acme", "w1", lease_seconds=-1).id == first
+    assert queue.claim("acme", "w2", lease_seconds=-1) is None
+    assert queue.requeue_expired() == 0
+    assert queue.get(first).status == "failed" and queue.get(first).finished_at is not None
+
+    assert queue.claim("acme", "w2", lease_seconds=-1).id == second
+    assert queue.requeue_expired() == 1
+    assert queue.get(second).status == "queued" and queue.get(second).attempts == 1
+
+    # A worker whose lease ran out can no longer finish the job it lost
+    job = queue.claim("acme", "w3", lease_seconds=60)
+    assert not queue.complete(second, "late", "w2") and not queue.fail(job, "late", None, "w2")
+    assert queue.get(second).status == "running"
+    assert queue.complete(second, "run", "w3") and queue.get(second).status == "completed"
+
+
+def test_lease_errors_do_not_stop_the_worker_and_jobs_keep_their_storage(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINEAR_PROJECT_ID", "project")
+    monkeypatch.setenv("LINEAR_TEAM_ID", "team")
+    db_url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    queue = JobQueue(db_url=db_url)
+    queue.enqueue(BatchItem(meeting_id="a0", meeting_notes="Standup", team_capacity={name: 40.0 for name in TEAM}), "acme")
+    extend_leases = queue.extend_leases
+    lease_calls = []
+
+    def flaky_extend_leases(*args):
+        lease_calls.append(args)
+        if len(lease_calls) == 1:
+            raise ConnectionError("database restarting")
+        extend_leases(*args)
+
+    monkeypatch.setattr(queue, "extend_leases", flaky_extend_leases)
+    responses = canned_responses(3)
+    pool = AgentPool({name: lambda factory=factory: replay_agent(factory(), responses, 0.05, 0) for name, factory in AGENT_FACTORIES.items()})
+    workflows = []
+
+    def factory(job, agent_pool):
+        workflows.append(default_workflow_factory(job, agent_pool, db_url=f"sqlite:///{tmp_path / 'sessions.db'}"))
+        return workflows[-1]
+
+    service = WorkerService(queue, factory, max_workers=1, agent_pool=pool, poll_seconds=0.01, lease_seconds=0.3)
+    assert service.drain().completed == 1 and len(lease_calls) > 1
+    assert isinstance(workflows[0].storage, SqliteWorkflowStorage)
@@ -2,6 +2,7 @@ from datetime import datetime
 from phi.run.response import RunEvent
 
 # Import from local module
+from storage import MemoryWorkflowStorage
 from workflow import EnhancedProductManagerWorkflow
 
 # Sample meeting notes
@@ -0,0 +1,42 @@
+from conftest import make_task
+from workflow import TeamMember
+from workload import balance_tasks
+
+
+TEAM = [
+    TeamMember(name="Mike", role="Backend Developer", capacity=35, remaining_capacity=35),
+    TeamMember(name="Emma", role="Frontend Developer", capacity=40, remaining_capacity=40),
+    TeamMember(name="Alex", role="DevOps Engineer", capacity=10, remaining_capacity=10, skills=["Prometheus"]),
+]
+
+
+def test_greedy_matches_skills_to_roles():
+    tasks = [
+        make_task("Auth service", 20, skills=["Backend"]),
+        make_task("Dashboard redesign", 16, skills=["Frontend", "React"]),
+        make_task("Monitoring", 8, skills=["Prometheus"]),
+    ]
+    report = balance_tasks(tasks, TEAM)
+
+    assert [task.task_assignee for task in tasks] == ["Mike", "Emma", "Alex"]
+    assert report.remaining_capacity == {"Mike": 15, "Emma": 24, "Alex": 2}
+    assert report.overallocations == []
+
+
+def test_greedy_spills_over_and_reports_overallocation():
+    tasks = [make_task(f"Backend task {i}", 12, skills=["Backend"]) for i in range(3)]
+    tasks.append(make_task("Existing work", 12, assignee="Alex"))
+    report = balance_tasks(tasks, TEAM)
+
+    assert [task.task_assignee for task in tasks[:3]] == ["Mike", "Mike", "Emma"]
+    assert [(o.member, o.over_by) for o in report.overallocations] == [("Alex", 2)]
+
+
+def test_min_cost_spreads_load_and_is_deterministic():
+    tasks = [make_task(f"Task {i}", 6 + i) for i in range(8)]
+    first = balance_tasks(tasks, TEAM, strategy="min_cost", keep_existing=False)
+    second = balance_tasks(tasks, TEAM, strategy="min_cost", keep_existing=False)
+
+    assert first == second
+    assert len(first.assignments) == len(tasks)
+    assert first.overallocations == []
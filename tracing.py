@@ -0,0 +1,226 @@
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Counters every stage span reports, even when zero
+SPAN_COUNTERS = ("prompt_tokens", "completion_tokens", "retries", "requests", "payload_bytes")
+
+# Histogram buckets (seconds) for stage and storage latency
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("pm_current_span", default=None)
+
+
+class Span:
+    """Timing and counters of one traced operation, such as a workflow stage or a storage write"""
+
+    __slots__ = ("name", "kind", "run_id", "session_id", "started_at", "duration_seconds", "status", "error", "counters", "_lock")
+
+    def __init__(self, name: str, kind: str = "stage", run_id: Optional[str] = None, session_id: Optional[str] = None):
+        self.name = name
+        self.kind = kind
+        self.run_id = run_id
+        self.session_id = session_id
+        self.started_at = time.time()
+        self.duration_seconds = 0.0
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, counter: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "span": self.name,
+            "kind": self.kind,
+            "run_id": self.run_id,
+            "session_id": self.session_id,
+            "started_at": self.started_at,
+            "duration_seconds": self.duration_seconds,
+            "status": self.status,
+            "error": self.error,
+            **{counter: self.counters.get(counter, 0) for counter in SPAN_COUNTERS},
+            **{k: v for k, v in self.counters.items() if k not in SPAN_COUNTERS},
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def record(counter: str, value: float = 1) -> None:
+    """Add to a counter of the span active in this context; a no-op outside of traced code"""
+    span = _current_span.get()
+    if span is not None:
+        span.add(counter, value)
+
+
+def record_usage(metrics: Optional[Dict[str, Any]]) -> None:
+    """Record the prompt and completion tokens of an agent RunResponse's metrics"""
+    span = _current_span.get()
+    if span is None or not metrics:
+        return
+    prompt = metrics.get("prompt_tokens") or metrics.get("input_tokens") or []
+    completion = metrics.get("completion_tokens") or metrics.get("output_tokens") or []
+    span.add("prompt_tokens", sum(prompt) if isinstance(prompt, list) else prompt)
+    span.add("completion_tokens", sum(completion) if isinstance(completion, list) else completion)
+
+
+def propagate(func: Callable) -> Callable:
+    """Wrap `func` so it runs in a copy of the caller's context, e.g. when submitted to a thread pool"""
+    context = copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
+
+
+class LogExporter:
+    """Emits every finished span as one JSON line on the `pm_agent.tracing` logger"""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger("pm_agent.tracing")
+        self.level = level
+
+    def export(self, span: Span) -> None:
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps(span.to_record(), default=str))
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _labels(labels: Sequence[Tuple[str, str]]) -> str:
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+class PrometheusExporter:
+    """Aggregates spans into Prometheus metrics, rendered in the text exposition format
+
+    Span latency becomes `pm_span_duration_seconds` histograms and span counters become
+    `pm_span_<counter>_total` counters, all labelled by span kind and name.
+    """
+
+    def __init__(self, namespace: str = "pm"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], _Histogram] = {}
+        self._spans: Dict[Tuple[str, str, str], int] = {}
+        self._counters: Dict[Tuple[str, str, str], float] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def export(self, span: Span) -> None:
+        key = (span.kind, span.name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(span.duration_seconds)
+            status_key = (span.kind, span.name, span.status)
+            self._spans[status_key] = self._spans.get(status_key, 0) + 1
+            for counter, value in span.counters.items():
+                counter_key = (span.kind, span.name, counter)
+                self._counters[counter_key] = self._counters.get(counter_key, 0) + value
+
+    def render(self) -> str:
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_span_duration_seconds Duration of workflow stages and storage operations",
+            f"# TYPE {ns}_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (kind, name), histogram in sorted(self._histograms.items()):
+                base = [("kind", kind), ("span", name)]
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{ns}_span_duration_seconds_bucket{_labels(base + [('le', repr(bound))])} {cumulative}")
+                lines.append(f"{ns}_span_duration_seconds_bucket{_labels(base + [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{ns}_span_duration_seconds_sum{_labels(base)} {histogram.total}")
+                lines.append(f"{ns}_span_duration_seconds_count{_labels(base)} {histogram.count}")
+
+            lines += [f"# HELP {ns}_spans_total Finished spans by status", f"# TYPE {ns}_spans_total counter"]
+            for (kind, name, status), count in sorted(self._spans.items()):
+                lines.append(f"{ns}_spans_total{_labels([('kind', kind), ('span', name), ('status', status)])} {count}")
+
+            by_counter: Dict[str, List[Tuple[str, str, float]]] = {}
+            for (kind, name, counter), value in self._counters.items():
+                by_counter.setdefault(counter, []).append((kind, name, value))
+            for counter in sorted(by_counter):
+                metric = f"{ns}_span_{counter}_total"
+                lines += [f"# HELP {metric} Sum of {counter} recorded by spans", f"# TYPE {metric} counter"]
+                for kind, name, value in sorted(by_counter[counter]):
+                    lines.append(f"{metric}{_labels([('kind', kind), ('span', name)])} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve the metrics at /metrics from a background thread"""
+        self._server = serve_metrics(self.render, port, host)
+        return self._server
+
+
+def serve_metrics(render: Callable[[], str], port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve the text returned by `render` at /metrics from a background thread"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render().encode("utf-8")
+            self.send_response(200 if self.path.startswith("/metrics") else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Tracer:
+    """Creates spans and hands each finished span to the exporters
+
+    Counters recorded with `record` while a span is active (in the same thread, or in threads
+    started through `propagate`) are added to that span.
+    """
+
+    def __init__(self, exporters: Optional[Sequence[Any]] = None):
+        self.exporters = list(exporters) if exporters is not None else [LogExporter()]
+
+    @contextmanager
+    def span(self, name: str, kind: str = "stage", run_id: Optional[str] = None, session_id: Optional[str] = None) -> Iterator[Span]:
+        span = Span(name, kind, run_id, session_id)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = str(e)
+            raise
+        finally:
+            span.duration_seconds = time.perf_counter() - started
+            _current_span.reset(token)
+            for exporter in self.exporters:
+                exporter.export(span)
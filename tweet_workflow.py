@@ -1,9 +1,11 @@
-from typing import List
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
 from phi.workflow.workflow import Workflow
 from phi.agent.agent import Agent
 from phi.run.response import RunResponse
 
+from routing import ModelCall, ModelRouter, run_agent
+
 class Tweet(BaseModel):
     text: str
     hashtags: List[str]
@@ -26,6 +28,9 @@ class TweetGeneratorWorkflow(Workflow):
         ],
         response_model=TweetList,
     )
+    # Routes the agent to its configured models; see routing.py
+    model_router: Optional[ModelRouter] = None
+    model_calls: List[ModelCall] = Field(default_factory=list)
 
     def run(self) -> RunResponse:
         """Generate tweets about the project"""
@@ -47,7 +52,11 @@ class TweetGeneratorWorkflow(Workflow):
             - Makes project planning more efficient
             """
 
-            response = self.tweet_agent.run(
+            self.model_calls = []
+            response = run_agent(
+                self.model_router,
+                "tweet_agent",
+                self.tweet_agent,
                 f"""
                 Project Description:
                 {project_description}
@@ -55,7 +64,8 @@ class TweetGeneratorWorkflow(Workflow):
                 Please generate 3 engaging tweets about this project.
                 Each tweet should focus on different aspects and benefits.
                 Include relevant hashtags for tech and business audiences.
-                """
+                """,
+                self.model_calls,
             )
             
             if response and response.content:
@@ -0,0 +1,586 @@
+import sys
+import json
+import time
+import uuid
+import argparse
+import functools
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+try:
+    from sqlalchemy import (
+        JSON,
+        Column,
+        DateTime,
+        Index,
+        Integer,
+        MetaData,
+        String,
+        Table,
+        Text,
+        and_,
+        exists,
+        func,
+        select,
+        update,
+    )
+    from sqlalchemy.engine import Engine
+except ImportError:
+    raise ImportError("`sqlalchemy` not installed. Please install it with `pip install sqlalchemy`")
+
+from phi.agent.agent import Agent
+from phi.memory.agent import AgentMemory
+from phi.run.response import RunEvent, RunResponse
+from phi.utils.log import logger
+
+from batch import BatchItem, BatchResult, BatchStats, BatchSummary, StageLatency, _stage_latency, load_meetings
+from resilience import default_resilience
+from routing import default_router
+from storage import get_engine, workflow_storage
+from tracing import _labels, serve_metrics
+from workflow import AGENT_FACTORIES, EnhancedProductManagerWorkflow
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+
+
+class Job(BaseModel):
+    id: int = Field(..., description="Job id, in enqueue order")
+    tenant: str = Field(..., description="Team the job belongs to")
+    session_id: str = Field(..., description="Workflow session the meeting runs in")
+    item: BatchItem = Field(..., description="The meeting to process")
+    status: str = Field(..., description="queued, running, completed or failed")
+    attempts: int = Field(0, description="Times the job has been claimed")
+    max_attempts: int = Field(3, description="Claims after which a failing job is given up")
+    run_id: Optional[str] = Field(None, description="Workflow run of the last attempt, resumed by the next one")
+    error: Optional[str] = Field(None, description="Error of the last failed attempt")
+    enqueued_at: datetime = Field(..., description="When the job was enqueued")
+    started_at: Optional[datetime] = Field(None, description="When the last attempt started")
+    finished_at: Optional[datetime] = Field(None, description="When the job completed or was given up")
+
+
+class JobQueue:
+    """Queue of workflow jobs in a database table, shared by any number of worker processes
+
+    Jobs are claimed with `SELECT ... FOR UPDATE SKIP LOCKED` on Postgres, so concurrent workers
+    never block on or double-claim a job (SQLite serializes the claims instead). A claimed job holds
+    a lease that its worker keeps extending; jobs whose lease runs out, because their worker died, are
+    queued again. Jobs of one session never run concurrently, so they do not race on its state.
+    """
+
+    def __init__(
+        self,
+        db_url: Optional[str] = None,
+        db_engine: Optional[Engine] = None,
+        table_name: str = "pm_jobs",
+        schema: Optional[str] = None,
+        create_tables: bool = True,
+    ):
+        self.engine = db_engine or get_engine(db_url)
+        self.jobs = Table(
+            table_name,
+            MetaData(schema=schema),
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("tenant", String(255), nullable=False),
+            Column("session_id", String(255), nullable=False),
+            Column("payload", JSON, nullable=False),
+            Column("status", String(32), nullable=False, default="queued"),
+            Column("attempts", Integer, nullable=False, default=0),
+            Column("max_attempts", Integer, nullable=False, default=3),
+            Column("run_id", String(64)),
+            Column("worker_id", String(64)),
+            Column("lease_until", DateTime),
+            Column("error", Text),
+            Column("enqueued_at", DateTime, nullable=False),
+            Column("started_at", DateTime),
+            Column("finished_at", DateTime),
+            Index(f"ix_{table_name}_status_tenant", "status", "tenant", "id"),
+            Index(f"ix_{table_name}_session_status", "session_id", "status"),
+        )
+        if create_tables:
+            self.jobs.metadata.create_all(self.engine)
+
+    def _job(self, row: Any) -> Job:
+        data = dict(row._mapping)
+        return Job(item=BatchItem(**data.pop("payload")), **{k: v for k, v in data.items() if k in Job.model_fields})
+
+    def enqueue(self, item: BatchItem, tenant: str, max_attempts: int = 3) -> int:
+        """Add a meeting to the queue; it runs in `item.session_id`, or the tenant's own session"""
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                self.jobs.insert().values(
+                    tenant=tenant,
+                    session_id=item.session_id or tenant,
+                    payload=item.model_dump(mode="json"),
+                    status="queued",
+                    attempts=0,
+                    max_attempts=max_attempts,
+                    enqueued_at=datetime.now(),
+                )
+            )
+        return result.inserted_primary_key[0]
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self.engine.connect() as connection:
+            row = connection.execute(select(self.jobs).where(self.jobs.c.id == job_id)).first()
+        return self._job(row) if row is not None else None
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of jobs by status and tenant"""
+        counts: Dict[str, Dict[str, int]] = {status: {} for status in JOB_STATUSES}
+        with self.engine.connect() as connection:
+            for status, tenant, count in connection.execute(
+                select(self.jobs.c.status, self.jobs.c.tenant, func.count()).group_by(self.jobs.c.status, self.jobs.c.tenant)
+            ):
+                counts.setdefault(status, {})[tenant] = count
+        return counts
+
+    def claim(self, tenant: str, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """Claim the tenant's oldest queued job whose session has no job running
+
+        On Postgres two workers could both see a session idle and claim one of its jobs each, so the
+        claim takes a transaction-level advisory lock on the session and checks again once it holds
+        it. A session locked by another claim is left for the next poll.
+        """
+        queued, running = self.jobs.alias("queued"), self.jobs.alias("running")
+        candidate = (
+            select(queued.c.id)
+            .where(
+                queued.c.status == "queued",
+                queued.c.tenant == tenant,
+                ~exists().where(and_(running.c.session_id == queued.c.session_id, running.c.status == "running")),
+            )
+            .order_by(queued.c.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        now = datetime.now()
+        with self.engine.begin() as connection:
+            if self.engine.dialect.name == "postgresql":
+                picked = connection.execute(candidate.add_columns(queued.c.session_id)).first()
+                if picked is None or not self._lock_session(connection, picked.session_id):
+                    return None
+                job_id: Any = picked.id
+            else:
+                # SQLite runs the whole claim as one serialized write
+                job_id = candidate.scalar_subquery()
+            row = connection.execute(
+                update(self.jobs)
+                .where(self.jobs.c.id == job_id, self.jobs.c.status == "queued")
+                .values(
+                    status="running",
+                    attempts=self.jobs.c.attempts + 1,
+                    worker_id=worker_id,
+                    started_at=now,
+                    lease_until=now + timedelta(seconds=lease_seconds),
+                )
+                .returning(*self.jobs.c)
+            ).first()
+        return self._job(row) if row is not None else None
+
+    def _lock_session(self, connection, session_id: str) -> bool:
+        """Take the session's advisory lock for the transaction; False if it is held or a session job runs"""
+        key = func.hashtext(f"{self.jobs.name}:{session_id}")
+        if not connection.execute(select(func.pg_try_advisory_xact_lock(key))).scalar():
+            return False
+        # Read after taking the lock, so a claim committed meanwhile is seen
+        return not connection.execute(
+            select(exists().where(self.jobs.c.session_id == session_id, self.jobs.c.status == "running"))
+        ).scalar()
+
+    def _owned(self, job_id: int, worker_id: str):
+        # A worker whose lease ran out no longer owns the job, which may have been claimed again
+        return update(self.jobs).where(
+            self.jobs.c.id == job_id, self.jobs.c.worker_id == worker_id, self.jobs.c.status == "running"
+        )
+
+    def complete(self, job_id: int, run_id: Optional[str], worker_id: str) -> bool:
+        """Mark a job completed; False if `worker_id` no longer holds it"""
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                self._owned(job_id, worker_id).values(
+                    status="completed", run_id=run_id, error=None, finished_at=datetime.now(), lease_until=None
+                )
+            )
+        return result.rowcount > 0
+
+    def fail(self, job: Job, error: str, run_id: Optional[str], worker_id: str) -> bool:
+        """Queue a failed job again, keeping its run id to resume, or give it up after max_attempts
+
+        Returns whether the job will be retried, which is never when `worker_id` no longer holds it.
+        """
+        retry = job.attempts < job.max_attempts
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                self._owned(job.id, worker_id).values(
+                    status="queued" if retry else "failed",
+                    run_id=run_id,
+                    error=error,
+                    worker_id=None,
+                    lease_until=None,
+                    finished_at=None if retry else datetime.now(),
+                )
+            )
+        return retry and result.rowcount > 0
+
+    def extend_leases(self, worker_id: str, lease_seconds: float) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(self.jobs)
+                .where(self.jobs.c.worker_id == worker_id, self.jobs.c.status == "running")
+                .values(lease_until=datetime.now() + timedelta(seconds=lease_seconds))
+            )
+
+    def requeue_expired(self) -> int:
+        """Queue again the running jobs whose lease ran out, or give them up after max_attempts
+
+        Returns the number of jobs queued again.
+        """
+        now = datetime.now()
+        expired = and_(self.jobs.c.status == "running", self.jobs.c.lease_until < now)
+        with self.engine.begin() as connection:
+            failed = connection.execute(
+                update(self.jobs)
+                .where(expired, self.jobs.c.attempts >= self.jobs.c.max_attempts)
+                .values(status="failed", worker_id=None, lease_until=None, error="Lease expired", finished_at=now)
+            ).rowcount
+            requeued = connection.execute(
+                update(self.jobs)
+                .where(expired)
+                .values(status="queued", worker_id=None, lease_until=None, error="Lease expired")
+            ).rowcount
+        if requeued:
+            logger.warning(f"Requeued {requeued} jobs whose worker stopped responding")
+        if failed:
+            logger.warning(f"Gave up {failed} jobs whose worker stopped responding after their last attempt")
+        return requeued
+
+
+class AgentPool:
+    """Idle workflow agents by name, reused across jobs instead of being built (with their tools) per run
+
+    Agents go back to the pool with a fresh memory. At most `max_idle` agents are kept per name.
+    """
+
+    def __init__(self, factories: Optional[Dict[str, Callable[[], Agent]]] = None, max_idle: int = 8):
+        self.factories = factories or AGENT_FACTORIES
+        self.max_idle = max_idle
+        self.built = 0
+        self.reused = 0
+        self._idle: Dict[str, List[Agent]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, name: str) -> Agent:
+        with self._lock:
+            idle = self._idle.get(name)
+            if idle:
+                self.reused += 1
+                return idle.pop()
+            self.built += 1
+        return self.factories[name]()
+
+    def release(self, name: str, agent: Agent) -> None:
+        agent.memory = AgentMemory()
+        agent.run_id = agent.run_input = agent.run_response = None
+        agent.session_state = {}
+        with self._lock:
+            idle = self._idle.setdefault(name, [])
+            if len(idle) < self.max_idle:
+                idle.append(agent)
+
+    def release_workflow(self, workflow: EnhancedProductManagerWorkflow) -> None:
+        """Return the agents a finished workflow checked out"""
+        for name in self.factories:
+            agent = getattr(workflow, name, None)
+            if agent is not None:
+                setattr(workflow, name, None)
+                self.release(name, agent)
+
+    def warm(self, names: Optional[List[str]] = None, count: int = 1) -> None:
+        """Build agents ahead of the first jobs"""
+        for name in names or list(self.factories):
+            agents = [self.acquire(name) for _ in range(count)]
+            for agent in agents:
+                self.release(name, agent)
+
+
+class WorkerMetrics(BaseModel):
+    queue_depth: Dict[str, int] = Field(default_factory=dict, description="Queued jobs by tenant")
+    running: Dict[str, int] = Field(default_factory=dict, description="Running jobs by tenant, across workers")
+    retries: int = Field(0, description="Failed attempts queued again by this worker")
+    queue_wait: Optional[StageLatency] = Field(None, description="Time from enqueue to the start of an attempt")
+    runs: BatchSummary = Field(..., description="Throughput and latency of the jobs this worker ran")
+    agents_built: int = Field(0, description="Agents built by the agent pool")
+    agents_reused: int = Field(0, description="Agents taken warm from the agent pool")
+
+
+def default_workflow_factory(
+    job: Job, agent_pool: AgentPool, db_url: Optional[str] = None
+) -> EnhancedProductManagerWorkflow:
+    """Build a workflow for a job, on pooled agents and the shared session storage
+
+    Sessions and checkpoints are stored at `db_url` (default: DB_URL), so a retried job resumes its run.
+    """
+    backend = "sqlite" if db_url and db_url.startswith("sqlite") else None
+    return EnhancedProductManagerWorkflow(
+        session_id=job.session_id,
+        storage=workflow_storage("enhanced_pm_workflows", backend=backend, db_url=db_url),
+        concurrent_stages=True,
+        agent_pool=agent_pool,
+        model_router=default_router(),
+        resilience=default_resilience(),
+    )
+
+
+class WorkerService:
+    """Long-running worker that pulls jobs from a JobQueue and runs them on a thread pool
+
+    Free workers are handed out one job at a time to the tenant with the fewest running jobs, least
+    recently served first, so a tenant with a deep backlog cannot starve the others. No tenant runs
+    more than its cap (`tenant_caps`, else `tenant_cap`) of jobs at once across all workers sharing
+    the queue. Failed attempts are queued again and resume their run from its checkpoints.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        workflow_factory: Callable[[Job, AgentPool], EnhancedProductManagerWorkflow] = default_workflow_factory,
+        max_workers: int = 4,
+        tenant_cap: int = 2,
+        tenant_caps: Optional[Dict[str, int]] = None,
+        agent_pool: Optional[AgentPool] = None,
+        poll_seconds: float = 0.5,
+        lease_seconds: float = 900.0,
+        worker_id: Optional[str] = None,
+    ):
+        self.queue = queue
+        self.workflow_factory = workflow_factory
+        self.max_workers = max_workers
+        self.tenant_cap = tenant_cap
+        self.tenant_caps = tenant_caps or {}
+        self.agent_pool = agent_pool or AgentPool(max_idle=max_workers)
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"worker-{uuid.uuid4().hex[:12]}"
+        self.stats = BatchStats()
+        self.retries = 0
+        self._waits: List[float] = []
+        self._last_served: Dict[str, float] = {}
+        self._in_flight: Dict[Future, Job] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _cap(self, tenant: str) -> int:
+        return self.tenant_caps.get(tenant, self.tenant_cap)
+
+    def _dispatch(self, executor: ThreadPoolExecutor) -> int:
+        """Claim jobs for the free workers, fairly across tenants; returns the number claimed"""
+        free = self.max_workers - len(self._in_flight)
+        if free <= 0:
+            return 0
+        counts = self.queue.counts()
+        queued, running = counts["queued"], dict(counts["running"])
+        claimed = 0
+        while free > 0:
+            eligible = [tenant for tenant in queued if running.get(tenant, 0) < self._cap(tenant)]
+            if not eligible:
+                break
+            tenant = min(eligible, key=lambda t: (running.get(t, 0), self._last_served.get(t, 0.0)))
+            job = self.queue.claim(tenant, self.worker_id, self.lease_seconds)
+            if job is None:
+                del queued[tenant]
+                continue
+            running[tenant] = running.get(tenant, 0) + 1
+            self._last_served[tenant] = time.monotonic()
+            self._in_flight[executor.submit(self._run_job, job)] = job
+            free -= 1
+            claimed += 1
+        return claimed
+
+    def _run_job(self, job: Job) -> None:
+        started = time.perf_counter()
+        with self._lock:
+            self._waits.append((job.started_at - job.enqueued_at).total_seconds())
+        workflow: Optional[EnhancedProductManagerWorkflow] = None
+        response: Optional[RunResponse] = None
+        error: Optional[str] = None
+        try:
+            workflow = self.workflow_factory(job, self.agent_pool)
+            if job.run_id is not None:
+                try:
+                    response = workflow.resume(job.run_id)
+                except ValueError:
+                    logger.info(f"No checkpoint for run {job.run_id} of job {job.id}, starting over")
+            if response is None:
+                response = workflow.run(
+                    meeting_notes=job.item.meeting_notes,
+                    linear_users=job.item.linear_users,
+                    team_capacity=job.item.team_capacity,
+                )
+            if response is None or response.event != RunEvent.workflow_completed:
+                error = str(response.content) if response is not None else "Workflow returned no response"
+        except Exception as e:
+            logger.error(f"Error running job {job.id}: {e}")
+            error = str(e)
+        finally:
+            if workflow is not None:
+                self.agent_pool.release_workflow(workflow)
+
+        run_id = response.run_id if response is not None else (workflow.run_id if workflow is not None else None)
+        if error is None:
+            if not self.queue.complete(job.id, run_id, self.worker_id):
+                logger.warning(f"Lease of job {job.id} ran out before it completed, leaving it to its new worker")
+        elif self.queue.fail(job, error, run_id, self.worker_id):
+            with self._lock:
+                self.retries += 1
+        self.stats.record(
+            BatchResult(
+                meeting_id=job.item.meeting_id,
+                status="completed" if error is None else "failed",
+                event=response.event if response is not None else None,
+                error=error,
+                latency_seconds=time.perf_counter() - started,
+                stage_seconds=dict(workflow.stage_timings) if workflow is not None else {},
+            )
+        )
+
+    def _loop(self, drain: bool) -> None:
+        last_lease = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pm-worker") as executor:
+            while not self._stopping.is_set():
+                if time.monotonic() - last_lease > self.lease_seconds / 3:
+                    try:
+                        self.queue.extend_leases(self.worker_id, self.lease_seconds)
+                        self.queue.requeue_expired()
+                        last_lease = time.monotonic()
+                    except Exception as e:
+                        logger.error(f"Error extending leases: {e}")
+                try:
+                    claimed = self._dispatch(executor)
+                except Exception as e:
+                    logger.error(f"Error claiming jobs: {e}")
+                    claimed = 0
+                if not self._in_flight:
+                    if drain and not claimed:
+                        break
+                    self._stopping.wait(self.poll_seconds)
+                    continue
+                done, _ = wait(list(self._in_flight), timeout=self.poll_seconds, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._in_flight.pop(future)
+            wait(list(self._in_flight))
+            self._in_flight.clear()
+
+    def start(self) -> "WorkerService":
+        """Process jobs from a background thread until `stop`"""
+        self._thread = threading.Thread(target=self._loop, args=(False,), name="pm-worker-dispatch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop claiming jobs and wait for the running ones to finish"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def drain(self) -> BatchSummary:
+        """Process jobs until the queue has none this worker can claim"""
+        self._stopping.clear()
+        self._loop(drain=True)
+        return self.stats.summary()
+
+    def metrics(self) -> WorkerMetrics:
+        counts = self.queue.counts()
+        with self._lock:
+            waits = list(self._waits)
+            retries = self.retries
+        return WorkerMetrics(
+            queue_depth=counts["queued"],
+            running=counts["running"],
+            retries=retries,
+            queue_wait=_stage_latency(waits) if waits else None,
+            runs=self.stats.summary(),
+            agents_built=self.agent_pool.built,
+            agents_reused=self.agent_pool.reused,
+        )
+
+    def render_metrics(self, namespace: str = "pm") -> str:
+        """Worker metrics in the Prometheus text exposition format"""
+        metrics = self.metrics()
+        ns = f"{namespace}_worker"
+        lines = [f"# HELP {ns}_queue_depth Queued jobs by tenant", f"# TYPE {ns}_queue_depth gauge"]
+        lines += [f"{ns}_queue_depth{_labels([('tenant', t)])} {n}" for t, n in sorted(metrics.queue_depth.items())]
+        lines += [f"# HELP {ns}_running_jobs Running jobs by tenant", f"# TYPE {ns}_running_jobs gauge"]
+        lines += [f"{ns}_running_jobs{_labels([('tenant', t)])} {n}" for t, n in sorted(metrics.running.items())]
+        lines += [f"# HELP {ns}_jobs_total Jobs run by this worker by outcome", f"# TYPE {ns}_jobs_total counter"]
+        lines.append(f"{ns}_jobs_total{_labels([('status', 'completed')])} {metrics.runs.completed}")
+        lines.append(f"{ns}_jobs_total{_labels([('status', 'failed')])} {metrics.runs.failed}")
+        lines.append(f"{ns}_jobs_total{_labels([('status', 'retried')])} {metrics.retries}")
+        lines += [f"# HELP {ns}_jobs_per_minute Job throughput", f"# TYPE {ns}_jobs_per_minute gauge"]
+        lines.append(f"{ns}_jobs_per_minute {metrics.runs.meetings_per_minute:g}")
+        for name, latency in (("job_seconds", metrics.runs.latency), ("queue_wait_seconds", metrics.queue_wait)):
+            lines += [f"# HELP {ns}_{name} Job latency quantiles", f"# TYPE {ns}_{name} summary"]
+            if latency is not None:
+                lines.append(f"{ns}_{name}{_labels([('quantile', '0.5')])} {latency.p50_seconds:g}")
+                lines.append(f"{ns}_{name}{_labels([('quantile', '0.95')])} {latency.p95_seconds:g}")
+                lines.append(f"{ns}_{name}_count {latency.count}")
+        lines += [f"# HELP {ns}_agents_total Agents built or reused by the pool", f"# TYPE {ns}_agents_total counter"]
+        lines.append(f"{ns}_agents_total{_labels([('source', 'built')])} {metrics.agents_built}")
+        lines.append(f"{ns}_agents_total{_labels([('source', 'reused')])} {metrics.agents_reused}")
+        return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run queued PM workflow jobs for many tenants")
+    parser.add_argument("--db-url", default=None, help="Database holding the job queue (default: DB_URL)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    enqueue = commands.add_parser("enqueue", help="Queue the meetings of a JSONL file for a tenant")
+    enqueue.add_argument("meetings", help="JSONL file with one meeting per line, or - for stdin")
+    enqueue.add_argument("--tenant", required=True, help="Team the meetings belong to")
+    enqueue.add_argument("--max-attempts", type=int, default=3, help="Attempts before a failing job is given up")
+    serve = commands.add_parser("serve", help="Process queued jobs until interrupted")
+    serve.add_argument("--workers", type=int, default=4, help="Jobs processed concurrently")
+    serve.add_argument("--tenant-cap", type=int, default=2, help="Jobs of one tenant running at once")
+    serve.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port")
+    serve.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        # Size the shared pool before the queue and the workflows' storage open connections on it
+        get_engine(args.db_url, pool_size=args.workers + 2, max_overflow=0)
+    queue = JobQueue(db_url=args.db_url)
+    if args.command == "enqueue":
+        ids = [
+            queue.enqueue(BatchItem(**meeting), args.tenant, max_attempts=args.max_attempts)
+            for meeting in load_meetings(args.meetings)
+        ]
+        print(json.dumps({"tenant": args.tenant, "queued": len(ids)}))
+        return 0
+
+    workflow_factory = functools.partial(default_workflow_factory, db_url=args.db_url)
+    service = WorkerService(queue, workflow_factory, max_workers=args.workers, tenant_cap=args.tenant_cap)
+    if args.metrics_port is not None:
+        serve_metrics(service.render_metrics, args.metrics_port)
+    if args.drain:
+        summary = service.drain()
+        print(summary.model_dump_json(indent=2), file=sys.stderr)
+        return 0 if summary.failed == 0 else 1
+    service.start()
+    try:
+        while True:
+            time.sleep(60)
+            logger.info(service.metrics().model_dump_json())
+    except KeyboardInterrupt:
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    sys.exit(main())
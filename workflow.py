@@ -1,17 +1,35 @@
 import os
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
-from typing import List, Optional, Dict, Literal
-from pydantic import BaseModel, Field
+from typing import Any, Callable, Generator, Iterator, List, Optional, Dict, Literal, Tuple, Union, get_type_hints
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
 from phi.run.response import RunEvent, RunResponse
-from phi.tools.linear_tools import LinearTool
-from phi.tools.slack import SlackTools
-from phi.tools.github import GithubTools
 from phi.agent.agent import Agent
+from phi.memory.agent import AgentMemory
 from phi.workflow.workflow import Workflow
-from phi.storage.workflow.postgres import PgWorkflowStorage
 from phi.utils.log import logger
 
+from cache import ResultCache, agent_model_id, cache_key, normalize_notes, notes_digest
+from dedup import TaskIndex, TaskMatch
+from dependencies import TaskGraph, task_key
+from github_client import GithubIssueResult, GithubIssueWriter
+from history import TaskHistory
+from linear_client import LinearClient, issue_identifier
+from notifications import NotificationQueue, render_meeting_update
+from prompt_encoding import PromptEncoder
+from resilience import Resilience, ResiliencePolicy, check_abandoned, default_resilience, stop_when_abandoned
+from routing import ModelCall, ModelRouter, default_router, run_agent
+from streaming import stream_items, type_adapter
+from summarization import DEFAULT_CHUNK_CHARS, merge_summaries, split_transcript, transcript_preamble
+from tracing import Span, Tracer, propagate, record, record_usage
+from workload import WorkloadReport, balance_tasks
+
 
 class TaskPriority(BaseModel):
     level: Literal["Low", "Medium", "High", "Critical"] = Field(..., description="Priority level of the task")
@@ -25,17 +43,6 @@ class MeetingContext(BaseModel):
     follow_ups: List[str] = Field(default_factory=list, description="Items requiring follow-up")
 
 
-class MeetingSummary(BaseModel):
-    date: datetime = Field(..., description="Date of the meeting")
-    attendees: List[str] = Field(..., description="List of attendees")
-    key_points: List[str] = Field(..., description="Key points discussed")
-    action_items: List[Task] = Field(..., description="Action items from the meeting")
-    decisions: List[str] = Field(..., description="Key decisions made")
-    context: MeetingContext = Field(default_factory=MeetingContext, description="Additional meeting context")
-    duration_minutes: Optional[int] = Field(None, description="Duration of the meeting")
-    meeting_type: Optional[str] = Field(None, description="Type of meeting (standup, planning, review, etc.)")
-
-
 class TaskTimeEstimate(BaseModel):
     minimum_hours: float = Field(..., description="Minimum estimated hours")
     maximum_hours: float = Field(..., description="Maximum estimated hours")
@@ -65,12 +72,24 @@ class Task(BaseModel):
     )
 
 
+class MeetingSummary(BaseModel):
+    date: datetime = Field(..., description="Date of the meeting")
+    attendees: List[str] = Field(..., description="List of attendees")
+    key_points: List[str] = Field(..., description="Key points discussed")
+    action_items: List[Task] = Field(..., description="Action items from the meeting")
+    decisions: List[str] = Field(..., description="Key decisions made")
+    context: MeetingContext = Field(default_factory=MeetingContext, description="Additional meeting context")
+    duration_minutes: Optional[int] = Field(None, description="Duration of the meeting")
+    meeting_type: Optional[str] = Field(None, description="Type of meeting (standup, planning, review, etc.)")
+
+
 class TeamMember(BaseModel):
     name: str = Field(..., description="Name of the team member")
     role: str = Field(..., description="Role of the team member")
     current_tasks: int = Field(default=0, description="Number of current tasks")
     capacity: float = Field(..., description="Weekly capacity in hours")
     remaining_capacity: float = Field(..., description="Remaining capacity in hours")
+    skills: List[str] = Field(default_factory=list, description="Skills of the team member")
 
 
 class LinearIssue(BaseModel):
@@ -90,10 +109,66 @@ class TaskList(BaseModel):
     tasks: List[Task] = Field(..., description="A list of tasks")
 
 
-class EnhancedProductManagerWorkflow(Workflow):
-    description: str = "Enhanced workflow for managing tasks, team capacity, and project progress with integrations."
+class MeetingPlan(BaseModel):
+    summary: MeetingSummary = Field(..., description="Structured summary of the meeting")
+    tasks: List[Task] = Field(..., description="Detailed tasks generated from the meeting")
+
+    @model_validator(mode="after")
+    def check_tasks(self) -> "MeetingPlan":
+        if not self.tasks:
+            raise ValueError("A meeting plan needs at least one task")
+        return self
+
+    def split(self) -> Tuple[MeetingSummary, TaskList]:
+        """The summary and task list the two-call path would have produced"""
+        # The fused agent may leave the summary's action items out rather than write every task twice
+        summary = self.summary
+        if not summary.action_items:
+            summary = summary.model_copy(update={"action_items": list(self.tasks)})
+        return summary, TaskList(tasks=self.tasks)
+
+
+# phi's RunEvent has no failure event, so failed runs report this one
+WORKFLOW_FAILED = "WorkflowFailed"
+
 
-    meeting_summary_agent: Agent = Agent(
+class StageCancelled(RuntimeError):
+    pass
+
+
+# Set while a stage runs on the concurrent path; its timeout sets the event so the stage stops
+_stage_cancelled: ContextVar[Optional[threading.Event]] = ContextVar("stage_cancelled", default=None)
+
+
+def _check_cancelled() -> None:
+    cancelled = _stage_cancelled.get()
+    if cancelled is not None and cancelled.is_set():
+        raise StageCancelled("Stage was abandoned after its timeout")
+
+
+def timed_stage(func):
+    """Record the wall-clock duration of a workflow stage in `stage_timings`, and trace it if a tracer is set
+
+    Stages report failures by returning None or False, which marks their span as failed.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with self._trace(func.__name__) as span:
+                result = func(self, *args, **kwargs)
+                if span is not None and (result is None or result is False):
+                    span.status = "failed"
+                return result
+        finally:
+            self.stage_timings[func.__name__] = time.perf_counter() - started
+
+    return wrapper
+
+
+def build_meeting_summary_agent() -> Agent:
+    return Agent(
         name="Meeting Summary Agent",
         instructions=[
             "Given meeting notes:",
@@ -109,7 +184,23 @@ class EnhancedProductManagerWorkflow(Workflow):
         response_model=MeetingSummary,
     )
 
-    task_agent: Agent = Agent(
+
+def build_summary_reconcile_agent() -> Agent:
+    return Agent(
+        name="Summary Reconcile Agent",
+        instructions=[
+            "Given a meeting summary merged from summaries of consecutive parts of one transcript:",
+            "1. Merge key points, decisions, blockers and follow-ups that say the same thing in different words",
+            "2. Merge action items that describe the same work, keeping the most specific details",
+            "3. Resolve contradictions in favour of what was said later in the meeting",
+            "4. Keep everything else, including attendees, dates and assignees, unchanged"
+        ],
+        response_model=MeetingSummary,
+    )
+
+
+def build_task_agent() -> Agent:
+    return Agent(
         name="Task Agent",
         instructions=[
             "Given a meeting summary:",
@@ -137,32 +228,46 @@ class EnhancedProductManagerWorkflow(Workflow):
         response_model=TaskList,
     )
 
-    workload_agent: Agent = Agent(
-        name="Workload Agent",
+
+def build_meeting_plan_agent() -> Agent:
+    return Agent(
+        name="Meeting Planner Agent",
         instructions=[
-            "Given team capacity and new tasks:",
-            "1. Analyze current team workload",
-            "2. Suggest task assignments based on capacity",
-            "3. Flag potential overallocation",
-            "4. Recommend task redistribution if needed"
+            "Given meeting notes, write the meeting summary and the tasks from it in one response:",
+            "1. Summarize the meeting: key points, decisions, attendees, project phase, recurring topics,",
+            "   blockers, follow-ups, meeting type and duration if mentioned",
+            "2. Leave the summary's action_items empty; the tasks are the action items",
+            "3. Generate detailed tasks with clear titles and descriptions",
+            "4. Set priorities based on impact, urgency, dependencies and resource availability",
+            "5. Create detailed time estimates considering complexity, required skills, similar past tasks and risks",
+            "6. Identify technical, resource and timeline dependencies between the tasks",
+            "7. Add tags for technical domain, project phase, required expertise and business impact"
         ],
-        response_model=List[TeamMember],
+        response_model=MeetingPlan,
     )
 
-    linear_agent: Agent = Agent(
+
+def build_linear_agent() -> Agent:
+    from phi.tools.linear_tools import LinearTool
+
+    return Agent(
         name="Linear Agent",
         instructions=[
             "Given a list of tasks:",
             "1. Create detailed issues in Linear",
             "2. Set appropriate priorities and deadlines",
-            "3. Link related issues",
+            "3. Link issues as given in the dependencies (blocked_by, blocks, related_to)",
             "4. Add relevant labels"
         ],
         tools=[LinearTool()],
         response_model=LinearIssueList,
     )
 
-    github_agent: Agent = Agent(
+
+def build_github_agent() -> Agent:
+    from phi.tools.github import GithubTools
+
+    return Agent(
         name="Github Agent",
         instructions=[
             "For code-related tasks:",
@@ -174,97 +279,593 @@ class EnhancedProductManagerWorkflow(Workflow):
         tools=[GithubTools()],
     )
 
-    slack_agent: Agent = Agent(
+
+def build_slack_agent() -> Agent:
+    from phi.tools.slack import SlackTools
+
+    return Agent(
         name="Slack Agent",
         instructions=[
             "Send detailed slack notifications including:",
             "1. Meeting summary",
             "2. New tasks and assignments",
-            "3. Priority updates",
+            "3. Priority updates, including the given priority alerts",
             "4. Workload alerts",
             "5. Links to Linear and GitHub issues"
         ],
         tools=[SlackTools()],
     )
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.team_capacity = {}  # Store team capacity data
 
-    def update_team_capacity(self, team_member: str, hours: float):
-        """Update available capacity for a team member"""
-        if team_member not in self.team_capacity:
-            self.team_capacity[team_member] = hours
+# Builders of the workflow's agents, called on first use of an agent that was not passed in
+AGENT_FACTORIES: Dict[str, Callable[[], Agent]] = {
+    "meeting_summary_agent": build_meeting_summary_agent,
+    "summary_reconcile_agent": build_summary_reconcile_agent,
+    "task_agent": build_task_agent,
+    "meeting_plan_agent": build_meeting_plan_agent,
+    "linear_agent": build_linear_agent,
+    "github_agent": build_github_agent,
+    "slack_agent": build_slack_agent,
+}
+
+
+class EnhancedProductManagerWorkflow(Workflow):
+    description: str = "Enhanced workflow for managing tasks, team capacity, and project progress with integrations."
+
+    # Agents are built from AGENT_FACTORIES on first use (see `agent`), so tools and their tokens are only
+    # needed by the stages that run
+    meeting_summary_agent: Optional[Agent] = None
+    summary_reconcile_agent: Optional[Agent] = None
+    task_agent: Optional[Agent] = None
+    meeting_plan_agent: Optional[Agent] = None
+    linear_agent: Optional[Agent] = None
+    github_agent: Optional[Agent] = None
+    slack_agent: Optional[Agent] = None
+    # Warm agents checked out by name instead of built per workflow (a worker.AgentPool); the caller returns them
+    agent_pool: Optional[Any] = None
+    # Store team capacity data
+    team_capacity: Dict[str, float] = Field(default_factory=dict)
+    # Roles and skills by team member, used to match tasks to people
+    team_roles: Dict[str, str] = Field(default_factory=dict)
+    team_skills: Dict[str, List[str]] = Field(default_factory=dict)
+    # "greedy" or "min_cost" task assignment
+    workload_strategy: Literal["greedy", "min_cost"] = "greedy"
+    # Assignments and overallocations from the last workload balancing
+    workload_report: Optional[WorkloadReport] = None
+    # Per-member, per-day planned hours of the last run's tasks, from which workload alerts are raised (a
+    # capacity.CapacityLedger, not imported here so importing the workflow does not load NumPy)
+    capacity_ledger: Optional[Any] = None
+    # Workload alerts cover members overbooked in any capacity_window_days span of the next capacity_horizon_days
+    capacity_horizon_days: int = 21
+    capacity_window_days: int = 5
+    # Run the Linear, GitHub and Slack stages concurrently once tasks are generated
+    concurrent_stages: bool = False
+    # Per-stage timeouts in seconds, keyed by stage method name (concurrent mode only)
+    stage_timeouts: Dict[str, float] = Field(default_factory=dict)
+    # Cache of meeting summaries and task lists keyed by their inputs
+    cache: Optional[ResultCache] = None
+    # Meeting notes longer than this many characters are summarized in chunks, in parallel
+    summary_chunk_chars: int = DEFAULT_CHUNK_CHARS
+    summary_max_workers: int = 4
+    # Run summary_reconcile_agent over the merged summary of a chunked transcript
+    reconcile_summaries: bool = True
+    # Summarize the meeting and generate its tasks in one meeting_plan_agent call, for notes short enough
+    # not to be chunked; falls back to the two calls if the fused call fails
+    fuse_summary_and_tasks: bool = False
+    # Number of recent tasks kept verbatim in the task history
+    history_window: int = 50
+    # Tasks kept in the session's dependency graph; the oldest, finished ones first, are dropped beyond it
+    task_graph_max_tasks: int = 500
+    # Approximate token budget for the historical data sent to the task agent
+    history_token_budget: int = 1500
+    # Create Linear issues directly through this client instead of the linear agent
+    linear_client: Optional[LinearClient] = None
+    # Create GitHub issues directly through this writer instead of the github agent
+    github_client: Optional[GithubIssueWriter] = None
+    # GitHub logins by team member, used to assign issues created by github_client
+    github_users: Dict[str, str] = Field(default_factory=dict)
+    # GitHub issues created by github_client during the last run
+    github_issues: List[GithubIssueResult] = Field(default_factory=list)
+    # Queue Slack digests rendered from local templates instead of calling the slack agent
+    notification_queue: Optional[NotificationQueue] = None
+    # Serializes agent payloads, pruned per stage, and tracks their token counts
+    prompt_encoder: PromptEncoder = Field(default_factory=PromptEncoder)
+    # Normalized, queryable record of the session's meetings, tasks and issue links (a task_store.TaskStore,
+    # not imported here so importing the workflow does not load SQLAlchemy)
+    task_store: Optional[Any] = None
+    # Similarity index of the tasks filed in earlier meetings; when set, only new tasks are filed
+    task_index: Optional[TaskIndex] = None
+    # Classification of each task of the last run against the task index
+    task_matches: List[TaskMatch] = Field(default_factory=list)
+    # Runs each agent on the models routed to its stage, hedging or falling back when the primary is slow or fails
+    model_router: Optional[ModelRouter] = None
+    # Model calls made through model_router during the last run, with the model that served each
+    model_calls: List[ModelCall] = Field(default_factory=list)
+    # Retries, circuit breakers, deadlines and hedging for OpenAI, Linear, GitHub and Postgres calls; the Linear and
+    # GitHub clients then leave retrying to it
+    resilience: Optional[Resilience] = None
+    # Traces stages, agent token usage, client requests and storage access
+    tracer: Optional[Tracer] = None
+    # Seconds spent in each stage during the last run
+    stage_timings: Dict[str, float] = Field(default_factory=dict)
+    # Checkpoint each stage's output in session_state under the run id, so `resume` can skip completed stages
+    checkpoint_stages: bool = True
+    # Number of unfinished runs whose checkpoints are kept
+    max_checkpoints: int = 20
+
+    # Dependency graph of every task in the session, loaded from session_state
+    _task_graph: TaskGraph = PrivateAttr(default_factory=TaskGraph)
+    _agent_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _checkpoint_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    # Run being resumed by `resume`, and the meeting digest that scopes the run's issue ids
+    _resume_run_id: Optional[str] = PrivateAttr(default=None)
+    _issue_scope: Optional[str] = PrivateAttr(default=None)
+    # Weekly capacity the run was started with, before balancing charges tasks against team_capacity
+    _weekly_capacity: Dict[str, float] = PrivateAttr(default_factory=dict)
+
+    def agent(self, name: str) -> Agent:
+        """The named agent, built by its AGENT_FACTORIES entry (or taken from agent_pool) on first use unless one was passed in"""
+        agent = getattr(self, name)
+        if agent is None:
+            with self._agent_lock:
+                agent = getattr(self, name)
+                if agent is None:
+                    agent = self.agent_pool.acquire(name) if self.agent_pool is not None else AGENT_FACTORIES[name]()
+                    agent.session_id = self.session_id
+                    setattr(self, name, agent)
+        return agent
+
+    def update_task_graph(self, tasks: TaskList) -> TaskGraph:
+        """Add new tasks to the session's dependency graph"""
+        self._task_graph = TaskGraph.from_state(self.session_state.get("task_graph"))
+        self._task_graph.add_tasks(tasks.tasks)
+        self._task_graph.prune(self.task_graph_max_tasks, keep=(task_key(task.task_title) for task in tasks.tasks))
+        self.session_state["task_graph"] = self._task_graph.to_state()
+        cycle = self._task_graph.find_cycle()
+        if cycle is not None:
+            logger.warning(f"Dependency cycle between tasks: {' -> '.join(cycle)}")
+        return self._task_graph
+
+    @contextmanager
+    def _trace(self, name: str, kind: str = "stage") -> Iterator[Optional[Span]]:
+        if self.tracer is None:
+            yield None
+            return
+        with self.tracer.span(name, kind, run_id=self.run_id, session_id=self.session_id) as span:
+            yield span
+
+    @model_validator(mode="after")
+    def _leave_retries_to_resilience(self) -> "EnhancedProductManagerWorkflow":
+        if self.resilience is not None:
+            for client in (self.linear_client, self.github_client):
+                if client is not None:
+                    client.disable_retries()
+        return self
+
+    def _call(
+        self, service: str, func: Callable[..., Any], *args: Any, policy: Optional[ResiliencePolicy] = None, **kwargs: Any
+    ) -> Any:
+        _check_cancelled()
+        if self.resilience is None:
+            result = func(*args, **kwargs)
         else:
-            self.team_capacity[team_member] -= hours
+            result = self.resilience.call(service, func, *args, policy=policy, **kwargs)
+        # The result of a call that finished after its stage timed out is dropped, not applied to the run
+        _check_cancelled()
+        return result
+
+    def _run_agent(self, name: str, message: str, agent: Optional[Agent] = None) -> RunResponse:
+        record("payload_bytes", len(message.encode("utf-8")))
+        agent = agent or self.agent(name)
+        unused = [agent]
+
+        def attempt() -> RunResponse:
+            # Retries and hedges run on their own copy, since an abandoned attempt may still be using the agent
+            check_abandoned()
+            current = unused.pop() if unused else agent.model_copy(update={"memory": AgentMemory()})
+            stop_when_abandoned(current)
+            return run_agent(self.model_router, name, current, message, self.model_calls)
+
+        response: RunResponse = self._call("openai", attempt, policy=self._routed_policy(name))
+        record_usage(response.metrics if response else None)
+        return response
+
+    def _routed_policy(self, name: str) -> Optional[ResiliencePolicy]:
+        """The openai policy for an agent whose model route hedges, falls back and keeps a budget of its own"""
+        route = self.model_router.route(name) if self.model_router is not None else None
+        if self.resilience is None or route is None:
+            return None
+        # One layer of each: the router hedges and falls back across models, the resilience layer keeps the circuit
+        update: Dict[str, Any] = {"hedge": False}
+        if len(route.models) > 1:
+            update["attempts"] = 1
+        if route.budget_seconds is not None:
+            update["deadline_seconds"] = None
+        return self.resilience.policy("openai").model_copy(update=update)
+
+    def read_from_storage(self):
+        with self._trace("read", kind="storage"):
+            return self._call("postgres", super().read_from_storage)
+
+    def write_to_storage(self):
+        with self._trace("write", kind="storage"):
+            return self._call("postgres", super().write_to_storage)
+
+    def _checkpoint(self) -> Dict[str, Any]:
+        return self.session_state.get("checkpoints", {}).get(self.run_id, {})
+
+    def _start_checkpoint(self, **run_input: Any) -> None:
+        # Keeps the checkpoint of a resumed run; otherwise starts one and drops the oldest beyond max_checkpoints
+        if not self.checkpoint_stages:
+            return
+        checkpoints = self.session_state.setdefault("checkpoints", {})
+        if self.run_id not in checkpoints:
+            checkpoints[self.run_id] = {"input": run_input, "started_at": time.time(), "stages": {}}
+            by_age = sorted(checkpoints, key=lambda run_id: checkpoints[run_id]["started_at"])
+            for run_id in by_age[: max(0, len(by_age) - self.max_checkpoints)]:
+                del checkpoints[run_id]
+
+    def _finish_checkpoint(self) -> None:
+        self.session_state.get("checkpoints", {}).pop(self.run_id, None)
+
+    def _save_checkpoint(self, stage: str, result: Any, annotation: Any, fields: Tuple[str, ...] = ()) -> None:
+        # Written to storage right away, so the run can be resumed from another process
+        if not self.checkpoint_stages:
+            return
+        with self._checkpoint_lock:
+            checkpoint = self.session_state.get("checkpoints", {}).get(self.run_id)
+            if checkpoint is None:
+                return
+            checkpoint["stages"][stage] = {
+                "result": type_adapter(annotation).dump_python(result, mode="json"),
+                "fields": {
+                    name: type_adapter(type(self).model_fields[name].annotation).dump_python(getattr(self, name), mode="json")
+                    for name in fields
+                },
+            }
+            self.write_to_storage()
+
+    def _resumable(self, stage: str, func: Callable, *args: Any, fields: Tuple[str, ...] = ()) -> Any:
+        """Run a stage and checkpoint its result and `fields`, or restore them if the run already completed it
+
+        Only successful results are checkpointed, so a resumed run repeats just the stage that failed
+        and the ones after it.
+        """
+        annotation = get_type_hints(func)["return"]
+        saved = self._checkpoint().get("stages", {}).get(stage)
+        if saved is not None:
+            logger.info(f"Restored {stage} from the checkpoint of run {self.run_id}")
+            for name in fields:
+                setattr(self, name, type_adapter(type(self).model_fields[name].annotation).validate_python(saved["fields"][name]))
+            return type_adapter(annotation).validate_python(saved["result"])
+
+        result = func(*args)
+        if result:
+            _check_cancelled()
+            self._save_checkpoint(stage, result, annotation, fields)
+        return result
+
+    def resume(self, run_id: str, stream: bool = False) -> Union[RunResponse, Iterator[RunResponse]]:
+        """Re-run a failed run from its checkpoint, skipping the stages it completed
+
+        Issues are created under ids derived from the meeting, so stages that failed part way
+        reuse the issues they had already created.
+        """
+        self.read_from_storage()
+        checkpoint = self.session_state.get("checkpoints", {}).get(run_id)
+        if checkpoint is None:
+            raise ValueError(f"No checkpoint for run {run_id}")
+        self._resume_run_id = run_id
+        return self.run(**checkpoint["input"], stream=stream)
+
+    def update_team_capacity(self, team_member: str, hours: float):
+        """Charge `hours` against a team member's remaining capacity (members without any go negative)"""
+        self.team_capacity[team_member] = self.team_capacity.get(team_member, 0.0) - hours
+
+    def _previous_context(self, meeting_notes: str) -> Tuple[Dict[str, Any], str]:
+        # Add context from previous meetings if available
+        previous_context = self.session_state.get("meeting_context", {})
+        digest = notes_digest(meeting_notes)
+        last_meeting = self.session_state.get("last_meeting", {})
+        if last_meeting.get("notes_digest") == digest:
+            # Re-running the same meeting: use the context it was originally summarized with
+            previous_context = last_meeting.get("previous_context", {})
+        return previous_context, digest
+
+    def _remember_meeting(self, summary: MeetingSummary, digest: str, previous_context: Dict[str, Any]) -> None:
+        # Store context for future meetings
+        self.session_state["meeting_context"] = summary.context.model_dump()
+        self.session_state["last_meeting"] = {"notes_digest": digest, "previous_context": previous_context}
 
+    @timed_stage
     def get_meeting_summary(self, meeting_notes: str) -> Optional[MeetingSummary]:
         """Generate a detailed structured summary from meeting notes"""
         try:
-            # Add context from previous meetings if available
-            previous_context = self.session_state.get("meeting_context", {})
-            
-            # Enhance meeting notes with previous context
-            enhanced_notes = {
-                "current_notes": meeting_notes,
-                "previous_context": previous_context
-            }
-            
-            response: RunResponse = self.meeting_summary_agent.run(enhanced_notes)
-            if response and response.content:
-                # Store context for future meetings
-                self.session_state["meeting_context"] = response.content.context.model_dump()
-                return response.content
+            previous_context, digest = self._previous_context(meeting_notes)
+            key = None
+            if self.cache is not None:
+                key = self._cache_key(
+                    "meeting_summary_agent",
+                    {"current_notes": normalize_notes(meeting_notes), "previous_context": previous_context},
+                )
+                cached_summary = self.cache.get(key, MeetingSummary)
+                if cached_summary is not None:
+                    self._remember_meeting(cached_summary, digest, previous_context)
+                    return cached_summary
+
+            calls_before = len(self.model_calls)
+            if len(meeting_notes) > self.summary_chunk_chars:
+                summary = self._summarize_chunked(meeting_notes, previous_context)
+            else:
+                # Enhance meeting notes with previous context
+                enhanced_notes = self.prompt_encoder.encode(
+                    "get_meeting_summary",
+                    current_notes=meeting_notes,
+                    previous_context=previous_context
+                )
+                response: RunResponse = self._run_agent("meeting_summary_agent", enhanced_notes)
+                summary = response.content if response and response.content else None
+
+            if summary is not None:
+                self._remember_meeting(summary, digest, previous_context)
+                if key is not None and self._served_by_primary(calls_before):
+                    self.cache.set(key, summary)
+                return summary
             return None
         except Exception as e:
             logger.error(f"Error generating meeting summary: {e}")
             return None
 
+    def _summarize_chunked(self, meeting_notes: str, previous_context: Dict[str, Any]) -> Optional[MeetingSummary]:
+        """Summarize a long transcript chunk by chunk in parallel, then merge and reconcile the partial summaries"""
+        chunks = split_transcript(meeting_notes, self.summary_chunk_chars)
+        preamble = transcript_preamble(meeting_notes)
+        record("chunks", len(chunks))
+        agent = self.agent("meeting_summary_agent")
+
+        def summarize(index: int, chunk: str) -> Optional[MeetingSummary]:
+            message = self.prompt_encoder.encode(
+                "get_meeting_summary",
+                meeting_header=preamble if index > 0 else "",
+                transcript_part=f"Part {index + 1} of {len(chunks)}; summarize only this part",
+                current_notes=chunk,
+                previous_context=previous_context
+            )
+            try:
+                # Agents keep per-run state and history, so each chunk runs on a shallow copy with its own memory
+                response: RunResponse = self._run_agent("meeting_summary_agent", message, agent.model_copy(update={"memory": AgentMemory()}))
+            except Exception as e:
+                logger.error(f"Error summarizing transcript part {index + 1}: {e}")
+                return None
+            return response.content if response and isinstance(response.content, MeetingSummary) else None
+
+        workers = max(1, min(self.summary_max_workers, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pm-summary") as executor:
+            partials = list(executor.map(propagate(summarize), range(len(chunks)), chunks))
+        missing = [index + 1 for index, partial in enumerate(partials) if partial is None]
+        if missing:
+            logger.warning(f"No summary for transcript parts {missing} of {len(chunks)}")
+        partials = [partial for partial in partials if partial is not None]
+        if not partials:
+            return None
+
+        merged = merge_summaries(partials)
+        if not self.reconcile_summaries or len(partials) == 1:
+            return merged
+        try:
+            response = self._run_agent(
+                "summary_reconcile_agent",
+                self.prompt_encoder.encode("reconcile_summary", meeting_summary=merged),
+            )
+        except Exception as e:
+            logger.error(f"Error reconciling meeting summary: {e}")
+            return merged
+        if response and isinstance(response.content, MeetingSummary):
+            return response.content
+        return merged
+
+    def _primary_model(self, name: str) -> str:
+        """The model an agent's calls go to first: its route's primary, else the agent's own"""
+        route = self.model_router.route(name) if self.model_router is not None else None
+        return route.models[0] if route is not None else agent_model_id(self.agent(name))
+
+    def _cache_key(self, name: str, payload: Any) -> str:
+        return cache_key(self.agent(name), payload, model_id=self._primary_model(name))
+
+    def _served_by_primary(self, since: int) -> bool:
+        # Answers from a hedge or fallback model are not cached under the primary's key
+        calls = self.model_calls[since:]
+        return all(call.model == self._primary_model(call.stage) for call in calls if call.outcome == "served")
+
+    def _task_cache_key(self, meeting_summary: MeetingSummary) -> Optional[str]:
+        # Historical data is advisory, so it is left out of the cache key and retries still hit
+        if self.cache is None:
+            return None
+        return self._cache_key(
+            "task_agent",
+            {"meeting_summary": meeting_summary.model_dump(mode="json"), "team_capacity": self.team_capacity},
+        )
+
+    def _task_history(self) -> TaskHistory:
+        return TaskHistory.from_state(self.session_state.get("task_history"), window=self.history_window)
+
+    def _task_input(self, meeting_summary: MeetingSummary) -> Tuple[str, TaskHistory]:
+        # Enhance task generation with historical data
+        history = self._task_history()
+        enhanced_input = self.prompt_encoder.encode(
+            "generate_tasks",
+            meeting_summary=meeting_summary,
+            historical_data=history.prompt_payload(self.history_token_budget),
+            team_capacity=self.team_capacity
+        )
+        return enhanced_input, history
+
+    def _record_tasks(self, tasks: TaskList, history: TaskHistory, key: Optional[str]) -> None:
+        # Store task data for future reference
+        history.record(tasks.tasks)
+        self.session_state["task_history"] = history.model_dump()
+        if key is not None:
+            self.cache.set(key, tasks)
+
+    @timed_stage
     def generate_tasks(self, meeting_summary: MeetingSummary) -> Optional[TaskList]:
         """Generate detailed tasks from meeting summary with smart estimation"""
         try:
-            # Enhance task generation with historical data
-            historical_data = self.session_state.get("task_history", [])
-            
-            enhanced_input = {
-                "meeting_summary": meeting_summary.model_dump_json(),
-                "historical_data": historical_data,
-                "team_capacity": self.team_capacity
-            }
-            
-            response: RunResponse = self.task_agent.run(enhanced_input)
+            key = self._task_cache_key(meeting_summary)
+            if key is not None:
+                cached_tasks = self.cache.get(key, TaskList)
+                if cached_tasks is not None:
+                    return cached_tasks
+
+            enhanced_input, history = self._task_input(meeting_summary)
+            calls_before = len(self.model_calls)
+            response: RunResponse = self._run_agent("task_agent", enhanced_input)
             if response and response.content:
-                # Store task data for future reference
-                if "task_history" not in self.session_state:
-                    self.session_state["task_history"] = []
-                self.session_state["task_history"].append(response.content.model_dump())
+                self._record_tasks(response.content, history, key if self._served_by_primary(calls_before) else None)
                 return response.content
             return None
         except Exception as e:
             logger.error(f"Error generating tasks: {e}")
             return None
 
+    @timed_stage
+    def summarize_and_generate_tasks(self, meeting_notes: str) -> Optional[MeetingPlan]:
+        """Generate the meeting summary and its tasks in a single agent call
+
+        The prompt carries what the two calls would have sent, minus the summary the task agent
+        would have been re-sent. Results are not cached, since they come from a different agent.
+        """
+        try:
+            previous_context, digest = self._previous_context(meeting_notes)
+            history = self._task_history()
+            message = self.prompt_encoder.encode(
+                "summarize_and_generate_tasks",
+                current_notes=meeting_notes,
+                previous_context=previous_context,
+                historical_data=history.prompt_payload(self.history_token_budget),
+                team_capacity=self.team_capacity
+            )
+            response: RunResponse = self._run_agent("meeting_plan_agent", message)
+            if not response or not isinstance(response.content, MeetingPlan):
+                return None
+            summary, tasks = response.content.split()
+            self._remember_meeting(summary, digest, previous_context)
+            self._record_tasks(tasks, history, None)
+            return response.content
+        except Exception as e:
+            logger.error(f"Error generating meeting summary and tasks: {e}")
+            return None
+
+    def generate_tasks_stream(self, meeting_summary: MeetingSummary) -> Iterator[Task]:
+        """Generate tasks like generate_tasks, yielding each task as soon as the agent has written it"""
+        started = time.perf_counter()
+        tasks: List[Task] = []
+        try:
+            with self._trace("generate_tasks") as span:
+                key = self._task_cache_key(meeting_summary)
+                if key is not None:
+                    cached_tasks = self.cache.get(key, TaskList)
+                    if cached_tasks is not None:
+                        yield from cached_tasks.tasks
+                        return
+
+                enhanced_input, history = self._task_input(meeting_summary)
+                record("payload_bytes", len(enhanced_input.encode("utf-8")))
+                agent = self.agent("task_agent")
+                if self.model_router is not None:
+                    # A stream cannot be hedged once items have been yielded, so it runs on the primary model only
+                    agent = self.model_router.agent_for("task_agent", agent)
+                for task in stream_items(agent, enhanced_input, "tasks", Task, response_model=TaskList):
+                    tasks.append(task)
+                    yield task
+                if tasks:
+                    self._record_tasks(TaskList(tasks=tasks), history, key)
+                elif span is not None:
+                    span.status = "failed"
+        except Exception as e:
+            logger.error(f"Error generating tasks: {e}")
+        finally:
+            self.stage_timings["generate_tasks"] = time.perf_counter() - started
+
+    @timed_stage
+    def classify_tasks(self, tasks: TaskList) -> Optional[TaskList]:
+        """Classify tasks as new, updates or duplicates of earlier ones, returning the new tasks to file"""
+        try:
+            if self.task_store is not None:
+                self.task_index.load(self.session_id, self._call("postgres", self.task_store.session_tasks, self.session_id))
+            self.task_matches = self.task_index.classify_tasks(self.session_id, tasks.tasks)
+            new_tasks = [task for task, match in zip(tasks.tasks, self.task_matches) if match.classification == "new"]
+            for match in self.task_matches:
+                if match.classification != "new":
+                    changed = f" ({', '.join(match.changes)} changed)" if match.changes else ""
+                    logger.info(f"Not filing '{match.task_title}', {match.classification} of '{match.matched_title}'{changed}")
+            return TaskList(tasks=new_tasks)
+        except Exception as e:
+            logger.error(f"Error classifying tasks: {e}")
+            return None
+
+    def _matched_issues(self, tasks: TaskList) -> List[LinearIssue]:
+        # Issues already filed for the tasks that were not filed again
+        matches = {match.task_title: match for match in self.task_matches}
+        return [
+            LinearIssue(
+                issue_title=task.task_title,
+                issue_description=task.task_description,
+                issue_assignee=task.task_assignee,
+                issue_link=matches[task.task_title].issue_link,
+                priority=task.priority,
+                deadline=task.deadline,
+            )
+            for task in tasks.tasks
+            if task.task_title in matches and matches[task.task_title].classification != "new"
+        ]
+
+    @timed_stage
+    def update_linear_issues(self, tasks: TaskList, linear_users: Dict[str, str]) -> Optional[List[str]]:
+        """Apply the changes of tasks classified as updates to the Linear issues they matched"""
+        try:
+            matches = {match.task_title: match for match in self.task_matches if match.classification == "update"}
+            updates = [
+                (issue_identifier(matches[task.task_title].issue_link), task) for task in tasks.tasks if task.task_title in matches
+            ]
+            updates = [(issue_id, task) for issue_id, task in updates if issue_id]
+            if not updates:
+                return []
+            if self.linear_client is None:
+                for _, task in updates:
+                    match = matches[task.task_title]
+                    logger.warning(f"Linear issue {match.issue_link} is out of date: {', '.join(match.changes)} changed")
+                return []
+            return self._call("linear", self.linear_client.update_issues, updates, linear_users)
+        except Exception as e:
+            logger.error(f"Error updating Linear issues: {e}")
+            return None
+
+    @timed_stage
     def balance_workload(self, tasks: TaskList) -> bool:
-        """Balance workload across team members"""
+        """Assign tasks to team members by required skills and remaining capacity"""
         try:
             team_data = [
                 TeamMember(
                     name=member,
                     capacity=capacity,
                     remaining_capacity=capacity,
-                    role="Team Member"
+                    role=self.team_roles.get(member, "Team Member"),
+                    skills=self.team_skills.get(member, []),
                 )
                 for member, capacity in self.team_capacity.items()
             ]
-            response: RunResponse = self.workload_agent.run({
-                "team": team_data,
-                "tasks": tasks.model_dump_json()
-            })
-            return bool(response and response.content)
+            report = balance_tasks(tasks.tasks, team_data, strategy=self.workload_strategy)
+            for overallocation in report.overallocations:
+                logger.warning(f"{overallocation.member} is overallocated by {overallocation.over_by:.1f}hrs")
+            self.team_capacity.update(report.remaining_capacity)
+            self.workload_report = report
+            return not report.unassigned
         except Exception as e:
             logger.error(f"Error balancing workload: {e}")
             return False
 
+    @timed_stage
     def create_linear_issues(self, tasks: TaskList, linear_users: Dict[str, str]) -> Optional[LinearIssueList]:
         """Create issues in Linear with enhanced metadata"""
         try:
@@ -273,119 +874,525 @@ class EnhancedProductManagerWorkflow(Workflow):
             if not all([project_id, team_id]):
                 raise ValueError("Missing Linear configuration")
 
-            response: RunResponse = self.linear_agent.run({
-                "project_id": project_id,
-                "team_id": team_id,
-                "tasks": tasks.model_dump_json(),
-                "users": linear_users
-            })
+            if self.linear_client is not None:
+                return self._create_linear_issues_directly(tasks, linear_users, project_id, team_id)
+
+            response: RunResponse = self._run_agent(
+                "linear_agent", self._linear_issues_input(tasks, linear_users, project_id, team_id)
+            )
             return response.content if response and response.content else None
         except Exception as e:
             logger.error(f"Error creating Linear issues: {e}")
             return None
 
-    def create_github_issues(self, tasks: TaskList) -> bool:
-        """Create GitHub issues for code-related tasks"""
+    def create_linear_issues_stream(self, tasks: TaskList, linear_users: Dict[str, str]) -> Iterator[LinearIssue]:
+        """Create issues like create_linear_issues, yielding each issue as soon as the agent has written it
+
+        With linear_client the issues are created in batches and yielded once they all exist. A stream
+        cannot be retried or hedged once issues have been yielded, so the agent runs once, on the
+        primary model, and only the openai circuit breaker applies.
+        """
+        started = time.perf_counter()
+        try:
+            with self._trace("create_linear_issues") as span:
+                project_id = os.getenv("LINEAR_PROJECT_ID")
+                team_id = os.getenv("LINEAR_TEAM_ID")
+                if not all([project_id, team_id]):
+                    raise ValueError("Missing Linear configuration")
+
+                if self.linear_client is not None:
+                    yield from self._create_linear_issues_directly(tasks, linear_users, project_id, team_id).issues
+                    return
+
+                agent = self.agent("linear_agent")
+                if self.model_router is not None:
+                    agent = self.model_router.agent_for("linear_agent", agent)
+                message = self._linear_issues_input(tasks, linear_users, project_id, team_id)
+                record("payload_bytes", len(message.encode("utf-8")))
+                breaker = self.resilience.breaker("openai") if self.resilience is not None else None
+                if breaker is not None:
+                    breaker.check()
+                issues = 0
+                try:
+                    for issue in stream_items(agent, message, "issues", LinearIssue, response_model=LinearIssueList):
+                        issues += 1
+                        yield issue
+                finally:
+                    if breaker is not None:
+                        breaker.record_success() if issues else breaker.record_failure()
+                if not issues and span is not None:
+                    span.status = "failed"
+        except Exception as e:
+            logger.error(f"Error creating Linear issues: {e}")
+        finally:
+            self.stage_timings["create_linear_issues"] = time.perf_counter() - started
+
+    def _linear_issues_input(self, tasks: TaskList, linear_users: Dict[str, str], project_id: str, team_id: str) -> str:
+        return self.prompt_encoder.encode(
+            "create_linear_issues",
+            project_id=project_id,
+            team_id=team_id,
+            tasks=self._task_graph.order_tasks(tasks.tasks),
+            dependencies=self._task_graph.linear_links(tasks.tasks),
+            users=linear_users
+        )
+
+    def _create_linear_issues_directly(
+        self, tasks: TaskList, linear_users: Dict[str, str], project_id: str, team_id: str
+    ) -> LinearIssueList:
+        """Create and link Linear issues through linear_client, reusing issues from earlier attempts"""
+        ordered_tasks = self._task_graph.order_tasks(tasks.tasks)
+        # Issue ids are derived from the meeting, so retrying it reuses the issues already created
+        scope = self._issue_scope or self.session_state.get("last_meeting", {}).get("notes_digest", "")
+        results = self._call("linear", self.linear_client.create_issues, ordered_tasks, team_id, project_id, linear_users, scope=scope)
+
+        issue_ids = {task_key(result.task_title): result.issue_id for result in results}
+        relations = []
+        for links in self._task_graph.linear_links(ordered_tasks):
+            issue_id = issue_ids[task_key(links.task)]
+            for blocker in links.blocked_by:
+                if task_key(blocker) in issue_ids:
+                    relations.append((issue_ids[task_key(blocker)], issue_id, "blocks"))
+            for related in links.related_to:
+                if task_key(related) in issue_ids and links.task < related:
+                    relations.append((issue_id, issue_ids[task_key(related)], "related"))
+        self._call("linear", self.linear_client.link_issues, relations)
+
+        return LinearIssueList(
+            issues=[
+                LinearIssue(
+                    issue_title=task.task_title,
+                    issue_description=task.task_description,
+                    issue_assignee=task.task_assignee,
+                    issue_link=result.url,
+                    priority=task.priority,
+                    deadline=task.deadline,
+                )
+                for task, result in zip(ordered_tasks, results)
+            ]
+        )
+
+    @timed_stage
+    def create_github_issues(self, tasks: TaskList, linear_issues: Optional[LinearIssueList] = None) -> bool:
+        """Create GitHub issues for code-related tasks, linked to their Linear issues"""
         try:
             code_tasks = [task for task in tasks.tasks if "code" in task.tags]
             if not code_tasks:
                 return True
 
-            response: RunResponse = self.github_agent.run({
-                "tasks": code_tasks,
-                "repo": os.getenv("GITHUB_REPO")
-            })
+            linear_urls = {
+                issue.issue_title: issue.issue_link for issue in (linear_issues.issues if linear_issues else [])
+                if issue.issue_link
+            }
+            if self.github_client is not None:
+                repo = os.getenv("GITHUB_REPO")
+                if not repo:
+                    raise ValueError("Missing GitHub configuration")
+                # Issues are keyed by the meeting, so retrying it reuses the issues already created
+                scope = self._issue_scope or self.session_state.get("last_meeting", {}).get("notes_digest", "")
+                self.github_issues = self._call(
+                    "github",
+                    self.github_client.create_issues,
+                    self._task_graph.order_tasks(code_tasks),
+                    repo,
+                    linear_urls=linear_urls,
+                    scope=scope,
+                    milestone=os.getenv("GITHUB_MILESTONE"),
+                    github_users=self.github_users,
+                )
+                return True
+
+            response: RunResponse = self._run_agent("github_agent", self.prompt_encoder.encode(
+                "create_github_issues",
+                tasks=code_tasks,
+                repo=os.getenv("GITHUB_REPO"),
+                linear_issues=linear_urls
+            ))
             return bool(response and response.content)
         except Exception as e:
             logger.error(f"Error creating GitHub issues: {e}")
             return False
 
+    def _workload_alerts(self, meeting_summary: MeetingSummary, tasks: TaskList) -> List[str]:
+        # Planned from the meeting date, so the tasks' deadlines fall inside the ledger
+        from capacity import CapacityLedger
+
+        self.capacity_ledger = CapacityLedger.from_tasks(
+            self._weekly_capacity or self.team_capacity, tasks.tasks, start=meeting_summary.date
+        )
+        windows = self.capacity_ledger.overallocations(days=self.capacity_horizon_days, window=self.capacity_window_days)
+        return [window.alert() for window in windows]
+
+    @timed_stage
     def send_notifications(self, meeting_summary: MeetingSummary, tasks: TaskList, linear_issues: LinearIssueList) -> bool:
         """Send comprehensive notifications"""
         try:
-            notification_data = {
-                "summary": meeting_summary.model_dump_json(),
-                "tasks": tasks.model_dump_json(),
-                "issues": linear_issues.model_dump_json() if linear_issues else None,
-                "workload_alerts": [
-                    f"{member}: {capacity}hrs remaining"
-                    for member, capacity in self.team_capacity.items()
-                    if capacity < 10  # Alert for low capacity
-                ]
-            }
-            response: RunResponse = self.slack_agent.run(notification_data)
+            priority_alerts = self._task_graph.priority_alerts(tasks.tasks)
+            workload_alerts = self._workload_alerts(meeting_summary, tasks)
+            if self.notification_queue is not None:
+                channel = os.getenv("SLACK_CHANNEL")
+                if not channel:
+                    raise ValueError("Missing Slack configuration")
+                _check_cancelled()
+                self.notification_queue.enqueue(
+                    channel,
+                    render_meeting_update(meeting_summary, tasks, linear_issues, priority_alerts, workload_alerts),
+                )
+                # Without a background thread nothing else would post this run's digest until a later enqueue
+                if not self.notification_queue.started:
+                    self.notification_queue.flush(channel)
+                return True
+
+            notification_data = self.prompt_encoder.encode(
+                "send_notifications",
+                summary=meeting_summary,
+                tasks=tasks.tasks,
+                issues=linear_issues.issues if linear_issues else None,
+                priority_alerts=priority_alerts,
+                workload_alerts=workload_alerts
+            )
+            response: RunResponse = self._run_agent("slack_agent", notification_data)
             return bool(response and response.content)
         except Exception as e:
             logger.error(f"Error sending notifications: {e}")
             return False
 
+    @staticmethod
+    def _cancellable(cancelled: threading.Event, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        token = _stage_cancelled.set(cancelled)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _stage_cancelled.reset(token)
+
+    def _stage_result(self, future: Future, stage: str, started: float, default: Any, cancelled: threading.Event) -> Any:
+        """Wait for a stage submitted at `started`, cancelling it and returning `default` if it exceeds its timeout"""
+        timeout = self.stage_timeouts.get(stage)
+        remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError:
+            cancelled.set()
+            logger.error(f"Stage {stage} timed out after {timeout}s")
+        except Exception as e:
+            logger.error(f"Error in stage {stage}: {e}")
+        return default
+
+    def run_integration_stages(
+        self, meeting_summary: MeetingSummary, tasks: TaskList, linear_users: Dict[str, str]
+    ) -> Optional[LinearIssueList]:
+        """Balance the workload, create Linear and GitHub issues and send notifications
+
+        Returns the Linear issues, or None if they could not be created.
+        """
+        stages = self._integration_stages(meeting_summary, tasks, linear_users)
+        while True:
+            try:
+                next(stages)
+            except StopIteration as stop:
+                return stop.value
+
+    def _integration_stages(
+        self, meeting_summary: MeetingSummary, tasks: TaskList, linear_users: Dict[str, str], stream: bool = False
+    ) -> Generator[BaseModel, None, Optional[LinearIssueList]]:
+        """Run the integration stages, yielding each Linear and GitHub issue once its stage has created it
+
+        With `stream`, sequential stages yield the linear agent's issues as it writes them. Returns the
+        Linear issues, or None if they could not be created.
+        """
+        if self.concurrent_stages:
+            return (yield from self._integration_stages_concurrently(meeting_summary, tasks, linear_users))
+
+        # Balance workload
+        if not self.balance_workload(tasks):
+            logger.warning("Workload balancing failed, proceeding with original assignments")
+
+        # Create Linear issues, as the agent writes them when streaming
+        if stream and self.linear_client is None and "create_linear_issues" not in self._checkpoint().get("stages", {}):
+            issues: List[LinearIssue] = []
+            for issue in self.create_linear_issues_stream(tasks, linear_users):
+                issues.append(issue)
+                yield issue
+            linear_issues = LinearIssueList(issues=issues) if issues else None
+            if linear_issues:
+                self._save_checkpoint("create_linear_issues", linear_issues, LinearIssueList)
+        else:
+            linear_issues = self._resumable("create_linear_issues", self.create_linear_issues, tasks, linear_users)
+            if linear_issues:
+                yield from linear_issues.issues
+        if not linear_issues:
+            return None
+
+        # Create GitHub issues for code-related tasks
+        if not self._resumable(
+            "create_github_issues", self.create_github_issues, tasks, linear_issues, fields=("github_issues",)
+        ):
+            logger.warning("Failed to create some GitHub issues")
+        yield from self.github_issues
+
+        # Send notifications
+        if not self._resumable("send_notifications", self.send_notifications, meeting_summary, tasks, linear_issues):
+            logger.warning("Failed to send some notifications")
+        return linear_issues
+
+    def _integration_stages_concurrently(
+        self, meeting_summary: MeetingSummary, tasks: TaskList, linear_users: Dict[str, str]
+    ) -> Generator[BaseModel, None, Optional[LinearIssueList]]:
+        """Run the GitHub and Slack stages concurrently once the Linear issues exist
+
+        Workload balancing runs first since it writes the assignees the issues are created with,
+        and GitHub and Slack both wait for the Linear issue links. Stages that time out are treated
+        as failed and cancelled: their thread makes no further service calls, and results, fields
+        and checkpoints it produces afterwards are dropped. A call already in flight (or an agent's
+        own tool calls) still completes, which the idempotent issue ids make safe to repeat.
+        """
+        # Balance workload
+        if not self.balance_workload(tasks):
+            logger.warning("Workload balancing failed, proceeding with original assignments")
+
+        stages = {name: threading.Event() for name in ("create_linear_issues", "create_github_issues", "send_notifications")}
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pm-stage")
+
+        def submit(stage: str, func: Callable, *args: Any, **kwargs: Any) -> Future:
+            return executor.submit(propagate(self._cancellable), stages[stage], self._resumable, stage, func, *args, **kwargs)
+
+        try:
+            started = time.monotonic()
+            linear_future = submit("create_linear_issues", self.create_linear_issues, tasks, linear_users)
+            linear_issues = self._stage_result(
+                linear_future, "create_linear_issues", started, None, stages["create_linear_issues"]
+            )
+            if not linear_issues:
+                return None
+            yield from linear_issues.issues
+
+            started = time.monotonic()
+            github_future = submit(
+                "create_github_issues", self.create_github_issues, tasks, linear_issues, fields=("github_issues",)
+            )
+            slack_future = submit("send_notifications", self.send_notifications, meeting_summary, tasks, linear_issues)
+            if not self._stage_result(github_future, "create_github_issues", started, False, stages["create_github_issues"]):
+                logger.warning("Failed to create some GitHub issues")
+            yield from self.github_issues
+            if not self._stage_result(slack_future, "send_notifications", started, False, stages["send_notifications"]):
+                logger.warning("Failed to send some notifications")
+            return linear_issues
+        finally:
+            for cancelled in stages.values():
+                cancelled.set()
+            executor.shutdown(wait=False)
+
+    @timed_stage
+    def save_to_task_store(
+        self,
+        meeting_notes: str,
+        meeting_summary: MeetingSummary,
+        tasks: TaskList,
+        linear_issues: Optional[LinearIssueList] = None,
+    ) -> bool:
+        """Write the run's meeting, tasks and issue links to the task store"""
+        try:
+            linear_urls = {issue.issue_title: issue.issue_link for issue in (linear_issues.issues if linear_issues else [])}
+            self._call(
+                "postgres",
+                self.task_store.save_run,
+                self.session_id,
+                notes_digest(meeting_notes),
+                meeting_summary,
+                tasks.tasks,
+                linear_urls,
+                self.github_issues,
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error saving to task store: {e}")
+            return False
+
     def run(
         self,
         meeting_notes: str,
         linear_users: Dict[str, str],
-        team_capacity: Dict[str, float]
-    ) -> RunResponse:
-        """Execute the enhanced workflow"""
-        logger.info("Starting enhanced product manager workflow")
+        team_capacity: Dict[str, float],
+        stream: bool = False,
+    ) -> Union[RunResponse, Iterator[RunResponse]]:
+        """Execute the enhanced workflow
+
+        With stream=True, returns an iterator of RunResponse events instead: the meeting summary,
+        then each task as it is generated, then each Linear issue as soon as the Linear stage has
+        created it (as the linear agent writes it when stages run sequentially without linear_client)
+        and each GitHub issue once its stage is done (before notifications are sent), and
+        finally the same workflow_completed (or workflow_failed) response the non-streaming run returns.
+        """
+        events = self._run_events(meeting_notes, linear_users, team_capacity, stream=stream)
+        if stream:
+            return events
+        for event in events:
+            if event.event != RunEvent.run_response:
+                return event
+
+    def _run_events(
+        self,
+        meeting_notes: str,
+        linear_users: Dict[str, str],
+        team_capacity: Dict[str, float],
+        stream: bool = False,
+    ) -> Iterator[RunResponse]:
+        if self._resume_run_id is not None:
+            self.run_id = self.run_response.run_id = self._resume_run_id
+            self._resume_run_id = None
+            logger.info(f"Resuming enhanced product manager workflow run {self.run_id}")
+        else:
+            logger.info("Starting enhanced product manager workflow")
+        self._start_checkpoint(meeting_notes=meeting_notes, linear_users=linear_users, team_capacity=team_capacity)
         
         # Initialize team capacity
         self.team_capacity = team_capacity.copy()
+        self._weekly_capacity = team_capacity.copy()
+        self.stage_timings = {}
+        self.github_issues = []
+        self.task_matches = []
+        self.model_calls = []
+        self._issue_scope = notes_digest(meeting_notes)
+
+        # Summary and tasks in one call if fused, otherwise (or if that fails) one call each
+        meeting_summary: Optional[MeetingSummary] = None
+        tasks: Optional[TaskList] = None
+        completed_stages = self._checkpoint().get("stages", {})
+        if (
+            self.fuse_summary_and_tasks
+            and len(meeting_notes) <= self.summary_chunk_chars
+            and not {"get_meeting_summary", "generate_tasks"} & set(completed_stages)
+        ):
+            plan = self.summarize_and_generate_tasks(meeting_notes)
+            if plan is not None:
+                meeting_summary, tasks = plan.split()
+                self._save_checkpoint("get_meeting_summary", meeting_summary, MeetingSummary)
+                self._save_checkpoint("generate_tasks", tasks, TaskList)
+            else:
+                logger.warning("Fused summary and task generation failed, falling back to separate calls")
 
         # Generate meeting summary
-        meeting_summary = self.get_meeting_summary(meeting_notes)
+        if meeting_summary is None:
+            meeting_summary = self._resumable("get_meeting_summary", self.get_meeting_summary, meeting_notes)
         if not meeting_summary:
-            return RunResponse(
+            yield RunResponse(
                 run_id=self.run_id,
-                event=RunEvent.workflow_failed,
+                event=WORKFLOW_FAILED,
                 content="Failed to generate meeting summary"
             )
+            return
+        yield self._item_event(meeting_summary)
 
-        # Generate tasks
-        tasks = self.generate_tasks(meeting_summary)
+        # Generate tasks, streaming them as they are parsed if requested
+        if tasks is not None:
+            for task in tasks.tasks:
+                yield self._item_event(task)
+        elif stream and "generate_tasks" not in self._checkpoint().get("stages", {}):
+            task_items: List[Task] = []
+            for task in self.generate_tasks_stream(meeting_summary):
+                task_items.append(task)
+                yield self._item_event(task)
+            tasks = TaskList(tasks=task_items) if task_items else None
+            if tasks:
+                self._save_checkpoint("generate_tasks", tasks, TaskList)
+        else:
+            tasks = self._resumable("generate_tasks", self.generate_tasks, meeting_summary)
+            for task in tasks.tasks if tasks else []:
+                yield self._item_event(task)
         if not tasks:
-            return RunResponse(
+            yield RunResponse(
                 run_id=self.run_id,
-                event=RunEvent.workflow_failed,
+                event=WORKFLOW_FAILED,
                 content="Failed to generate tasks"
             )
+            return
 
-        # Balance workload
-        if not self.balance_workload(tasks):
-            logger.warning("Workload balancing failed, proceeding with original assignments")
+        # Index task dependencies for issue linking and priority alerts
+        self.update_task_graph(tasks)
 
-        # Create Linear issues
-        linear_issues = self.create_linear_issues(tasks, linear_users)
+        # Only file tasks that earlier meetings did not already cover
+        new_tasks = tasks
+        if self.task_index is not None:
+            new_tasks = self._resumable("classify_tasks", self.classify_tasks, tasks, fields=("task_matches",)) or tasks
+
+        # Balance workload, create Linear/GitHub issues and send notifications, streaming issues as they are created
+        if new_tasks.tasks:
+            linear_issues = yield from self._item_events(self._integration_stages(meeting_summary, new_tasks, linear_users, stream))
+        else:
+            linear_issues = LinearIssueList(issues=[])
+        if linear_issues and self.task_matches:
+            matched_issues = self._matched_issues(tasks)
+            linear_issues.issues.extend(matched_issues)
+            for issue in matched_issues:
+                yield self._item_event(issue)
+        if linear_issues and any(match.classification == "update" for match in self.task_matches):
+            if self._resumable("update_linear_issues", self.update_linear_issues, tasks, linear_users) is None:
+                logger.warning("Failed to update some Linear issues")
+        if linear_issues and self.task_index is not None:
+            self.task_index.add_tasks(
+                self.session_id,
+                tasks.tasks,
+                {issue.issue_title: issue.issue_link for issue in linear_issues.issues if issue.issue_link},
+                self.task_matches,
+            )
+        if self.task_store is not None:
+            self.save_to_task_store(meeting_notes, meeting_summary, tasks, linear_issues)
         if not linear_issues:
-            return RunResponse(
+            yield RunResponse(
                 run_id=self.run_id,
-                event=RunEvent.workflow_failed,
+                event=WORKFLOW_FAILED,
                 content="Failed to create Linear issues"
             )
+            return
 
-        # Create GitHub issues for code-related tasks
-        if not self.create_github_issues(tasks):
-            logger.warning("Failed to create some GitHub issues")
+        self._finish_checkpoint()
+        content = {
+            "meeting_summary": meeting_summary.model_dump_json(),
+            "tasks": tasks.model_dump_json(),
+            "linear_issues": linear_issues.model_dump_json()
+        }
+        if self.task_index is not None:
+            content["task_matches"] = type_adapter(List[TaskMatch]).dump_json(self.task_matches).decode()
+        yield RunResponse(run_id=self.run_id, event=RunEvent.workflow_completed, content=content)
 
-        # Send notifications
-        if not self.send_notifications(meeting_summary, tasks, linear_issues):
-            logger.warning("Failed to send some notifications")
+    def _item_events(self, items: Generator[BaseModel, None, Any]) -> Generator[RunResponse, None, Any]:
+        """Item events for everything `items` yields, returning what it returns"""
+        while True:
+            try:
+                item = next(items)
+            except StopIteration as stop:
+                return stop.value
+            yield self._item_event(item)
 
+    def _item_event(self, item: BaseModel) -> RunResponse:
         return RunResponse(
             run_id=self.run_id,
-            event=RunEvent.workflow_completed,
-            content={
-                "meeting_summary": meeting_summary.model_dump_json(),
-                "tasks": tasks.model_dump_json(),
-                "linear_issues": linear_issues.model_dump_json()
-            }
+            event=RunEvent.run_response,
+            content=item,
+            content_type=type(item).__name__,
+        )
+
+
+_enhanced_pm: Optional[EnhancedProductManagerWorkflow] = None
+
+
+def get_enhanced_pm() -> EnhancedProductManagerWorkflow:
+    """The default workflow, created (and connected to its storage) on first use rather than at import"""
+    global _enhanced_pm
+    if _enhanced_pm is None:
+        from storage import workflow_storage
+
+        _enhanced_pm = EnhancedProductManagerWorkflow(
+            session_id="enhanced-product-manager",
+            storage=workflow_storage("enhanced_pm_workflows"),
+            model_router=default_router(),
+            resilience=default_resilience(),
         )
+    return _enhanced_pm
 
 
-# Create the workflow
-enhanced_pm = EnhancedProductManagerWorkflow(
-    session_id="enhanced-product-manager",
-    storage=PgWorkflowStorage(
-        table_name="enhanced_pm_workflows",
-        db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-    ),
-) 
\ No newline at end of file
+def __getattr__(name: str) -> Any:
+    # Keeps `from workflow import enhanced_pm` working
+    if name == "enhanced_pm":
+        return get_enhanced_pm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
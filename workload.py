@@ -0,0 +1,243 @@
+import re
+import math
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Literal, Sequence, Set, Tuple
+from pydantic import BaseModel, Field
+
+if TYPE_CHECKING:
+    from workflow import Task, TeamMember
+
+PRIORITY_RANK = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+
+# Costs of a missing skill and of going over capacity in the min-cost assignment,
+# relative to filling one member's whole remaining capacity
+SKILL_PENALTY = 4.0
+OVERFLOW_PENALTY = 10.0
+
+
+class WorkloadAssignment(BaseModel):
+    task_title: str = Field(..., description="Title of the assigned task")
+    assignee: str = Field(..., description="Team member the task is assigned to")
+    hours: float = Field(..., description="Hours charged against the assignee's capacity")
+    skill_match: float = Field(..., description="Fraction of required skills covered by the assignee")
+
+
+class Overallocation(BaseModel):
+    member: str = Field(..., description="Overallocated team member")
+    remaining_capacity: float = Field(..., description="Capacity in hours before this assignment")
+    assigned_hours: float = Field(..., description="Hours assigned in this run")
+    over_by: float = Field(..., description="Hours beyond the remaining capacity")
+
+
+class WorkloadReport(BaseModel):
+    assignments: List[WorkloadAssignment] = Field(default_factory=list, description="Task assignments")
+    remaining_capacity: Dict[str, float] = Field(default_factory=dict, description="Capacity left per member")
+    overallocations: List[Overallocation] = Field(default_factory=list, description="Members assigned beyond capacity")
+    unassigned: List[str] = Field(default_factory=list, description="Tasks that could not be assigned")
+
+
+def task_hours(task: "Task", estimate: Literal["minimum", "expected", "maximum"] = "expected") -> float:
+    """Hours a task is expected to take from its time estimate range"""
+    if estimate == "minimum":
+        return task.time_estimate.minimum_hours
+    if estimate == "maximum":
+        return task.time_estimate.maximum_hours
+    return (task.time_estimate.minimum_hours + task.time_estimate.maximum_hours) / 2
+
+
+@lru_cache(maxsize=4096)
+def _words(text: str) -> FrozenSet[str]:
+    return frozenset(word for word in re.split(r"[^a-z0-9+#]+", text.lower()) if len(word) > 1)
+
+
+def member_vocabulary(member: "TeamMember") -> Set[str]:
+    words = set(_words(member.role))
+    for skill in member.skills:
+        words |= _words(skill)
+    return words
+
+
+def skill_match(task: "Task", vocabulary: Set[str]) -> float:
+    """Fraction of the task's required skills that share a word with the member's role or skills"""
+    if not task.required_skills:
+        return 1.0
+    matched = sum(1 for skill in task.required_skills if _words(skill) & vocabulary)
+    return matched / len(task.required_skills)
+
+
+def _ordered(tasks: Sequence["Task"], estimate: str) -> List[int]:
+    # Most urgent first, then longest first so large tasks are placed while capacity is still free
+    return sorted(
+        range(len(tasks)),
+        key=lambda i: (PRIORITY_RANK.get(tasks[i].priority.level, 4), -task_hours(tasks[i], estimate), i),
+    )
+
+
+def _hungarian(cost: List[List[float]]) -> List[int]:
+    """Minimum-cost assignment of each row to a distinct column (rows <= columns)"""
+    n, m = len(cost), len(cost[0])
+    u, v = [0.0] * (n + 1), [0.0] * (m + 1)
+    p, way = [0] * (m + 1), [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [math.inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = p[j0], math.inf, 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    assignment = [0] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment
+
+
+class WorkloadBalancer:
+    """Deterministic assignment of tasks to team members by skills and remaining capacity
+
+    The greedy strategy places tasks most-urgent and longest first on the member with the best
+    skill match who can still fit them, falling back to the member with the most capacity left.
+    The min_cost strategy solves a min-cost matching per round of tasks instead, trading speed
+    for a more even assignment.
+    """
+
+    def __init__(
+        self,
+        team: Sequence["TeamMember"],
+        strategy: Literal["greedy", "min_cost"] = "greedy",
+        estimate: Literal["minimum", "expected", "maximum"] = "expected",
+        keep_existing: bool = True,
+    ):
+        self.team = list(team)
+        self.strategy = strategy
+        self.estimate = estimate
+        self.keep_existing = keep_existing
+        self._vocabulary = {member.name: member_vocabulary(member) for member in self.team}
+
+    def balance(self, tasks: Sequence["Task"]) -> WorkloadReport:
+        """Write `task_assignee` onto the tasks and report the resulting load"""
+        remaining = {member.name: member.remaining_capacity for member in self.team}
+        report = WorkloadReport()
+        if not self.team:
+            report.unassigned = [task.task_title for task in tasks]
+            return report
+
+        open_tasks: List[int] = []
+        for i in _ordered(tasks, self.estimate):
+            task = tasks[i]
+            if self.keep_existing and task.task_assignee in remaining:
+                self._assign(task, task.task_assignee, remaining, report)
+            else:
+                open_tasks.append(i)
+
+        if self.strategy == "min_cost" and open_tasks:
+            self._min_cost(tasks, open_tasks, remaining, report)
+        else:
+            for i in open_tasks:
+                self._assign(tasks[i], self._best_member(tasks[i], remaining), remaining, report)
+
+        report.remaining_capacity = remaining
+        for member in self.team:
+            if remaining[member.name] < 0:
+                report.overallocations.append(
+                    Overallocation(
+                        member=member.name,
+                        remaining_capacity=member.remaining_capacity,
+                        assigned_hours=member.remaining_capacity - remaining[member.name],
+                        over_by=-remaining[member.name],
+                    )
+                )
+        return report
+
+    def _assign(self, task: "Task", name: str, remaining: Dict[str, float], report: WorkloadReport) -> None:
+        hours = task_hours(task, self.estimate)
+        remaining[name] -= hours
+        task.task_assignee = name
+        report.assignments.append(
+            WorkloadAssignment(
+                task_title=task.task_title,
+                assignee=name,
+                hours=hours,
+                skill_match=skill_match(task, self._vocabulary[name]),
+            )
+        )
+
+    def _best_member(self, task: "Task", remaining: Dict[str, float]) -> str:
+        hours = task_hours(task, self.estimate)
+
+        def rank(member: "TeamMember") -> Tuple[bool, float, float]:
+            left = remaining[member.name]
+            return (left >= hours, skill_match(task, self._vocabulary[member.name]), left)
+
+        return max(self.team, key=rank).name
+
+    def _cost(self, task: "Task", name: str, remaining: Dict[str, float], capacity: float, scale: float) -> float:
+        hours = task_hours(task, self.estimate)
+        load = capacity - remaining[name] + hours
+        overflow = max(0.0, hours - remaining[name])
+        cost = (1 - skill_match(task, self._vocabulary[name])) * SKILL_PENALTY + load / max(capacity, scale)
+        if overflow > 0:
+            cost += OVERFLOW_PENALTY * (1 + overflow / scale)
+        return cost
+
+    def _min_cost(self, tasks: Sequence["Task"], open_tasks: List[int], remaining: Dict[str, float], report: WorkloadReport) -> None:
+        """Assign tasks in rounds of min-cost matchings against the members' current remaining capacity
+
+        Each round matches up to one task per member; a task may instead be deferred to the next
+        round when every member it could go to would be pushed over capacity.
+        """
+        capacity = {member.name: max(member.remaining_capacity, 0.0) for member in self.team}
+        scale = sum(task_hours(tasks[i], self.estimate) for i in open_tasks) / len(open_tasks) or 1.0
+        pending = list(open_tasks)
+        while pending:
+            batch, pending = pending[: len(self.team)], pending[len(self.team):]
+            cost = [
+                [self._cost(tasks[i], member.name, remaining, capacity[member.name], scale) for member in self.team]
+                + [OVERFLOW_PENALTY / 2] * len(batch)
+                for i in batch
+            ]
+            deferred = []
+            for i, column in zip(batch, _hungarian(cost)):
+                if column < len(self.team):
+                    self._assign(tasks[i], self.team[column].name, remaining, report)
+                else:
+                    deferred.append(i)
+            if len(deferred) == len(batch):
+                # Nothing fits anywhere: place the remaining tasks where they overflow least
+                for i in deferred + pending:
+                    self._assign(tasks[i], self._best_member(tasks[i], remaining), remaining, report)
+                return
+            pending = deferred + pending
+
+
+def balance_tasks(
+    tasks: Sequence["Task"],
+    team: Sequence["TeamMember"],
+    strategy: Literal["greedy", "min_cost"] = "greedy",
+    estimate: Literal["minimum", "expected", "maximum"] = "expected",
+    keep_existing: bool = True,
+) -> WorkloadReport:
+    """Assign tasks to team members; see WorkloadBalancer"""
+    return WorkloadBalancer(team, strategy=strategy, estimate=estimate, keep_existing=keep_existing).balance(tasks)